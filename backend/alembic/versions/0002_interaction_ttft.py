@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0002_interaction_ttft"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("interactions", sa.Column("ttft_ms", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("interactions", "ttft_ms")
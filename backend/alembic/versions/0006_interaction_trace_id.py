@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0006_interaction_trace_id"
+down_revision = "0005_interaction_cached"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("interactions", sa.Column("trace_id", sa.String(length=32), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("interactions", "trace_id")
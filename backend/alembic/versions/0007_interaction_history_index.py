@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0007_interaction_history_index"
+down_revision = "0006_interaction_trace_id"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps interactions writable while the index builds on a large table.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_interactions_history",
+            "interactions",
+            ["tenant_id", "user_id", "case_id", "created_at"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_interactions_history", table_name="interactions", postgresql_concurrently=True)
@@ -1,19 +1,23 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
+from app.core.config import get_settings
 from app.core.deps import get_current_user
+from app.core.principal import Principal
 from app.db.session import get_db
 from app.db import models
 from app.core.admin_settings import load_admin_settings, save_admin_settings
+from app.services.response_cache import clear_response_cache
 
 
 router = APIRouter()
 
 
-def _ensure_admin(user: models.User) -> None:
+def _ensure_admin(user: Principal) -> None:
     if user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
 
@@ -23,13 +27,16 @@ class AdminSettings(BaseModel):
 
 
 @router.get("/summary")
-async def admin_summary(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+async def admin_summary(db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     _ensure_admin(current_user)
 
-    tenants = db.query(models.Tenant).all()
-    users = db.query(models.User).all()
-    cases = db.query(models.Case).all()
-    interactions = db.query(models.Interaction).order_by(models.Interaction.created_at.desc()).limit(50).all()
+    tenants = (await db.scalars(select(models.Tenant))).all()
+    users = (await db.scalars(select(models.User))).all()
+    cases = (await db.scalars(select(models.Case))).all()
+    interactions = (
+        await db.scalars(select(models.Interaction).order_by(models.Interaction.created_at.desc()).limit(50))
+    ).all()
+    trace_url = get_settings().tracing_trace_url_template
 
     return {
         "tenants": [
@@ -64,6 +71,10 @@ async def admin_summary(db: Session = Depends(get_db), current_user: models.User
                 "tenant_id": str(i.tenant_id),
                 "user_id": str(i.user_id) if i.user_id else None,
                 "llm_model": i.llm_model,
+                "cached": i.cached,
+                "latency_ms": i.latency_ms,
+                "trace_id": i.trace_id,
+                "trace_url": trace_url.format(trace_id=i.trace_id) if trace_url and i.trace_id else None,
                 "created_at": i.created_at.isoformat() if i.created_at else None,
             }
             for i in interactions
@@ -72,14 +83,16 @@ async def admin_summary(db: Session = Depends(get_db), current_user: models.User
 
 
 @router.get("/settings", response_model=AdminSettings)
-async def get_admin_settings(current_user: models.User = Depends(get_current_user)) -> AdminSettings:
+async def get_admin_settings(current_user: Principal = Depends(get_current_user)) -> AdminSettings:
     _ensure_admin(current_user)
     data = load_admin_settings()
     return AdminSettings(system_prompt=data["system_prompt"])
 
 
 @router.put("/settings", response_model=AdminSettings)
-async def update_admin_settings(payload: AdminSettings, current_user: models.User = Depends(get_current_user)) -> AdminSettings:
+async def update_admin_settings(payload: AdminSettings, current_user: Principal = Depends(get_current_user)) -> AdminSettings:
     _ensure_admin(current_user)
     save_admin_settings(payload.system_prompt)
+    # Keys include the prompt, so other workers miss naturally; this just frees the stale entries.
+    clear_response_cache()
     return payload
@@ -3,11 +3,13 @@ from __future__ import annotations
 from datetime import timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import get_settings
 from app.core.security import verify_password, get_password_hash, create_access_token
 from app.core.deps import get_current_user
+from app.core.principal import Principal
 from app.db.session import get_db
 from app.db import models
 from app.schemas.auth import LoginRequest, TokenResponse, UserRead
@@ -17,15 +19,15 @@ router = APIRouter()
 
 
 @router.post("/login", response_model=TokenResponse)
-async def login(payload: LoginRequest, db: Session = Depends(get_db)):
+async def login(payload: LoginRequest, db: AsyncSession = Depends(get_db)):
     settings = get_settings()
 
-    user = (
-        db.query(models.User)
+    result = await db.execute(
+        select(models.User)
         .join(models.Tenant, models.User.tenant_id == models.Tenant.id)
-        .filter(models.User.email == payload.email)
-        .one_or_none()
+        .where(models.User.email == payload.email)
     )
+    user = result.scalar_one_or_none()
     if user is None or not verify_password(payload.password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
 
@@ -37,5 +39,10 @@ async def login(payload: LoginRequest, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=UserRead)
-async def read_me(current_user: models.User = Depends(get_current_user)):
-    return UserRead.from_orm(current_user)
+async def read_me(current_user: Principal = Depends(get_current_user)):
+    return UserRead(
+        id=str(current_user.id),
+        email=current_user.email,
+        tenant_id=str(current_user.tenant_id),
+        role=current_user.role,
+    )
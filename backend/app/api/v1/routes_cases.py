@@ -1,29 +1,34 @@
+import logging
 import time
+from typing import Literal
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.schemas.case import CaseInput, CaseAnalysisResponse
-from app.services.llm_client import LLMClient
+from app.schemas.job import JobAccepted
+from app.services.admission import check_admission
+from app.services.case_analysis import case_interaction, run_case_analysis
+from app.services.llm_client import get_llm_client
+from app.services.queue_producer import publish_analyze_job
 from app.services.rag import retrieve_context
 from app.services.safety import apply_safety_postprocess
-from app.core.config import get_settings
 from app.core.deps import get_current_user
+from app.core.metrics import timed_stage
+from app.core.principal import Principal
+from app.core.sse import SSE_HEADERS, sse_event
 from app.db import models
-from app.db.session import get_db
+from app.db.session import AsyncSessionLocal, get_db
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.post("/analyze", response_model=CaseAnalysisResponse)
-async def analyze_case(
-    payload: CaseInput,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    tenant_id = current_user.tenant_id
 
+async def _create_case(db: AsyncSession, payload: CaseInput, current_user: Principal) -> models.Case:
     case = models.Case(
-        tenant_id=tenant_id,
+        tenant_id=current_user.tenant_id,
         created_by_user_id=current_user.id,
         patient_age=payload.patient_age,
         sex=payload.sex,
@@ -33,32 +38,130 @@ async def analyze_case(
         vitals=payload.vitals,
     )
     db.add(case)
-    db.commit()
-    db.refresh(case)
+    with timed_stage("db_commit"):
+        await db.commit()
+    return case
+
+
+@router.post(
+    "/analyze",
+    response_model=CaseAnalysisResponse,
+    responses={status.HTTP_202_ACCEPTED: {"model": JobAccepted}},
+)
+async def analyze_case(
+    payload: CaseInput,
+    mode: Literal["sync", "async"] = Query("sync"),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Analyze a case inline, or with ``mode=async`` queue it and poll ``GET /jobs/{id}``."""
+    case = await _create_case(db, payload, current_user)
 
-    contexts = await retrieve_context(payload, tenant_id=str(tenant_id))
-    client = LLMClient()
+    if mode == "async":
+        return await _submit_analysis_job(db, case, payload, current_user)
 
-    started = time.monotonic()
-    result = await client.analyze_case(payload, contexts)
-    latency_ms = int((time.monotonic() - started) * 1000)
+    result, latency_ms, cached = await run_case_analysis(payload, tenant_id=str(case.tenant_id))
 
-    result = apply_safety_postprocess(result)
+    db.add(case_interaction(case.id, case.tenant_id, current_user.id, payload, result, latency_ms, cached=cached))
+    with timed_stage("db_commit"):
+        await db.commit()
 
-    settings = get_settings()
-    request_payload = {"kind": "analyze_case"}
-    request_payload.update(payload.model_dump())
+    return result
 
-    interaction = models.Interaction(
-        case_id=case.id,
-        tenant_id=tenant_id,
+
+async def _submit_analysis_job(
+    db: AsyncSession, case: models.Case, payload: CaseInput, current_user: Principal
+) -> JSONResponse:
+    job = models.LLMJob(
+        tenant_id=case.tenant_id,
         user_id=current_user.id,
-        request_payload=request_payload,
-        response_payload=result.model_dump(),
-        llm_model=settings.vllm_model,
-        latency_ms=latency_ms,
+        case_id=case.id,
+        kind="analyze_case",
+        status="queued",
+        attempts=0,
+        request_payload=payload.model_dump(),
     )
-    db.add(interaction)
-    db.commit()
+    db.add(job)
+    with timed_stage("db_commit"):
+        await db.commit()
 
-    return result
+    try:
+        await publish_analyze_job(
+            {
+                "job_id": str(job.id),
+                "kind": job.kind,
+                "tenant_id": str(case.tenant_id),
+                "user_id": str(current_user.id),
+                "case_id": str(case.id),
+                "payload": job.request_payload,
+            }
+        )
+    except Exception as exc:
+        logger.warning("Could not enqueue job %s: %s", job.id, exc)
+        job.status = "failed"
+        job.error = "enqueue failed"
+        with timed_stage("db_commit"):
+            await db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Job queue unavailable",
+            headers={"Retry-After": "5"},
+        )
+
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=JobAccepted(job_id=str(job.id), status=job.status).model_dump(),
+        headers={"Location": f"/api/v1/jobs/{job.id}"},
+    )
+
+
+@router.post("/analyze/stream")
+async def analyze_case_stream(
+    payload: CaseInput,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Stream the analysis summary as Server-Sent Events.
+
+    Emits ``token`` events with text deltas, then one ``done`` event carrying the
+    full ``CaseAnalysisResponse`` (or an ``error`` event if generation fails).
+    """
+    check_admission(str(current_user.tenant_id))
+    case = await _create_case(db, payload, current_user)
+    user_id = current_user.id
+    contexts = await retrieve_context(payload, tenant_id=str(case.tenant_id))
+    client = get_llm_client()
+    messages = client.case_messages(payload, contexts)
+
+    async def events():
+        parts: list[str] = []
+        ttft_ms: int | None = None
+        started = time.monotonic()
+        try:
+            async for delta in client._chat_stream(messages, str(case.tenant_id)):
+                if ttft_ms is None:
+                    ttft_ms = int((time.monotonic() - started) * 1000)
+                parts.append(delta)
+                yield sse_event("token", {"content": delta})
+        except Exception as exc:
+            yield sse_event("error", {"detail": str(exc) or exc.__class__.__name__})
+            return
+        latency_ms = int((time.monotonic() - started) * 1000)
+
+        result = apply_safety_postprocess(
+            CaseAnalysisResponse(
+                summary="".join(parts).strip(),
+                differentials=[],
+                red_flags=[],
+                advice=[],
+                disclaimer="",
+            )
+        )
+        # The request-scoped session is closed once the response starts streaming.
+        async with AsyncSessionLocal() as session:
+            session.add(case_interaction(case.id, case.tenant_id, user_id, payload, result, latency_ms, ttft_ms))
+            with timed_stage("db_commit"):
+                await session.commit()
+        yield sse_event("done", result.model_dump())
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -1,130 +1,268 @@
 from __future__ import annotations
 
+import base64
 import time
+import uuid
+from datetime import datetime
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.schemas.chat import ChatRequest, ChatResponse, ChatMessage, ChatHistoryResponse
-from app.services.llm_client import LLMClient
+from app.services.admission import check_admission
+from app.services.llm_client import get_llm_client
 from app.core.admin_settings import load_admin_settings
 from app.core.config import get_settings
 from app.core.deps import get_current_user
-from app.db.session import get_db
+from app.core.metrics import timed_stage
+from app.core.principal import Principal
+from app.core.sse import SSE_HEADERS, sse_event
+from app.core.tracing import current_trace_id
+from app.db.session import AsyncSessionLocal, get_db
 from app.db import models
 
 
 router = APIRouter()
 
 
-@router.post("/chat", response_model=ChatResponse)
-async def chat(
-    payload: ChatRequest,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-) -> ChatResponse:
-    client = LLMClient()
+async def _latest_case(db: AsyncSession, current_user: Principal) -> models.Case | None:
+    return await db.scalar(
+        select(models.Case)
+        .where(
+            models.Case.tenant_id == current_user.tenant_id,
+            models.Case.created_by_user_id == current_user.id,
+        )
+        .order_by(models.Case.created_at.desc())
+        .limit(1)
+    )
+
+
+def _chat_messages(payload: ChatRequest) -> list[dict]:
     settings = load_admin_settings()
     system_prompt = settings["system_prompt"]
 
     # attach system prompt at the front
-    messages = [{"role": "system", "content": system_prompt}] + [m.model_dump() for m in payload.messages]
+    return [{"role": "system", "content": system_prompt}] + [m.model_dump() for m in payload.messages]
 
-    # find latest case for this user to associate chat with
-    case = (
-        db.query(models.Case)
-        .filter(
-            models.Case.tenant_id == current_user.tenant_id,
-            models.Case.created_by_user_id == current_user.id,
-        )
-        .order_by(models.Case.created_at.desc())
-        .first()
+
+def _chat_interaction(
+    case_id,
+    tenant_id,
+    user_id,
+    payload: ChatRequest,
+    content: str,
+    latency_ms: int,
+    ttft_ms: int | None = None,
+) -> models.Interaction:
+    cfg = get_settings()
+    return models.Interaction(
+        case_id=case_id,
+        tenant_id=tenant_id,
+        user_id=user_id,
+        request_payload={
+            "kind": "chat",
+            "messages": [m.model_dump() for m in payload.messages],
+        },
+        response_payload={"assistant": content},
+        llm_model=cfg.vllm_model,
+        latency_ms=latency_ms,
+        ttft_ms=ttft_ms,
+        trace_id=current_trace_id(),
     )
 
+
+@router.post("/chat", response_model=ChatResponse)
+async def chat(
+    payload: ChatRequest,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> ChatResponse:
+    client = get_llm_client()
+    with timed_stage("prompt_assembly"):
+        messages = _chat_messages(payload)
+
+    # find latest case for this user to associate chat with
+    case = await _latest_case(db, current_user)
+
     started = time.monotonic()
-    content = await client._chat(messages)
+    content = await client._chat(messages, str(current_user.tenant_id), priority="interactive")
     latency_ms = int((time.monotonic() - started) * 1000)
 
     # persist interaction if we have a case to attach to
     if case is not None:
-        cfg = get_settings()
-        interaction = models.Interaction(
-            case_id=case.id,
-            tenant_id=current_user.tenant_id,
-            user_id=current_user.id,
-            request_payload={
-                "kind": "chat",
-                "messages": [m.model_dump() for m in payload.messages],
-            },
-            response_payload={"assistant": content},
-            llm_model=cfg.vllm_model,
-            latency_ms=latency_ms,
+        db.add(
+            _chat_interaction(
+                case.id, current_user.tenant_id, current_user.id, payload, content, latency_ms
+            )
         )
-        db.add(interaction)
-        db.commit()
+        with timed_stage("db_commit"):
+            await db.commit()
 
     return ChatResponse(message=ChatMessage(role="assistant", content=content))
 
 
-@router.get("/chat/history", response_model=ChatHistoryResponse)
-async def chat_history(
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-) -> ChatHistoryResponse:
-    """Return reconstructed chat history for the latest case of the current user."""
-    case = (
-        db.query(models.Case)
-        .filter(
-            models.Case.tenant_id == current_user.tenant_id,
-            models.Case.created_by_user_id == current_user.id,
-        )
-        .order_by(models.Case.created_at.desc())
-        .first()
-    )
-    if case is None:
-        return ChatHistoryResponse(messages=[])
-
-    interactions = (
-        db.query(models.Interaction)
-        .filter(
-            models.Interaction.tenant_id == current_user.tenant_id,
-            models.Interaction.user_id == current_user.id,
-            models.Interaction.case_id == case.id,
-        )
-        .order_by(models.Interaction.created_at.asc())
-        .all()
-    )
+@router.post("/chat/stream")
+async def chat_stream(
+    payload: ChatRequest,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Stream the assistant reply as Server-Sent Events.
+
+    Emits ``token`` events with text deltas, then one ``done`` event carrying the
+    full assistant ``ChatMessage`` (or an ``error`` event if generation fails).
+    """
+    client = get_llm_client()
+    with timed_stage("prompt_assembly"):
+        messages = _chat_messages(payload)
+    case = await _latest_case(db, current_user)
+    case_id = case.id if case is not None else None
+    tenant_id, user_id = current_user.tenant_id, current_user.id
+    check_admission(str(tenant_id))
 
+    async def events():
+        parts: list[str] = []
+        ttft_ms: int | None = None
+        started = time.monotonic()
+        try:
+            async for delta in client._chat_stream(messages, str(tenant_id), priority="interactive"):
+                if ttft_ms is None:
+                    ttft_ms = int((time.monotonic() - started) * 1000)
+                parts.append(delta)
+                yield sse_event("token", {"content": delta})
+        except Exception as exc:
+            yield sse_event("error", {"detail": str(exc) or exc.__class__.__name__})
+            return
+        latency_ms = int((time.monotonic() - started) * 1000)
+        content = "".join(parts).strip()
+
+        if case_id is not None:
+            # The request-scoped session is closed once the response starts streaming.
+            async with AsyncSessionLocal() as session:
+                session.add(
+                    _chat_interaction(
+                        case_id, tenant_id, user_id, payload, content, latency_ms, ttft_ms
+                    )
+                )
+                with timed_stage("db_commit"):
+                    await session.commit()
+        yield sse_event("done", ChatMessage(role="assistant", content=content).model_dump())
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+# Only the JSONB keys the transcript needs, not the full request/response documents.
+_HISTORY_COLUMNS = (
+    models.Interaction.id,
+    models.Interaction.created_at,
+    models.Interaction.request_payload["kind"].astext.label("kind"),
+    models.Interaction.request_payload["messages"].label("messages"),
+    models.Interaction.request_payload["patient_age"].label("patient_age"),
+    models.Interaction.request_payload["sex"].label("sex"),
+    models.Interaction.request_payload["symptoms"].label("symptoms"),
+    models.Interaction.response_payload["assistant"].astext.label("assistant"),
+    models.Interaction.response_payload["summary"].astext.label("summary"),
+)
+
+
+def _history_messages(rows) -> list[ChatMessage]:
+    """Flatten stored chat turns and case analyses (rows of ``_HISTORY_COLUMNS``) into a chat transcript."""
     messages: list[ChatMessage] = []
 
-    for it in interactions:
-        req = it.request_payload or {}
-        kind = req.get("kind")
-        if kind == "chat":
+    for it in rows:
+        if it.kind == "chat":
             # flatten stored chat turn
-            for m in req.get("messages", []):
+            for m in it.messages or []:
                 role = m.get("role")
                 content = m.get("content")
                 if role in {"user", "assistant"} and content:
                     messages.append(ChatMessage(role=role, content=content))
-            assistant_text = (it.response_payload or {}).get("assistant")
-            if assistant_text:
-                messages.append(ChatMessage(role="assistant", content=assistant_text))
+            if it.assistant:
+                messages.append(ChatMessage(role="assistant", content=it.assistant))
         else:
             # treat as initial case analysis if we can
-            if "patient_age" in req and "sex" in req and "symptoms" in req:
-                age = req.get("patient_age")
-                sex = req.get("sex")
-                symptoms = req.get("symptoms") or []
+            if it.patient_age is not None and it.sex is not None and it.symptoms is not None:
+                symptoms = it.symptoms or []
                 if isinstance(symptoms, list):
                     symptoms_str = ", ".join(map(str, symptoms))
                 else:
                     symptoms_str = str(symptoms)
-                user_summary = f"Analyze case: {age}y {sex}, symptoms: {symptoms_str}"
+                user_summary = f"Analyze case: {it.patient_age}y {it.sex}, symptoms: {symptoms_str}"
                 messages.append(ChatMessage(role="user", content=user_summary))
 
-            summary = (it.response_payload or {}).get("summary")
-            if summary:
-                messages.append(ChatMessage(role="assistant", content=summary))
+            if it.summary:
+                messages.append(ChatMessage(role="assistant", content=it.summary))
+
+    return messages
+
 
-    return ChatHistoryResponse(messages=messages)
+def _encode_cursor(created_at: datetime, interaction_id: uuid.UUID) -> str:
+    raw = f"{created_at.isoformat()}|{interaction_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at, interaction_id = raw.split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(interaction_id)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid history cursor")
+
+
+@router.get("/chat/history", response_model=ChatHistoryResponse)
+async def chat_history(
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    limit: int = Query(50, ge=1, le=200, description="Interactions (not messages) per page"),
+    before: str | None = Query(None, description="Cursor: page to turns older than this"),
+    after: str | None = Query(None, description="Cursor: only turns newer than this (polling)"),
+    since: datetime | None = Query(None, description="Only turns created after this time"),
+) -> ChatHistoryResponse:
+    """Chat history for the latest case of the current user, one keyset page at a time.
+
+    Without a cursor it returns the most recent ``limit`` interactions. ``before``
+    pages backwards; ``after`` (or ``since``) returns only newer turns, oldest first,
+    so a polling UI fetches just what it has not seen.
+    """
+    if sum(x is not None for x in (before, after, since)) > 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Use at most one of before, after and since"
+        )
+    case = await _latest_case(db, current_user)
+    if case is None:
+        return ChatHistoryResponse(messages=[], after=after)
+
+    key = tuple_(models.Interaction.created_at, models.Interaction.id)
+    query = select(*_HISTORY_COLUMNS).where(
+        models.Interaction.tenant_id == current_user.tenant_id,
+        models.Interaction.user_id == current_user.id,
+        models.Interaction.case_id == case.id,
+    )
+    forward = after is not None or since is not None
+    if after is not None:
+        query = query.where(key > tuple_(*_decode_cursor(after)))
+    elif since is not None:
+        query = query.where(models.Interaction.created_at > since)
+    elif before is not None:
+        query = query.where(key < tuple_(*_decode_cursor(before)))
+    if forward:
+        query = query.order_by(models.Interaction.created_at.asc(), models.Interaction.id.asc())
+    else:
+        query = query.order_by(models.Interaction.created_at.desc(), models.Interaction.id.desc())
+
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not forward:
+        rows.reverse()
+
+    return ChatHistoryResponse(
+        messages=_history_messages(rows),
+        case_id=str(case.id),
+        before=_encode_cursor(rows[0].created_at, rows[0].id) if rows else before,
+        after=_encode_cursor(rows[-1].created_at, rows[-1].id) if rows else after,
+        has_more=has_more,
+    )
@@ -1,48 +1,108 @@
-from uuid import uuid4
+import uuid
+from typing import AsyncIterator
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import UploadFile
 
-from app.schemas.document import DocumentIngestRequest, DocumentIngestResponse
+from app.schemas.document import BulkIngestResponse, DocumentIngestRequest, DocumentIngestResponse
 from app.core.config import get_settings
-from app.services.embeddings import embed_texts
-from app.services.qdrant_client import upsert_text_points
+from app.services.ingestion import IngestionPipeline, document_id_for, read_ndjson
+from app.services.qdrant_client import delete_document_points
 from app.core.deps import get_current_user
+from app.core.principal import Principal
+from app.db.session import get_db
 from app.db import models
 
 
 router = APIRouter()
 
+_NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+_READ_SIZE = 64 * 1024
 
-def _split_into_chunks(text: str, max_len: int = 512) -> list[str]:
-    paragraphs = [p.strip() for p in text.split("\n") if p.strip()]
-    chunks: list[str] = []
-    for p in paragraphs:
-        while len(p) > max_len:
-            chunks.append(p[:max_len])
-            p = p[max_len:]
-        if p:
-            chunks.append(p)
-    if not chunks and text.strip():
-        chunks = [text.strip()]
-    return chunks
+
+async def _single(doc: DocumentIngestRequest) -> AsyncIterator[DocumentIngestRequest]:
+    yield doc
+
+
+async def _upload_chunks(upload: UploadFile) -> AsyncIterator[bytes]:
+    while chunk := await upload.read(_READ_SIZE):
+        yield chunk
+
+
+async def _multipart_documents(request: Request, pipeline: IngestionPipeline) -> AsyncIterator[DocumentIngestRequest]:
+    form = await request.form()
+    try:
+        for _, value in form.multi_items():
+            if not isinstance(value, UploadFile):
+                continue
+            name = value.filename or "upload"
+            if name.lower().endswith(_NDJSON_SUFFIXES) or value.content_type == "application/x-ndjson":
+                async for doc in read_ndjson(_upload_chunks(value), pipeline.report.add_error):
+                    yield doc
+                continue
+            try:
+                content = (await value.read()).decode("utf-8")
+            except UnicodeDecodeError:
+                pipeline.report.add_error(f"{name}: not UTF-8 text")
+                continue
+            if not content.strip():
+                pipeline.report.add_error(f"{name}: empty content")
+                continue
+            yield DocumentIngestRequest(title=name, content=content, source=name)
+    finally:
+        await form.close()
 
 
 @router.post("/ingest", response_model=DocumentIngestResponse)
 async def ingest_document(
     payload: DocumentIngestRequest,
-    current_user: models.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
-    s = get_settings()
     tenant_id = str(current_user.tenant_id)
-    chunks = _split_into_chunks(payload.content)
-    vectors = await embed_texts(chunks)
-    upsert_text_points(
-        collection=s.qdrant_collection,
-        vectors=vectors,
-        texts=chunks,
-        tenant_id=tenant_id,
-        title=payload.title,
-        source=payload.source,
+    report = await IngestionPipeline(tenant_id).run(_single(payload))
+    if report.failed:
+        # e.g. whitespace-only content: nothing was stored under this document id.
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=report.errors)
+    outcome = "unchanged" if report.unchanged else "ingested"
+    return {"status": outcome, "document_id": document_id_for(tenant_id, payload)}
+
+
+@router.post("/ingest/bulk", response_model=BulkIngestResponse)
+async def ingest_documents_bulk(
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+):
+    """Ingest many documents from an NDJSON body or a multipart upload.
+
+    NDJSON lines (and ``.ndjson``/``.jsonl`` files) hold one ``DocumentIngestRequest``
+    each; any other uploaded file is ingested as a single plain-text document.
+    """
+    pipeline = IngestionPipeline(str(current_user.tenant_id))
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        documents = _multipart_documents(request, pipeline)
+    else:
+        documents = read_ndjson(request.stream(), pipeline.report.add_error)
+    report = await pipeline.run(documents)
+    return report.as_dict()
+
+
+@router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_document(
+    document_id: uuid.UUID,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    document = await db.scalar(
+        select(models.Document).where(
+            models.Document.id == document_id,
+            models.Document.tenant_id == current_user.tenant_id,
+        )
     )
-    document_id = str(uuid4())
-    return {"status": "ingested", "document_id": document_id}
+    if document is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+    await delete_document_points(get_settings().qdrant_collection, str(current_user.tenant_id), str(document_id))
+    await db.delete(document)
+    await db.commit()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
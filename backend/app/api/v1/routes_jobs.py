@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.deps import get_current_user
+from app.core.principal import Principal
+from app.db.session import get_db
+from app.db import models
+from app.schemas.job import JobStatusResponse
+
+
+router = APIRouter()
+
+
+@router.get("/{job_id}", response_model=JobStatusResponse)
+async def get_job(
+    job_id: uuid.UUID,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> JobStatusResponse:
+    job = await db.scalar(
+        select(models.LLMJob).where(
+            models.LLMJob.id == job_id,
+            models.LLMJob.tenant_id == current_user.tenant_id,
+            models.LLMJob.user_id == current_user.id,
+        )
+    )
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return JobStatusResponse(
+        job_id=str(job.id),
+        kind=job.kind,
+        status=job.status,
+        attempts=job.attempts,
+        result=job.result,
+        error=job.error,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+    )
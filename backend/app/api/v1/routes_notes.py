@@ -1,10 +1,32 @@
 from fastapi import APIRouter
+from app.core.admin_settings import load_admin_settings
+from app.core.config import get_settings
+from app.core.metrics import set_request_tenant
 from app.schemas.note import NoteInput, NoteSummaryResponse
-from app.services.llm_client import LLMClient
+from app.services.llm_client import get_llm_client
+from app.services.response_cache import get_response_cache
 
 router = APIRouter()
 
 @router.post("/summarize", response_model=NoteSummaryResponse)
 async def summarize_notes(payload: NoteInput):
-    client = LLMClient()
-    return await client.summarize_notes(payload)
+    client = get_llm_client()
+    # Unauthenticated endpoint: cache entries and admission share count against the default tenant.
+    tenant_id = get_settings().default_tenant_id
+    set_request_tenant(tenant_id)
+    cache = get_response_cache()
+    if cache is None:
+        return await client.summarize_notes(payload, tenant_id)
+    probe = await cache.get(
+        "summarize_notes",
+        tenant_id,
+        client.s.vllm_model,
+        load_admin_settings()["system_prompt"],
+        payload.model_dump(),
+        query_text=payload.text,
+    )
+    if probe.value is not None:
+        return NoteSummaryResponse.model_validate(probe.value)
+    result = await client.summarize_notes(payload, tenant_id)
+    cache.put(probe, result.model_dump())
+    return result
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
 import json
+import os
+import tempfile
+import threading
+import time
 from pathlib import Path
-from typing import Dict
+from typing import Any, Dict
 
 
 DEFAULT_SYSTEM_PROMPT = (
@@ -14,18 +18,96 @@ DEFAULT_SYSTEM_PROMPT = (
 
 _SETTINGS_PATH = Path(__file__).parent / "admin_settings.json"
 
+# How often readers stat the file to pick up writes made by other workers.
+_RECHECK_INTERVAL_SECONDS = 1.0
 
-def load_admin_settings() -> Dict[str, str]:
-    if _SETTINGS_PATH.exists():
+
+class _AdminSettingsStore:
+    """In-memory copy of ``admin_settings.json`` reloaded only when the file changes.
+
+    Readers stat the file at most once per ``recheck_interval`` and re-parse it only
+    when its (mtime, inode, size) signature differs, so edits made by another
+    uvicorn worker propagate without a restart. Writes go through a temp file and
+    ``os.replace`` so no reader ever sees a partial document.
+    """
+
+    def __init__(self, path: Path, recheck_interval: float) -> None:
+        self.path = path
+        self.recheck_interval = recheck_interval
+        self.version = 0
+        self._lock = threading.Lock()
+        self._data: Dict[str, Any] = {}
+        self._signature: tuple[int, int, int] | None = None
+        self._checked_at = float("-inf")
+
+    def _stat_signature(self) -> tuple[int, int, int] | None:
         try:
-            data = json.loads(_SETTINGS_PATH.read_text(encoding="utf-8"))
-            if isinstance(data, dict) and "system_prompt" in data:
-                return {"system_prompt": str(data["system_prompt"])}
-        except Exception:
-            pass
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+    def _load(self, signature: tuple[int, int, int] | None) -> None:
+        data: Dict[str, Any] = {}
+        if signature is not None:
+            try:
+                parsed = json.loads(self.path.read_text(encoding="utf-8"))
+                if isinstance(parsed, dict):
+                    data = parsed
+            except Exception:
+                pass
+        self._data = data
+        self._signature = signature
+        self.version += 1
+
+    def get(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        if now - self._checked_at >= self.recheck_interval:
+            with self._lock:
+                if now - self._checked_at >= self.recheck_interval:
+                    signature = self._stat_signature()
+                    if signature != self._signature or self.version == 0:
+                        self._load(signature)
+                    self._checked_at = now
+        return self._data
+
+    def save(self, data: Dict[str, Any]) -> None:
+        payload = json.dumps(data, ensure_ascii=False, indent=2)
+        with self._lock:
+            fd, tmp = tempfile.mkstemp(prefix=".admin_settings.", dir=str(self.path.parent))
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                    fh.write(payload)
+                    fh.flush()
+                    os.fsync(fh.fileno())
+                # mkstemp creates 0600 files; keep the settings file readable as before.
+                try:
+                    mode = os.stat(self.path).st_mode & 0o777
+                except FileNotFoundError:
+                    mode = 0o644
+                os.chmod(tmp, mode)
+                os.replace(tmp, self.path)
+            except BaseException:
+                Path(tmp).unlink(missing_ok=True)
+                raise
+            self._data = data
+            self._signature = self._stat_signature()
+            self._checked_at = time.monotonic()
+            self.version += 1
+
+
+_store = _AdminSettingsStore(_SETTINGS_PATH, _RECHECK_INTERVAL_SECONDS)
+
+
+def load_admin_settings() -> Dict[str, str]:
+    data = _store.get()
+    if "system_prompt" in data:
+        return {"system_prompt": str(data["system_prompt"])}
     return {"system_prompt": DEFAULT_SYSTEM_PROMPT}
 
 
 def save_admin_settings(system_prompt: str) -> None:
-    data = {"system_prompt": system_prompt}
-    _SETTINGS_PATH.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    # Keep any other keys in the file (room for per-tenant prompts later).
+    data = dict(_store.get())
+    data["system_prompt"] = system_prompt
+    _store.save(data)
@@ -8,6 +8,12 @@ class Settings(BaseSettings):
 
     jwt_secret: str = "change_me"
     jwt_alg: str = "HS256"
+    auth_cache_enabled: bool = True
+    auth_cache_ttl_seconds: float = 30.0
+    auth_cache_max_entries: int = 10000
+    # Bearer token Prometheus sends to /metrics; admins' access tokens also work. Empty
+    # means admins only (the metrics carry tenant ids).
+    metrics_token: str = ""
 
     default_tenant_id: str = "public"
 
@@ -16,12 +22,76 @@ class Settings(BaseSettings):
     postgres_db: str = "med_assistant"
     postgres_user: str = "med_user"
     postgres_password: str = "med_pass"
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_timeout_ms: int = 30000
 
     qdrant_host: str = "qdrant"
+    # ":memory:" or a directory runs Qdrant embedded in the process (benchmarks, offline
+    # runs; single worker only) instead of connecting to qdrant_host.
+    qdrant_location: str = ""
     qdrant_port: int = 6333
+    qdrant_grpc_port: int = 6334
+    qdrant_prefer_grpc: bool = False
+    qdrant_timeout: int = 10
     qdrant_collection: str = "guidelines_v1"
+    # Storage/search profile (see app/services/qdrant_profiles.py); unset overrides keep the profile's value.
+    qdrant_profile: str = "default"  # "default" | "int8" | "binary" | "high_recall"
+    qdrant_hnsw_m: int | None = None
+    qdrant_hnsw_ef_construct: int | None = None
+    qdrant_hnsw_ef: int | None = None
+    qdrant_on_disk: bool | None = None
 
+    retrieval_mode: str = "dense"  # "dense" | "hybrid" (bge-m3 dense + sparse, RRF-fused)
+    retrieval_hybrid_prefetch: int = 20
+    retrieval_top_k: int = 5
+
+    rerank_enabled: bool = False
+    rerank_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    rerank_candidates: int = 20
+    rerank_top_k: int = 3
+    rerank_budget_ms: float = 150.0
+    rerank_batch_size: int = 8
+    rerank_threads: int = 2
+    rerank_cache_max_entries: int = 20000
+    rerank_cache_ttl_seconds: float = 3600.0
+
+    # LLM response cache (per worker). The semantic tier embeds only free text (case
+    # history, note prose) and matches on cosine similarity >= threshold among requests
+    # with identical structured fields; max entries is per tenant, kind and fields.
+    response_cache_enabled: bool = True
+    response_cache_max_entries: int = 5000
+    response_cache_ttl_seconds: float = 3600.0
+    response_cache_semantic_enabled: bool = False  # costs one extra embed per uncached miss
+    response_cache_semantic_threshold: float = 0.97
+    response_cache_semantic_max_entries: int = 1000
+
+    # Coalesce identical in-flight LLM calls and retrievals. A shared dir extends this
+    # across the uvicorn workers of one host (SQLite).
+    singleflight_enabled: bool = True
+    singleflight_shared_dir: str = ""
+    singleflight_lease_seconds: float = 30.0  # renewed while the leader runs; bounds crash takeover
+    singleflight_shared_result_ttl_seconds: float = 2.0
+
+    embeddings_model: str = "BAAI/bge-m3"
     embeddings_dim: int = 1024
+    embeddings_cache_max_entries: int = 10000
+    embeddings_cache_ttl_seconds: float = 3600.0
+    embeddings_cache_dir: str = ""
+    embeddings_batch_max_size: int = 32
+    embeddings_batch_max_wait_ms: float = 5.0
+    embeddings_batch_max_queue: int = 1024
+
+    chunker: str = "sentence"  # "sentence" | "legacy"
+    chunk_max_tokens: int = 384
+    chunk_overlap_tokens: int = 48
+
+    ingest_batch_size: int = 64
+    ingest_upsert_concurrency: int = 4
+    ingest_queue_depth: int = 4
 
     rabbitmq_host: str = "rabbitmq"
     rabbitmq_port: int = 5672
@@ -29,10 +99,60 @@ class Settings(BaseSettings):
     rabbitmq_pass: str = "guest"
     rabbitmq_exchange: str = "llm.jobs"
     rabbitmq_queue_analyze: str = "llm.analyze"
+    rabbitmq_queue_analyze_dlq: str = "llm.analyze.dlq"
+    rabbitmq_connect_timeout: float = 5.0
+    rabbitmq_channel_pool_size: int = 8
+    rabbitmq_confirm_batch_size: int = 256
+    rabbitmq_publish_timeout: float = 10.0
+
+    llm_worker_prefetch: int = 16
+    llm_worker_concurrency: int = 8
+    llm_worker_max_attempts: int = 3
+    llm_worker_retry_backoff_seconds: float = 2.0
+    llm_worker_drain_timeout_seconds: float = 60.0
 
     vllm_base_url: str = "http://vllm:8000"
     vllm_model: str = "meta-llama/Meta-Llama-3.1-8B-Instruct"
     vllm_api_key: str = "dev_stub_key"
+    # Comma-separated replica URLs; when set, overrides vllm_base_url.
+    vllm_base_urls: str = ""
+    llm_balancer_strategy: str = "p2c"  # "p2c" (power of two choices) | "least_outstanding"
+    llm_health_check_interval_seconds: float = 5.0  # 0 disables active /health probing
+    llm_health_check_failures: int = 3  # consecutive failed probes before a replica is skipped
+    llm_circuit_failure_threshold: int = 3
+    llm_circuit_open_seconds: float = 30.0
+    llm_eject_latency_factor: float = 3.0  # eject a replica slower than factor x peers' median
+    llm_retry_other_replica: int = 1
+
+    llm_http_max_connections_per_host: int = 64
+    llm_http_max_keepalive_connections: int = 32
+    llm_http_keepalive_expiry: float = 30.0
+    llm_http_connect_timeout: float = 5.0
+    llm_http_read_timeout: float = 120.0
+    llm_http_pool_timeout: float = 10.0
+    llm_http2: bool = False
+
+    # Adaptive (AIMD) concurrency limit and fair wait queue in front of vLLM. Limits are
+    # per process: vLLM sees up to (API workers x max_limit) + (LLM workers x worker limit).
+    llm_admission_enabled: bool = True
+    llm_admission_initial_limit: int = 16
+    llm_admission_min_limit: int = 2
+    llm_admission_max_limit: int = 64
+    llm_admission_latency_tolerance: float = 2.0  # back off when latency > tolerance x baseline
+    llm_admission_max_queue: int = 128
+    llm_admission_tenant_max_queue: int = 32
+    llm_admission_queue_timeout_seconds: float = 30.0
+    llm_worker_admission_max_limit: int = 4  # the LLM worker's cap, so batch jobs leave room for chat
+
+    # OpenTelemetry (optional; needs requirements-tracing.txt)
+    tracing_enabled: bool = False
+    tracing_service_name: str = "med-assistant"
+    tracing_exporter: str = "otlp"  # "otlp" (OTLP/HTTP) | "file" (JSON lines) | "console"
+    tracing_otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    tracing_file_path: str = "traces.jsonl"
+    tracing_sample_ratio: float = 1.0
+    # Link shown in /admin/summary, e.g. "http://localhost:16686/trace/{trace_id}"
+    tracing_trace_url_template: str = ""
 
     class Config:
         env_file = ".env", ".env.example"
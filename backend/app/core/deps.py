@@ -1,27 +1,38 @@
 from __future__ import annotations
 
+import hmac
 from typing import Annotated
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import get_settings
+from app.core.metrics import set_request_tenant, timed_stage
+from app.core.principal import Principal, get_principal_cache
 from app.core.security import decode_access_token
-from app.db.session import get_db
+from app.db.session import AsyncSessionLocal, get_db
 from app.db import models
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
-DbSession = Annotated[Session, Depends(get_db)]
+DbSession = Annotated[AsyncSession, Depends(get_db)]
 
 
-def get_current_user(
+async def get_current_user(
     db: DbSession,
     token: Annotated[str, Depends(oauth2_scheme)],
-) -> models.User:
+) -> Principal:
+    with timed_stage("auth_current_user"):
+        principal = await _resolve_principal(db, token)
+    set_request_tenant(principal.tenant_id)
+    return principal
+
+
+async def _resolve_principal(db: AsyncSession, token: str) -> Principal:
     settings = get_settings()
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -29,7 +40,8 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = decode_access_token(token)
+        with timed_stage("auth_jwt_decode"):
+            payload = decode_access_token(token)
         user_id: str | None = payload.get("sub")
         tenant_id: str | None = payload.get("tenant_id")
         if user_id is None or tenant_id is None:
@@ -37,21 +49,45 @@ def get_current_user(
     except Exception:
         raise credentials_exception
 
-    user = (
-        db.query(models.User)
-        .filter(models.User.id == user_id, models.User.tenant_id == tenant_id, models.User.is_active.is_(True))
-        .one_or_none()
+    cache = get_principal_cache()
+    # Tokens issued before "iat" was added fall back to their expiry as the key part.
+    cache_key = (user_id, tenant_id, payload.get("iat", payload.get("exp")))
+    if cache is not None:
+        principal = cache.get(cache_key)
+        if principal is not None:
+            return principal
+
+    result = await db.execute(
+        select(models.User).where(
+            models.User.id == user_id, models.User.tenant_id == tenant_id, models.User.is_active.is_(True)
+        )
     )
+    user = result.scalar_one_or_none()
     if user is None:
         raise credentials_exception
-    return user
+    principal = Principal.from_user(user)
+    if cache is not None:
+        cache.set(cache_key, principal)
+    return principal
+
+
+async def require_metrics_access(token: Annotated[str, Depends(oauth2_scheme)]) -> None:
+    """Allow the Prometheus scrape token (``metrics_token``) or an admin's access token."""
+    expected = get_settings().metrics_token
+    if expected and hmac.compare_digest(token.encode("utf-8"), expected.encode("utf-8")):
+        return
+    # Only opened for JWTs, so scrapes with the configured token never touch Postgres.
+    async with AsyncSessionLocal() as db:
+        principal = await _resolve_principal(db, token)
+    if principal.role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
 
 
-def get_current_tenant(
+async def get_current_tenant(
     db: DbSession,
-    current_user: Annotated[models.User, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_user)],
 ) -> models.Tenant:
-    tenant = db.query(models.Tenant).filter(models.Tenant.id == current_user.tenant_id).one_or_none()
+    tenant = await db.get(models.Tenant, current_user.tenant_id)
     if tenant is None:
         raise HTTPException(status_code=400, detail="Tenant not found")
     return tenant
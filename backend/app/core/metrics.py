@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator
+
+from fastapi import Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Histogram, generate_latest
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_seconds",
+    "HTTP request duration until the response starts (time to first byte for SSE routes)",
+    labelnames=["route", "method", "status", "tenant"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0),
+)
+STAGE_SECONDS = Histogram(
+    "request_stage_seconds",
+    "Duration of one stage of the request path (auth, embedding, vector search, LLM, DB commit, ...)",
+    labelnames=["stage", "route", "tenant", "model"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 120.0),
+)
+
+
+@dataclass
+class RequestLabels:
+    """Labels shared by every stage of one request.
+
+    Mutable on purpose: the middleware's copy of the context sees the tenant that
+    ``get_current_user`` fills in while the endpoint runs.
+    """
+
+    route: str = "-"
+    tenant: str = "-"
+
+
+_labels: ContextVar[RequestLabels | None] = ContextVar("request_labels", default=None)
+
+
+def set_request_labels(route: str, tenant: str = "-") -> RequestLabels:
+    labels = RequestLabels(route, tenant)
+    _labels.set(labels)
+    return labels
+
+
+def set_request_tenant(tenant_id: object) -> None:
+    labels = _labels.get()
+    if labels is not None:
+        labels.tenant = str(tenant_id)
+
+
+def observe_stage(stage: str, seconds: float, model: str = "") -> None:
+    labels = _labels.get() or RequestLabels()
+    STAGE_SECONDS.labels(stage, labels.route, labels.tenant, model).observe(seconds)
+
+
+@contextmanager
+def timed_stage(stage: str, model: str = "") -> Iterator[None]:
+    """Record the duration of the enclosed block (also when it raises) as ``stage``."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started, model)
+
+
+def metrics_response() -> Response:
+    return Response(content=generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
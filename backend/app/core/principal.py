@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass
+from typing import Hashable
+
+from prometheus_client import Counter, Gauge
+from sqlalchemy import event, inspect
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.db import models
+
+
+PRINCIPAL_LOOKUPS = Counter(
+    "auth_principal_cache_lookups",
+    "Authenticated-user cache lookups in get_current_user",
+    labelnames=["result"],
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Immutable snapshot of the authenticated user, detached from any DB session."""
+
+    id: uuid.UUID
+    tenant_id: uuid.UUID
+    email: str
+    role: str
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user: models.User) -> "Principal":
+        return cls(
+            id=user.id,
+            tenant_id=user.tenant_id,
+            email=user.email,
+            role=user.role,
+            is_active=user.is_active,
+        )
+
+
+class PrincipalCache:
+    """Short-lived cache of principals keyed by ``(sub, tenant_id, iat)``.
+
+    Entries are dropped as soon as this process sees a user's role or active flag
+    change; other workers converge within ``ttl_seconds``.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self._cache: TTLCache[Hashable, Principal] = TTLCache(max_entries, ttl_seconds)
+
+    def get(self, key: Hashable) -> Principal | None:
+        principal = self._cache.get(key)
+        PRINCIPAL_LOOKUPS.labels("hit" if principal is not None else "miss").inc()
+        return principal
+
+    def set(self, key: Hashable, principal: Principal) -> None:
+        self._cache.set(key, principal)
+
+    def invalidate_user(self, user_id: uuid.UUID | str) -> None:
+        user_id = str(user_id)
+        self._cache.evict_where(lambda _, principal: str(principal.id) == user_id)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def hit_ratio(self) -> float:
+        total = self._cache.hits + self._cache.misses
+        return self._cache.hits / total if total else 0.0
+
+
+_cache: PrincipalCache | None = None
+
+
+def get_principal_cache() -> PrincipalCache | None:
+    """Return the process-wide cache, or ``None`` when ``auth_cache_enabled`` is off."""
+    global _cache
+    s = get_settings()
+    if not s.auth_cache_enabled:
+        return None
+    if _cache is None:
+        _cache = PrincipalCache(s.auth_cache_max_entries, s.auth_cache_ttl_seconds)
+    return _cache
+
+
+def invalidate_user(user_id: uuid.UUID | str) -> None:
+    if _cache is not None:
+        _cache.invalidate_user(user_id)
+
+
+Gauge(
+    "auth_principal_cache_hit_ratio",
+    "Hit ratio of the authenticated-user cache since process start",
+).set_function(lambda: _cache.hit_ratio() if _cache is not None else 0.0)
+
+
+@event.listens_for(models.User, "after_update")
+def _invalidate_on_user_change(mapper, connection, target: models.User) -> None:
+    state = inspect(target)
+    if state.attrs.role.history.has_changes() or state.attrs.is_active.history.has_changes():
+        invalidate_user(target.id)
+
+
+@event.listens_for(models.User, "after_delete")
+def _invalidate_on_user_delete(mapper, connection, target: models.User) -> None:
+    invalidate_user(target.id)
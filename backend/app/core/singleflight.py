@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, TypeVar
+
+from prometheus_client import Counter
+
+from app.core.config import get_settings
+
+
+T = TypeVar("T")
+
+SINGLEFLIGHT_CALLS = Counter(
+    "singleflight_calls",
+    "Calls through a single-flight group by role (leader ran it; coalesced/shared reused another call)",
+    labelnames=["name", "role"],
+)
+
+
+class _SharedFlights:
+    """Cross-worker flights on one host, tracked in a shared SQLite file.
+
+    The first worker to claim a key runs the call and stores its JSON result for
+    ``result_ttl`` seconds; the others poll for it. The leader renews its claim every
+    third of ``lease_seconds`` for as long as the call runs, so a slow call (admission
+    queueing plus retried upstream timeouts) is never taken over while a crashed
+    leader's claim lapses within one lease. A failed leader deletes its claim so a
+    waiting worker retries the call itself.
+    """
+
+    def __init__(self, path: Path, lease_seconds: float, result_ttl: float, poll_interval: float = 0.05) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease = lease_seconds
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, timeout=5.0, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS flights ("
+                "key TEXT PRIMARY KEY, owner TEXT NOT NULL, until REAL NOT NULL, result TEXT)"
+            )
+
+    def _claim(self, key: str) -> str | None:
+        """Claim ``key`` (returns None) or return the stored result of a finished flight."""
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO flights (key, owner, until, result) VALUES (?, ?, ?, NULL) "
+                "ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, until = excluded.until, result = NULL "
+                "WHERE flights.until <= ?",
+                (key, self.owner, now + self.lease, now),
+            )
+            if cur.rowcount == 1:
+                return None
+            row = self._conn.execute("SELECT result FROM flights WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None and row[0] is not None else ""
+
+    def _renew(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE flights SET until = ? WHERE key = ? AND owner = ? AND result IS NULL",
+                (time.time() + self.lease, key, self.owner),
+            )
+
+    async def _keep_claim(self, key: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            await asyncio.to_thread(self._renew, key)
+
+    def _finish(self, key: str, result: str | None) -> None:
+        with self._lock:
+            if result is None:
+                self._conn.execute("DELETE FROM flights WHERE key = ? AND owner = ?", (key, self.owner))
+            else:
+                self._conn.execute(
+                    "UPDATE flights SET result = ?, until = ? WHERE key = ? AND owner = ?",
+                    (result, time.time() + self.result_ttl, key, self.owner),
+                )
+            self._conn.execute("DELETE FROM flights WHERE until <= ?", (time.time(),))
+
+    async def run(self, name: str, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        key = f"{name}:{key}"
+        while True:
+            stored = await asyncio.to_thread(self._claim, key)
+            if stored is None:
+                break
+            if stored:
+                SINGLEFLIGHT_CALLS.labels(name, "shared").inc()
+                return json.loads(stored)
+            await asyncio.sleep(self.poll_interval)  # another worker is running it
+        renewal = asyncio.ensure_future(self._keep_claim(key))
+        try:
+            result = await fn()
+        except BaseException:
+            renewal.cancel()
+            await asyncio.to_thread(self._finish, key, None)
+            raise
+        renewal.cancel()
+        await asyncio.to_thread(self._finish, key, json.dumps(result))
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution.
+
+    Every caller awaits the same task through ``asyncio.shield``, so one caller being
+    cancelled (a client disconnecting) leaves the call running for the others; the
+    call itself is cancelled only when its last waiter goes away. Results are shared
+    as-is, so return immutable values or copy them. With ``shared`` set, the flight
+    also spans worker processes and results must be JSON-serializable.
+    """
+
+    def __init__(self, name: str, shared: _SharedFlights | None = None) -> None:
+        self.name = name
+        self.shared = shared
+        self._calls: dict[str, _Call] = {}
+
+    def _run(self, key: str, fn: Callable[[], Awaitable[T]]) -> Awaitable[T]:
+        return fn() if self.shared is None else self.shared.run(self.name, key, fn)
+
+    def _forget(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            call = self._calls[key] = _Call(asyncio.ensure_future(self._run(key, fn)))
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            SINGLEFLIGHT_CALLS.labels(self.name, "leader").inc()
+        else:
+            SINGLEFLIGHT_CALLS.labels(self.name, "coalesced").inc()
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Every caller gave up: stop the work and let the next caller start afresh.
+                self._forget(key, call)
+                call.task.cancel()
+
+
+_groups: dict[str, SingleFlight] = {}
+_shared: _SharedFlights | None = None
+
+
+def get_singleflight(name: str) -> SingleFlight | None:
+    """Process-wide group for ``name``, or None when ``singleflight_enabled`` is off."""
+    global _shared
+    s = get_settings()
+    if not s.singleflight_enabled:
+        return None
+    group = _groups.get(name)
+    if group is None:
+        if _shared is None and s.singleflight_shared_dir:
+            _shared = _SharedFlights(
+                Path(s.singleflight_shared_dir) / "singleflight.sqlite3",
+                lease_seconds=s.singleflight_lease_seconds,
+                result_ttl=s.singleflight_shared_result_ttl_seconds,
+            )
+        group = _groups[name] = SingleFlight(name, _shared)
+    return group
+
+
+def close_singleflight() -> None:
+    global _shared
+    _groups.clear()
+    if _shared is not None:
+        _shared.close()
+        _shared = None
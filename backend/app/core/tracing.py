@@ -0,0 +1,144 @@
+"""Optional OpenTelemetry tracing.
+
+Install ``requirements-tracing.txt`` and set ``TRACING_ENABLED=true`` to export spans
+over OTLP/HTTP (``TRACING_EXPORTER=otlp``), as JSON lines to a file (``file``) or to
+stdout (``console``). Without the packages, or while disabled, every helper here is
+a no-op, so call sites need no guards.
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+from contextlib import contextmanager
+from typing import Any, Iterator, Mapping
+
+from app.core.config import get_settings
+
+try:
+    from opentelemetry import propagate, trace
+    from opentelemetry.trace import SpanKind
+except ImportError:  # tracing extras not installed
+    propagate = trace = SpanKind = None
+
+
+logger = logging.getLogger(__name__)
+
+_provider = None
+_tracer = None
+
+
+def _exporter(s):
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+    if s.tracing_exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        return OTLPSpanExporter(endpoint=s.tracing_otlp_endpoint)
+    if s.tracing_exporter == "file":
+        out = open(s.tracing_file_path, "a", encoding="utf-8")
+        return ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + "\n")
+    return ConsoleSpanExporter()
+
+
+def _instrument_sqlalchemy() -> None:
+    try:
+        from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+    except ImportError:
+        logger.warning("opentelemetry-instrumentation-sqlalchemy not installed; no DB spans")
+        return
+    from app.db.session import async_engine, engine
+
+    SQLAlchemyInstrumentor().instrument(engines=[engine, async_engine.sync_engine], enable_commenter=False)
+
+
+def init_tracing(component: str) -> None:
+    """Install the tracer provider for this process (``component`` is "api" or "worker")."""
+    global _provider, _tracer
+    s = get_settings()
+    if not s.tracing_enabled or _provider is not None:
+        return
+    if trace is None:
+        logger.warning("TRACING_ENABLED is set but opentelemetry is not installed; tracing disabled")
+        return
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": f"{s.tracing_service_name}-{component}"}),
+        # Honour the caller's decision for propagated traces; sample new roots by ratio.
+        sampler=ParentBased(TraceIdRatioBased(s.tracing_sample_ratio)),
+    )
+    _provider.add_span_processor(BatchSpanProcessor(_exporter(s)))
+    trace.set_tracer_provider(_provider)
+    _tracer = trace.get_tracer("app")
+    _instrument_sqlalchemy()
+
+
+def shutdown_tracing() -> None:
+    """Flush pending spans."""
+    global _provider, _tracer
+    if _provider is not None:
+        _provider.shutdown()
+        _provider = None
+        _tracer = None
+
+
+@contextmanager
+def span(
+    name: str, kind: str = "internal", headers: Mapping[str, Any] | None = None, **attributes: Any
+) -> Iterator[None]:
+    """Run the block in a span; ``headers`` continue a trace propagated by the caller."""
+    if _tracer is None:
+        yield
+        return
+    parent = propagate.extract(dict(headers)) if headers is not None else None
+    with _tracer.start_as_current_span(
+        name,
+        context=parent,
+        kind=getattr(SpanKind, kind.upper()),
+        attributes={k: v for k, v in attributes.items() if v is not None},
+    ):
+        yield
+
+
+def traced(name: str):
+    """Decorator: run an async function in a span called ``name``."""
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def set_span_attributes(**attributes: Any) -> None:
+    if _tracer is not None:
+        current = trace.get_current_span()
+        for key, value in attributes.items():
+            if value is not None:
+                current.set_attribute(key, value)
+
+
+def inject_trace_headers(headers: dict | None = None) -> dict:
+    """``headers`` plus the W3C ``traceparent`` of the current span, for message brokers."""
+    headers = dict(headers or {})
+    if _tracer is not None:
+        propagate.inject(headers)
+    return headers
+
+
+def current_trace_id() -> str | None:
+    """Hex trace id of the current span if it is sampled (i.e. will be exported)."""
+    if _tracer is None:
+        return None
+    ctx = trace.get_current_span().get_span_context()
+    if not ctx.is_valid or not ctx.trace_flags.sampled:
+        return None
+    return format(ctx.trace_id, "032x")
@@ -8,9 +8,11 @@ from sqlalchemy import (
     Column,
     DateTime,
     ForeignKey,
+    Index,
     String,
     Text,
     Integer,
+    false,
 )
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
@@ -85,8 +87,14 @@ class Interaction(Base):
     response_payload = Column(JSONB, nullable=False)
     llm_model = Column(String(255), nullable=False)
     latency_ms = Column(Integer, nullable=True)
+    ttft_ms = Column(Integer, nullable=True)
+    cached = Column(Boolean, default=False, server_default=false(), nullable=False)
+    trace_id = Column(String(32), nullable=True)  # OpenTelemetry trace, when sampled
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
 
+    # Serves the keyset-paginated chat history of one user's case.
+    __table_args__ = (Index("ix_interactions_history", "tenant_id", "user_id", "case_id", "created_at"),)
+
     case = relationship("Case", back_populates="interactions")
     tenant = relationship("Tenant")
     user = relationship("User")
@@ -105,3 +113,58 @@ class AuditLog(Base):
 
     tenant = relationship("Tenant")
     user = relationship("User")
+
+
+class LLMJob(Base, TimestampMixin):
+    __tablename__ = "llm_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
+    case_id = Column(UUID(as_uuid=True), ForeignKey("cases.id"), nullable=True)
+
+    kind = Column(String(32), nullable=False)
+    status = Column(String(16), nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    request_payload = Column(JSONB, nullable=False)
+    result = Column(JSONB, nullable=True)
+    error = Column(Text, nullable=True)
+
+    tenant = relationship("Tenant")
+    user = relationship("User")
+    case = relationship("Case")
+
+
+class Document(Base, TimestampMixin):
+    __tablename__ = "documents"
+
+    # Deterministic id (see app.services.ingestion.document_id_for), also stored on every Qdrant point.
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False, index=True)
+
+    title = Column(String(512), nullable=False)
+    source = Column(String(1024), nullable=True)
+    external_id = Column(String(255), nullable=True)
+    content_hash = Column(String(64), nullable=False)
+    chunk_count = Column(Integer, nullable=False, default=0)
+
+    chunks = relationship(
+        "DocumentChunk",
+        back_populates="document",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="DocumentChunk.chunk_index",
+    )
+
+
+class DocumentChunk(Base):
+    __tablename__ = "document_chunks"
+
+    # Qdrant point id of the chunk.
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    document_id = Column(UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
+    chunk_index = Column(Integer, nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    token_count = Column(Integer, nullable=False, default=0)
+
+    document = relationship("Document", back_populates="chunks")
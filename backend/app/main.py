@@ -1,9 +1,26 @@
+import time
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends, Header
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 from pathlib import Path
+from starlette.routing import Match
 
 from app.core.config import Settings, get_settings
+from app.core.deps import require_metrics_access
+from app.core.metrics import HTTP_REQUEST_SECONDS, metrics_response, set_request_labels
+from app.core.singleflight import close_singleflight
+from app.core.tracing import init_tracing, set_span_attributes, shutdown_tracing, span
+from app.db.session import async_engine
+from app.services.admission import AdmissionRejected
+from app.services.http_pool import get_llm_http_pool, close_llm_http_pool
+from app.services.llm_balancer import UpstreamUnavailable, close_llm_balancer, start_llm_balancer
+from app.services.embeddings import EmbeddingQueueFull, close_embedding_batcher
+from app.services.embedding_cache import close_embedding_cache
+from app.services.qdrant_client import init_async_qdrant, close_async_qdrant
+from app.services.queue_producer import start_queue_producer, close_queue_producer
+from app.services.rerank import get_reranker, close_reranker
 from app.api.v1.routes_health import router as health_router
 from app.api.v1.routes_cases import router as cases_router
 from app.api.v1.routes_notes import router as notes_router
@@ -11,23 +28,98 @@ from app.api.v1.routes_documents import router as documents_router
 from app.api.v1.routes_auth import router as auth_router
 from app.api.v1.routes_admin import router as admin_router
 from app.api.v1.routes_chat import router as chat_router
+from app.api.v1.routes_jobs import router as jobs_router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_tracing("api")
+    get_llm_http_pool()
+    start_llm_balancer()
+    init_async_qdrant()
+    await start_queue_producer()
+    if get_settings().rerank_enabled:
+        get_reranker().warm_up()
+    try:
+        yield
+    finally:
+        await close_embedding_batcher()
+        close_embedding_cache()
+        close_reranker()
+        close_singleflight()
+        await close_async_qdrant()
+        await close_queue_producer()
+        await async_engine.dispose()
+        await close_llm_balancer()
+        await close_llm_http_pool()
+        shutdown_tracing()
+
 
-app = FastAPI(title="Medical Assistant API", version="0.1.0")
+app = FastAPI(title="Medical Assistant API", version="0.1.0", lifespan=lifespan)
 
 static_dir = Path(__file__).parent / "static"
 if static_dir.exists():
     app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
 
+@app.exception_handler(EmbeddingQueueFull)
+async def embedding_queue_full_handler(request, exc: EmbeddingQueueFull):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
+@app.exception_handler(UpstreamUnavailable)
+async def upstream_unavailable_handler(request, exc: UpstreamUnavailable):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": str(exc.retry_after)})
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+def _route_template(scope) -> str:
+    # Templated path ("/api/v1/jobs/{job_id}") keeps label cardinality bounded.
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "-")
+    return "unmatched"
+
+
 @app.middleware("http")
-async def tenant_middleware(request, call_next):
-    response = await call_next(request)
-    return response
+async def timing_middleware(request, call_next):
+    labels = set_request_labels(_route_template(request.scope))
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        with span(
+            f"{request.method} {labels.route}",
+            kind="server",
+            headers=request.headers,
+            **{"http.method": request.method, "http.route": labels.route},
+        ):
+            response = await call_next(request)
+            status_code = response.status_code
+            set_span_attributes(**{"http.status_code": status_code, "tenant_id": labels.tenant})
+            return response
+    finally:
+        HTTP_REQUEST_SECONDS.labels(labels.route, request.method, str(status_code), labels.tenant).observe(
+            time.perf_counter() - started
+        )
 
 @app.get("/")
 async def root():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_access)])
+async def metrics():
+    return metrics_response()
+
+
 @app.get("/demo")
 async def demo_page():
     file_path = static_dir / "demo.html"
@@ -44,5 +136,6 @@ app.include_router(auth_router, prefix="/auth", tags=["auth"])
 app.include_router(admin_router, prefix="/admin", tags=["admin"])
 app.include_router(chat_router, prefix="/api/v1", tags=["chat"])
 app.include_router(cases_router, prefix="/api/v1/cases", tags=["cases"])
+app.include_router(jobs_router, prefix="/api/v1/jobs", tags=["jobs"])
 app.include_router(notes_router, prefix="/api/v1/notes", tags=["notes"])
 app.include_router(documents_router, prefix="/api/v1/documents", tags=["documents"])
@@ -20,3 +20,9 @@ class ChatResponse(BaseModel):
 
 class ChatHistoryResponse(BaseModel):
     messages: list[ChatMessage]
+    case_id: str | None = None
+    # Opaque keyset cursors: pass ``before`` back to page to older turns, ``after`` to poll for new ones.
+    before: str | None = None
+    after: str | None = None
+    # More turns exist past this page in the requested direction (older by default, newer with after/since).
+    has_more: bool = False
@@ -1,10 +1,28 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class DocumentIngestRequest(BaseModel):
     title: str
-    content: str
+    content: str = Field(min_length=1)
     source: str | None = None
+    document_id: str | None = None
 
 class DocumentIngestResponse(BaseModel):
     status: str
     document_id: str
+
+class IngestStageStats(BaseModel):
+    items: int
+    seconds: float
+    per_second: float
+
+class BulkIngestResponse(BaseModel):
+    documents: int
+    ingested: int
+    unchanged: int
+    failed: int
+    chunks: int
+    chunks_reused: int
+    chunks_deleted: int
+    seconds: float
+    stages: dict[str, IngestStageStats]
+    errors: list[str]
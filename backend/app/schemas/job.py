@@ -0,0 +1,21 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+from app.schemas.case import CaseAnalysisResponse
+
+
+class JobAccepted(BaseModel):
+    job_id: str
+    status: str
+
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: str
+    attempts: int
+    result: CaseAnalysisResponse | None = None
+    error: str | None = None
+    created_at: datetime
+    updated_at: datetime
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import math
+import time
+from collections import Counter as TallyCounter, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator
+
+import httpx
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import REGISTRY, Collector
+
+from app.core.config import get_settings
+from app.services.llm_balancer import UpstreamUnavailable
+
+
+# Lower value is served first: interactive chat, then synchronous analyses/notes, then queued jobs.
+PRIORITIES = {"interactive": 0, "standard": 1, "batch": 2}
+
+ADMISSION_REJECTIONS = Counter(
+    "llm_admission_rejections",
+    "LLM requests refused by admission control",
+    labelnames=["reason"],
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    "llm_admission_wait_seconds",
+    "Time spent queued for an LLM concurrency slot",
+    labelnames=["priority"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised instead of queueing when the LLM is saturated; mapped to 429/503 with Retry-After."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+@dataclass(eq=False)
+class _Waiter:
+    tenant: str
+    seq: int
+    future: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+
+class AdmissionController:
+    """Adaptive concurrency limit in front of vLLM with a bounded, fair wait queue.
+
+    The limit follows AIMD on completion latency: it grows by ``1/limit`` per request
+    completed while the limit was in use, and shrinks by ``backoff`` (at most once
+    per baseline latency) when a request takes more than ``latency_tolerance`` times
+    the slow-moving baseline, times out or gets a 5xx/429. Queued requests are served
+    by priority class, then by the tenant with the fewest requests in flight, so one
+    busy tenant cannot starve the others. Full queues fail fast instead of waiting
+    for the HTTP timeout.
+
+    State is per process: priorities only order requests within one process, and
+    vLLM sees the sum of every process's limit. The LLM worker therefore runs with
+    its own small ``llm_worker_admission_max_limit`` (see ``init_admission_controller``).
+    """
+
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        latency_tolerance: float,
+        max_queue: int,
+        tenant_max_queue: int,
+        queue_timeout: float,
+        backoff: float = 0.9,
+    ) -> None:
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.max_queue = max_queue
+        self.tenant_max_queue = tenant_max_queue
+        self.queue_timeout = queue_timeout
+        self.backoff = backoff
+        self.in_flight = 0
+        self.baseline: float | None = None
+        self._last_decrease = 0.0
+        self._tenant_in_flight: TallyCounter[str] = TallyCounter()
+        self._tenant_queued: TallyCounter[str] = TallyCounter()
+        self._queues: list[dict[str, deque[_Waiter]]] = [{} for _ in PRIORITIES]
+        self._seq = itertools.count()
+
+    @property
+    def queued(self) -> int:
+        return sum(self._tenant_queued.values())
+
+    def queue_depths(self) -> dict[str, int]:
+        return {name: sum(map(len, self._queues[p].values())) for name, p in PRIORITIES.items()}
+
+    def _retry_after(self) -> int:
+        # Roughly the time for the queue ahead to drain at the current limit.
+        per_slot = self.baseline or 1.0
+        return max(1, math.ceil(per_slot * (self.queued + 1) / max(1.0, self.limit)))
+
+    def check(self, tenant: str) -> None:
+        """Raise ``AdmissionRejected`` if a request from ``tenant`` would be refused right now."""
+        if self.in_flight < int(self.limit) and self.queued == 0:
+            return
+        if self.queued >= self.max_queue:
+            ADMISSION_REJECTIONS.labels("queue_full").inc()
+            raise AdmissionRejected(503, "LLM capacity exhausted; retry later", self._retry_after())
+        if self._tenant_queued[tenant] >= self.tenant_max_queue:
+            ADMISSION_REJECTIONS.labels("tenant_queue_full").inc()
+            raise AdmissionRejected(429, "Too many concurrent LLM requests for this tenant", self._retry_after())
+
+    def _grant(self, tenant: str) -> None:
+        self.in_flight += 1
+        self._tenant_in_flight[tenant] += 1
+
+    def _dispatch(self) -> None:
+        while self.in_flight < int(self.limit) and self.queued:
+            queues = next(q for q in self._queues if q)
+            tenant = min(queues, key=lambda t: (self._tenant_in_flight[t], queues[t][0].seq))
+            waiter = queues[tenant].popleft()
+            if not queues[tenant]:
+                del queues[tenant]
+            self._tenant_queued[tenant] -= 1
+            if not waiter.future.done():
+                self._grant(tenant)
+                waiter.future.set_result(None)
+
+    def _remove(self, waiter: _Waiter, priority: int) -> None:
+        queue = self._queues[priority].get(waiter.tenant)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del self._queues[priority][waiter.tenant]
+            self._tenant_queued[waiter.tenant] -= 1
+
+    def _abandon(self, waiter: _Waiter, priority: int) -> None:
+        self._remove(waiter, priority)
+        if waiter.future.done():  # granted just as the caller gave up
+            self.release(waiter.tenant)
+        else:
+            waiter.future.cancel()
+
+    async def acquire(self, tenant: str, priority: str = "standard") -> None:
+        if self.in_flight < int(self.limit) and self.queued == 0:
+            self._grant(tenant)
+            ADMISSION_WAIT_SECONDS.labels(priority).observe(0)
+            return
+        self.check(tenant)
+        p = PRIORITIES[priority]
+        waiter = _Waiter(tenant, next(self._seq))
+        self._queues[p].setdefault(tenant, deque()).append(waiter)
+        self._tenant_queued[tenant] += 1
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._abandon(waiter, p)
+            ADMISSION_REJECTIONS.labels("queue_timeout").inc()
+            raise AdmissionRejected(503, "Timed out waiting for LLM capacity", self._retry_after()) from None
+        except asyncio.CancelledError:
+            self._abandon(waiter, p)
+            raise
+        finally:
+            ADMISSION_WAIT_SECONDS.labels(priority).observe(time.monotonic() - started)
+
+    def release(self, tenant: str, latency: float | None = None, overloaded: bool = False) -> None:
+        """Free a slot; ``latency`` of a completed request and ``overloaded`` failures steer the limit."""
+        self.in_flight -= 1
+        self._tenant_in_flight[tenant] -= 1
+        if self._tenant_in_flight[tenant] <= 0:
+            del self._tenant_in_flight[tenant]
+        now = time.monotonic()
+        if latency is not None:
+            self.baseline = latency if self.baseline is None else 0.95 * self.baseline + 0.05 * latency
+            overloaded = overloaded or latency > self.latency_tolerance * self.baseline
+        if overloaded:
+            if now - self._last_decrease >= (self.baseline or 0.0):
+                self.limit = max(float(self.min_limit), self.limit * self.backoff)
+                self._last_decrease = now
+        elif latency is not None and self.in_flight + 1 >= int(self.limit):
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, tenant: str, priority: str = "standard") -> AsyncIterator[None]:
+        await self.acquire(tenant, priority)
+        started = time.monotonic()
+        try:
+            yield
+        except httpx.TimeoutException:
+            self.release(tenant, overloaded=True)
+            raise
+        except httpx.HTTPStatusError as exc:
+            status = exc.response.status_code
+            self.release(tenant, overloaded=status == 429 or status >= 500)
+            raise
+        except UpstreamUnavailable:  # every replica tried failed with an overload/5xx/connection error
+            self.release(tenant, overloaded=True)
+            raise
+        except BaseException:
+            self.release(tenant)
+            raise
+        else:
+            self.release(tenant, latency=time.monotonic() - started)
+
+
+_controller: AdmissionController | None = None
+
+
+def init_admission_controller(worker: bool = False) -> AdmissionController | None:
+    """Create this process's controller; the LLM worker passes ``worker=True`` at startup.
+
+    The worker's batch jobs never share a queue with API chat traffic, so instead of
+    yielding by priority they are capped at ``llm_worker_admission_max_limit``.
+    """
+    global _controller
+    s = get_settings()
+    if not s.llm_admission_enabled:
+        return None
+    if _controller is None:
+        max_limit = s.llm_worker_admission_max_limit if worker else s.llm_admission_max_limit
+        _controller = AdmissionController(
+            initial_limit=min(s.llm_admission_initial_limit, max_limit),
+            min_limit=min(s.llm_admission_min_limit, max_limit),
+            max_limit=max_limit,
+            latency_tolerance=s.llm_admission_latency_tolerance,
+            max_queue=s.llm_admission_max_queue,
+            tenant_max_queue=s.llm_admission_tenant_max_queue,
+            queue_timeout=s.llm_admission_queue_timeout_seconds,
+        )
+    return _controller
+
+
+def get_admission_controller() -> AdmissionController | None:
+    """Shared controller, or None when ``llm_admission_enabled`` is off."""
+    return init_admission_controller()
+
+
+@asynccontextmanager
+async def llm_slot(tenant_id: str | None, priority: str = "standard") -> AsyncIterator[None]:
+    """Hold an admission slot for one upstream completion (no-op when disabled)."""
+    controller = get_admission_controller()
+    if controller is None:
+        yield
+        return
+    async with controller.slot(str(tenant_id or get_settings().default_tenant_id), priority):
+        yield
+
+
+def check_admission(tenant_id: str | None) -> None:
+    """Fail fast before starting a streamed response that would be refused."""
+    controller = get_admission_controller()
+    if controller is not None:
+        controller.check(str(tenant_id or get_settings().default_tenant_id))
+
+
+class _AdmissionCollector(Collector):
+    def collect(self):
+        c = _controller
+        limit = GaugeMetricFamily("llm_admission_limit", "Current adaptive LLM concurrency limit")
+        in_flight = GaugeMetricFamily("llm_admission_in_flight", "LLM requests holding an admission slot")
+        depth = GaugeMetricFamily("llm_admission_queue_depth", "LLM requests waiting for a slot", labels=["priority"])
+        if c is not None:
+            limit.add_metric([], c.limit)
+            in_flight.add_metric([], c.in_flight)
+            for priority, n in c.queue_depths().items():
+                depth.add_metric([priority], n)
+        yield limit
+        yield in_flight
+        yield depth
+
+
+REGISTRY.register(_AdmissionCollector())
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import time
+import uuid
+
+from app.core.admin_settings import load_admin_settings
+from app.core.config import get_settings
+from app.core.tracing import current_trace_id
+from app.db import models
+from app.schemas.case import CaseInput, CaseAnalysisResponse
+from app.services.llm_client import get_llm_client
+from app.services.rag import retrieve_context
+from app.services.response_cache import get_response_cache
+from app.services.safety import apply_safety_postprocess
+
+
+async def run_case_analysis(
+    payload: CaseInput, tenant_id: str, priority: str = "standard"
+) -> tuple[CaseAnalysisResponse, int, bool]:
+    """Retrieve guideline context, call the LLM (or the response cache) and apply safety post-processing.
+
+    Returns the response, the LLM latency in milliseconds (the cache lookup time on a
+    hit) and whether it was served from the cache.
+    """
+    contexts = await retrieve_context(payload, tenant_id=tenant_id)
+    client = get_llm_client()
+    cache = get_response_cache()
+
+    started = time.monotonic()
+    probe = None
+    if cache is not None:
+        probe = await cache.get(
+            "analyze_case",
+            tenant_id,
+            client.s.vllm_model,
+            load_admin_settings()["system_prompt"],
+            payload.model_dump(),
+            contexts,
+            # Only the history prose may match by similarity; age, sex, symptoms,
+            # medications and vitals must be identical.
+            query_text=payload.history,
+            structured=payload.model_dump(exclude={"history"}),
+        )
+    cached = probe is not None and probe.value is not None
+    if cached:
+        result = CaseAnalysisResponse.model_validate(probe.value)
+    else:
+        result = await client.analyze_case(payload, contexts, tenant_id, priority)
+        if probe is not None:
+            cache.put(probe, result.model_dump())
+    latency_ms = int((time.monotonic() - started) * 1000)
+
+    return apply_safety_postprocess(result), latency_ms, cached
+
+
+def case_interaction(
+    case_id: uuid.UUID,
+    tenant_id: uuid.UUID,
+    user_id: uuid.UUID | None,
+    payload: CaseInput,
+    result: CaseAnalysisResponse,
+    latency_ms: int,
+    ttft_ms: int | None = None,
+    cached: bool = False,
+) -> models.Interaction:
+    settings = get_settings()
+    request_payload = {"kind": "analyze_case"}
+    request_payload.update(payload.model_dump())
+    return models.Interaction(
+        case_id=case_id,
+        tenant_id=tenant_id,
+        user_id=user_id,
+        request_payload=request_payload,
+        response_payload=result.model_dump(),
+        llm_model=settings.vllm_model,
+        latency_ms=latency_ms,
+        ttft_ms=ttft_ms,
+        cached=cached,
+        trace_id=current_trace_id(),
+    )
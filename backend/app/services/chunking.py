@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable
+
+from app.core.config import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+TokenCounter = Callable[[list[str]], list[int]]
+
+# A sentence ends at . ! ? (optionally followed by a closing quote/bracket) before whitespace.
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|(?<=[.!?][\"')\]])\s+")
+_MARKDOWN_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*$")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@dataclass(frozen=True)
+class Chunk:
+    text: str
+    heading: str | None = None
+    token_count: int = 0
+
+
+@lru_cache(maxsize=1)
+def _tokenizer_counter() -> TokenCounter:
+    """Count tokens with the embedding model's tokenizer, or estimate if it is unavailable."""
+    try:
+        from transformers import AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(get_settings().embeddings_model)
+    except Exception as exc:
+        logger.warning("Tokenizer unavailable (%s); estimating token counts from text length", exc)
+        return estimate_tokens
+
+    def count(texts: list[str]) -> list[int]:
+        if not texts:
+            return []
+        encoded = tokenizer(texts, add_special_tokens=False, return_attention_mask=False)
+        return [len(ids) for ids in encoded["input_ids"]]
+
+    return count
+
+
+def estimate_tokens(texts: list[str]) -> list[int]:
+    # XLM-R style tokenizers average roughly four characters per token on English prose.
+    return [max(1, len(t) // 4) for t in texts]
+
+
+def _looks_like_heading(line: str) -> bool:
+    # All-caps lines with digits are readings ("HR 120", "BP 90/60"), not titles.
+    shouting = line.isupper() and not any(c.isdigit() for c in line)
+    return bool(_MARKDOWN_HEADING.match(line)) or (
+        len(line) <= 80 and line[-1] not in ".!?;," and (shouting or line.endswith(":"))
+    )
+
+
+def _heading(line: str, next_line: str | None) -> str | None:
+    """Section title for ``line``, or None if it is body text.
+
+    Markdown headings always start a section. A short all-caps (without digits) or
+    colon-terminated line only does when body text follows it, so standalone lines
+    such as "DO NOT GIVE ASPIRIN" and readings such as "HR 120" stay in the text.
+    """
+    m = _MARKDOWN_HEADING.match(line)
+    if m:
+        return m.group(2)
+    if _looks_like_heading(line) and next_line is not None and not _looks_like_heading(next_line):
+        return line.rstrip(":")
+    return None
+
+
+def _split_sentences(paragraph: str) -> list[str]:
+    return [s for s in (p.strip() for p in _SENTENCE_END.split(paragraph)) if s]
+
+
+def _split_long(sentence: str, tokens: int, max_tokens: int) -> list[str]:
+    """Cut an over-long sentence at whitespace into roughly equal pieces under the budget."""
+    pieces = -(-tokens // max_tokens)
+    target = max(1, len(sentence) // pieces)
+    out: list[str] = []
+    start = 0
+    while len(sentence) - start > target:
+        cut = sentence.rfind(" ", start + 1, start + target + 1)
+        if cut <= start:
+            cut = start + target
+        out.append(sentence[start:cut].strip())
+        start = cut
+    out.append(sentence[start:].strip())
+    return [p for p in out if p]
+
+
+def _sections(text: str) -> list[tuple[str | None, list[str]]]:
+    """Group sentences under the most recent heading; paragraph breaks are kept implicit."""
+    sections: list[tuple[str | None, list[str]]] = [(None, [])]
+    paragraph: list[str] = []
+
+    def flush() -> None:
+        if paragraph:
+            sections[-1][1].extend(_split_sentences(" ".join(paragraph)))
+            paragraph.clear()
+
+    lines = [_WHITESPACE.sub(" ", raw).strip() for raw in text.splitlines()]
+    following = [None] * len(lines)
+    upcoming: str | None = None
+    for i in range(len(lines) - 1, -1, -1):
+        following[i] = upcoming
+        if lines[i]:
+            upcoming = lines[i]
+
+    for line, next_line in zip(lines, following):
+        if not line:
+            flush()
+            continue
+        heading = _heading(line, next_line)
+        if heading is not None:
+            flush()
+            sections.append((heading, []))
+            continue
+        if _looks_like_heading(line):
+            # Heading-shaped but body text (an alert, a vital sign): its own sentence.
+            flush()
+            paragraph.append(line)
+            flush()
+            continue
+        # A list item or a line ending a sentence starts a new paragraph; wrapped prose is joined.
+        if line[0] in "-*•" or (paragraph and paragraph[-1][-1] in ".!?:"):
+            flush()
+        paragraph.append(line)
+    flush()
+    # Keep body-less headings (e.g. a trailing "## Contraindications"): they are content too.
+    return [(h, s) for h, s in sections if s or h]
+
+
+def chunk_text(
+    text: str,
+    max_tokens: int | None = None,
+    overlap_tokens: int | None = None,
+    count_tokens: TokenCounter | None = None,
+) -> list[Chunk]:
+    """Pack whole sentences into chunks of at most ``max_tokens`` tokens.
+
+    Chunks never span a heading. The heading prefixes the text of every chunk in its
+    section (so it reaches the embedding and the LLM context) and is also returned
+    as metadata. Consecutive chunks share up to ``overlap_tokens`` tokens of trailing
+    sentences. Every sentence is tokenized once, so the cost is linear in the input size.
+    """
+    s = get_settings()
+    max_tokens = max_tokens or s.chunk_max_tokens
+    overlap_tokens = s.chunk_overlap_tokens if overlap_tokens is None else overlap_tokens
+    overlap_tokens = min(overlap_tokens, max_tokens // 2)
+    count_tokens = count_tokens or _tokenizer_counter()
+
+    chunks: list[Chunk] = []
+    for heading, sentences in _sections(text):
+        heading_tokens = count_tokens([heading])[0] + 1 if heading else 0
+        if not sentences:
+            chunks.append(Chunk(heading, heading, heading_tokens - 1))
+            continue
+        # The heading prefix counts against each chunk's budget.
+        budget = max(max_tokens - heading_tokens, max_tokens // 2)
+        overlap = min(overlap_tokens, budget // 2)
+
+        def emit(window: list[tuple[str, int]], size: int) -> None:
+            body = " ".join(u for u, _ in window)
+            if heading:
+                chunks.append(Chunk(f"{heading}\n{body}", heading, size + heading_tokens))
+            else:
+                chunks.append(Chunk(body, None, size))
+
+        counts = count_tokens(sentences)
+        units: list[tuple[str, int]] = []
+        for sentence, n in zip(sentences, counts):
+            if n <= budget:
+                units.append((sentence, n))
+            else:
+                parts = _split_long(sentence, n, budget)
+                units.extend(zip(parts, count_tokens(parts)))
+
+        window: list[tuple[str, int]] = []
+        size = 0
+        for unit in units:
+            if window and size + unit[1] > budget:
+                emit(window, size)
+                # Carry trailing sentences forward as overlap.
+                carried: list[tuple[str, int]] = []
+                carried_size = 0
+                for prev in reversed(window):
+                    if carried_size + prev[1] > overlap or carried_size + prev[1] + unit[1] > budget:
+                        break
+                    carried.insert(0, prev)
+                    carried_size += prev[1]
+                window, size = carried, carried_size
+            window.append(unit)
+            size += unit[1]
+        if window:
+            emit(window, size)
+    return chunks
+
+
+def split_legacy(text: str, max_len: int = 512) -> list[Chunk]:
+    """The original splitter: one chunk per line, hard-cut every ``max_len`` characters."""
+    paragraphs = [p.strip() for p in text.split("\n") if p.strip()]
+    chunks: list[str] = []
+    for p in paragraphs:
+        while len(p) > max_len:
+            chunks.append(p[:max_len])
+            p = p[max_len:]
+        if p:
+            chunks.append(p)
+    if not chunks and text.strip():
+        chunks = [text.strip()]
+    return [Chunk(c) for c in chunks]
+
+
+def chunk_document(text: str) -> list[Chunk]:
+    if get_settings().chunker == "legacy":
+        return split_legacy(text)
+    return chunk_text(text)
+
+
+def chunker_signature() -> str:
+    """Identifies the chunking config; stored with chunk hashes so a config change re-chunks."""
+    s = get_settings()
+    if s.chunker == "legacy":
+        return "legacy"
+    return f"sentence-v3:{s.embeddings_model}:{s.chunk_max_tokens}:{s.chunk_overlap_tokens}"
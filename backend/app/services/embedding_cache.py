@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+from prometheus_client import Counter
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+
+
+CACHE_LOOKUPS = Counter(
+    "embedding_cache_lookups",
+    "Query-embedding cache lookups",
+    labelnames=["tier", "result"],
+)
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    return _WS.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def cache_key(model: str, normalized: str) -> str:
+    return hashlib.sha256(f"{model}\x00{normalized}".encode("utf-8")).hexdigest()
+
+
+class _SqliteTier:
+    """Shared on-disk tier so uvicorn workers on one host reuse each other's entries."""
+
+    def __init__(self, path: Path, model: str, ttl_seconds: float) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.model = model
+        self.ttl = ttl_seconds
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, timeout=5.0)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, model TEXT NOT NULL, vec BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            # Entries from another embedding model can never be hit again.
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE model != ? OR expires_at <= ?", (model, time.time())
+            )
+
+    def get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        if not keys:
+            return {}
+        marks = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, vec FROM embeddings WHERE key IN ({marks}) AND expires_at > ?",
+                (*keys, time.time()),
+            ).fetchall()
+        return {key: np.frombuffer(vec, dtype=np.float32) for key, vec in rows}
+
+    def set_many(self, items: dict[str, np.ndarray]) -> None:
+        expires_at = time.time() + self.ttl
+        rows = [(k, self.model, v.tobytes(), expires_at) for k, v in items.items()]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+            self._writes += 1
+            if self._writes % 1000 == 0:
+                self._conn.execute("DELETE FROM embeddings WHERE expires_at <= ?", (time.time(),))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class EmbeddingCache:
+    """Two-tier cache of normalized-text embeddings stored as float32 arrays.
+
+    Keys hash the embedding model name with the normalized text, so switching
+    ``embeddings_model`` invalidates every entry without an explicit flush.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        max_entries: int,
+        ttl_seconds: float,
+        disk_path: Path | None = None,
+    ) -> None:
+        self.model = model
+        self.memory: TTLCache[str, np.ndarray] = TTLCache(max_entries, ttl_seconds)
+        self.disk = _SqliteTier(disk_path, model, ttl_seconds) if disk_path else None
+
+    def key(self, normalized: str) -> str:
+        return cache_key(self.model, normalized)
+
+    async def get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        found: dict[str, np.ndarray] = {}
+        missing: list[str] = []
+        for key in keys:
+            vec = self.memory.get(key)
+            if vec is None:
+                missing.append(key)
+            else:
+                found[key] = vec
+        CACHE_LOOKUPS.labels("memory", "hit").inc(len(found))
+        CACHE_LOOKUPS.labels("memory", "miss").inc(len(missing))
+        if self.disk is not None and missing:
+            from_disk = await asyncio.to_thread(self.disk.get_many, missing)
+            CACHE_LOOKUPS.labels("disk", "hit").inc(len(from_disk))
+            CACHE_LOOKUPS.labels("disk", "miss").inc(len(missing) - len(from_disk))
+            for key, vec in from_disk.items():
+                self.memory.set(key, vec)
+            found.update(from_disk)
+        return found
+
+    async def set_many(self, items: dict[str, np.ndarray]) -> None:
+        for key, vec in items.items():
+            self.memory.set(key, vec)
+        if self.disk is not None and items:
+            await asyncio.to_thread(self.disk.set_many, items)
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
+
+
+_cache: EmbeddingCache | None = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    global _cache
+    if _cache is None:
+        s = get_settings()
+        disk_path = Path(s.embeddings_cache_dir) / "embeddings.sqlite3" if s.embeddings_cache_dir else None
+        _cache = EmbeddingCache(
+            model=s.embeddings_model,
+            max_entries=s.embeddings_cache_max_entries,
+            ttl_seconds=s.embeddings_cache_ttl_seconds,
+            disk_path=disk_path,
+        )
+    return _cache
+
+
+def close_embedding_cache() -> None:
+    global _cache
+    if _cache is not None:
+        _cache.close()
+        _cache = None
@@ -1,28 +1,326 @@
 from __future__ import annotations
 
 import asyncio
-from typing import List
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
 
+import numpy as np
+from prometheus_client import Histogram
 from sentence_transformers import SentenceTransformer
 
+from app.core.config import get_settings
+from app.core.tracing import traced
+from app.services.embedding_cache import get_embedding_cache, normalize_text
+
 
 _model: SentenceTransformer | None = None
+_sparse_head = None
+_sparse_lock = threading.Lock()
+
+BATCH_SIZE = Histogram(
+    "embedding_batch_size",
+    "Texts encoded per SentenceTransformer.encode call",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+QUEUE_WAIT = Histogram(
+    "embedding_queue_wait_seconds",
+    "Time an embed_texts call waited before its batch started encoding",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+
+class EmbeddingQueueFull(RuntimeError):
+    """Raised when the embedding batcher already holds ``max_queue`` pending calls."""
 
 
 def _get_model() -> SentenceTransformer:
     global _model
     if _model is None:
         # BAAI/bge-m3 as per master plan (supports multi-lingual, good for RAG)
-        _model = SentenceTransformer("BAAI/bge-m3")
+        _model = SentenceTransformer(get_settings().embeddings_model)
     return _model
 
 
-async def embed_texts(texts: list[str]) -> list[list[float]]:
-    loop = asyncio.get_event_loop()
+def _encode(texts: list[str], batch_size: int = 32) -> np.ndarray:
+    model = _get_model()
+    return model.encode(
+        texts, batch_size=batch_size, normalize_embeddings=True, convert_to_numpy=True
+    )
+
+
+@dataclass
+class SparseVector:
+    indices: list[int]
+    values: list[float]
+
+
+@dataclass
+class HybridEmbeddings:
+    """Dense vectors plus bge-m3 lexical (sparse) weights for the same texts."""
+
+    dense: np.ndarray
+    sparse: list[SparseVector]
+
+    def __len__(self) -> int:
+        return len(self.sparse)
+
+    def __getitem__(self, key: slice) -> "HybridEmbeddings":
+        return HybridEmbeddings(self.dense[key], self.sparse[key])
+
+
+def _get_sparse_head():
+    """bge-m3's ``sparse_linear`` head, mapping each token's hidden state to a lexical weight."""
+    global _sparse_head
+    if _sparse_head is None:
+        with _sparse_lock:
+            if _sparse_head is None:
+                import torch
+
+                model = _get_model()
+                name = get_settings().embeddings_model
+                path = Path(name) / "sparse_linear.pt"
+                if not path.exists():
+                    from huggingface_hub import hf_hub_download
+
+                    path = hf_hub_download(name, "sparse_linear.pt")
+                state = torch.load(path, map_location="cpu")
+                head = torch.nn.Linear(state["weight"].shape[1], state["weight"].shape[0])
+                head.load_state_dict(state)
+                _sparse_head = head.to(model.device).eval()
+    return _sparse_head
+
+
+def _encode_hybrid(texts: list[str], batch_size: int = 32) -> HybridEmbeddings:
+    """Dense and sparse embeddings from a single forward pass (``output_value=None``)."""
+    import torch
+
+    model = _get_model()
+    head = _get_sparse_head()
+    special = set(model.tokenizer.all_special_ids)
+    outputs = model.encode(texts, batch_size=batch_size, output_value=None, convert_to_numpy=False)
+
+    dense = np.stack([o["sentence_embedding"].float().cpu().numpy() for o in outputs])
+    dense /= np.linalg.norm(dense, axis=1, keepdims=True).clip(min=1e-12)
+
+    sparse: list[SparseVector] = []
+    with torch.inference_mode():
+        for o in outputs:
+            weights = torch.relu(head(o["token_embeddings"].to(head.weight.dtype))).squeeze(-1)
+            mask = o["attention_mask"].bool()
+            lexical: dict[int, float] = {}
+            for token_id, weight in zip(o["input_ids"][mask].tolist(), weights[mask].tolist()):
+                if token_id in special or weight <= 0:
+                    continue
+                if weight > lexical.get(token_id, 0.0):
+                    lexical[token_id] = weight
+            sparse.append(SparseVector(list(lexical), list(lexical.values())))
+    return HybridEmbeddings(dense.astype(np.float32), sparse)
+
+
+def pack_hybrid(dense: np.ndarray, sparse: SparseVector) -> np.ndarray:
+    # Stored in the float32 embedding cache as [dense | indices | values]; token ids
+    # (< 2**24) are exact in float32. concatenate allocates a fresh array, so a cached
+    # entry never keeps the batch's dense matrix (``dense`` is a row view of it) alive.
+    return np.concatenate(
+        [dense, np.asarray(sparse.indices, dtype=np.float32), np.asarray(sparse.values, dtype=np.float32)],
+        dtype=np.float32,
+    )
+
+
+def unpack_hybrid(packed: np.ndarray, dim: int) -> tuple[np.ndarray, SparseVector]:
+    n = (len(packed) - dim) // 2
+    return packed[:dim], SparseVector(packed[dim:dim + n].astype(np.int64).tolist(), packed[dim + n:].tolist())
+
+
+@dataclass
+class _Pending:
+    texts: list[str]
+    future: asyncio.Future
+    enqueued_at: float
+
+
+class EmbeddingBatcher:
+    """Coalesce concurrent ``embed_texts`` calls into shared ``encode`` batches.
+
+    The first pending call opens a batch; further calls join it until either
+    ``max_batch`` texts are collected or ``max_wait_ms`` has elapsed. Encoding runs
+    on a single dedicated thread so concurrent requests never contend for the model.
+    """
+
+    def __init__(
+        self,
+        max_batch: int,
+        max_wait_ms: float,
+        max_queue: int,
+        encode: Callable[[list[str], int], np.ndarray | HybridEmbeddings] = _encode,
+    ) -> None:
+        self.encode = encode
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue[_Pending] | None = None
+        self._task: asyncio.Task | None = None
+
+    def _ensure_started(self) -> asyncio.Queue[_Pending]:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._task = loop.create_task(self._run())
+        return self._queue
+
+    async def embed(self, texts: list[str]) -> np.ndarray | HybridEmbeddings:
+        loop = asyncio.get_running_loop()
+        if len(texts) >= self.max_batch:
+            # Already a full batch on its own (e.g. document ingestion).
+            BATCH_SIZE.observe(len(texts))
+            return await loop.run_in_executor(self._executor, self.encode, texts, self.max_batch)
+
+        queue = self._ensure_started()
+        pending = _Pending(texts=texts, future=loop.create_future(), enqueued_at=time.monotonic())
+        try:
+            queue.put_nowait(pending)
+        except asyncio.QueueFull:
+            raise EmbeddingQueueFull(f"embedding queue is full ({self.max_queue} pending calls)")
+        return await pending.future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            size = len(batch[0].texts)
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                size += len(item.texts)
+
+            batch = [p for p in batch if not p.future.done()]
+            if not batch:
+                continue
+            texts = [t for p in batch for t in p.texts]
+            started = time.monotonic()
+            for p in batch:
+                QUEUE_WAIT.observe(started - p.enqueued_at)
+            BATCH_SIZE.observe(len(texts))
+
+            try:
+                emb = await loop.run_in_executor(self._executor, self.encode, texts, self.max_batch)
+            except Exception as exc:
+                for p in batch:
+                    if not p.future.done():
+                        p.future.set_exception(exc)
+                continue
+
+            offset = 0
+            for p in batch:
+                n = len(p.texts)
+                if not p.future.done():
+                    p.future.set_result(emb[offset:offset + n])
+                offset += n
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._queue is not None:
+            while not self._queue.empty():
+                p = self._queue.get_nowait()
+                if not p.future.done():
+                    p.future.cancel()
+        self._executor.shutdown(wait=False)
+
+
+_batcher: EmbeddingBatcher | None = None
+
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    global _batcher
+    if _batcher is None:
+        s = get_settings()
+        _batcher = EmbeddingBatcher(
+            max_batch=s.embeddings_batch_max_size,
+            max_wait_ms=s.embeddings_batch_max_wait_ms,
+            max_queue=s.embeddings_batch_max_queue,
+            encode=_encode_hybrid if s.retrieval_mode == "hybrid" else _encode,
+        )
+    return _batcher
+
+
+async def close_embedding_batcher() -> None:
+    global _batcher
+    if _batcher is not None:
+        await _batcher.aclose()
+        _batcher = None
+
+
+def _dense(emb: np.ndarray | HybridEmbeddings) -> np.ndarray:
+    return emb.dense if isinstance(emb, HybridEmbeddings) else emb
+
+
+async def _cached(
+    texts: list[str],
+    prefix: str,
+    to_arrays: Callable[[np.ndarray | HybridEmbeddings], list[np.ndarray]],
+) -> list[np.ndarray]:
+    store = get_embedding_cache()
+    normalized = [normalize_text(t) for t in texts]
+    keys = [store.key(prefix + n) for n in normalized]
+    found = await store.get_many(list(dict.fromkeys(keys)))
+
+    missing = {k: n for k, n in zip(keys, normalized) if k not in found}
+    if missing:
+        emb = await get_embedding_batcher().embed(list(missing.values()))
+        fresh = dict(zip(missing, to_arrays(emb)))
+        await store.set_many(fresh)
+        found.update(fresh)
+    return [found[k] for k in keys]
+
+
+@traced("embeddings.embed_texts")
+async def embed_texts(texts: list[str], cache: bool = True) -> list[list[float]]:
+    """Embed ``texts``, serving repeated query strings from the embedding cache.
+
+    Bulk callers such as document ingestion pass ``cache=False`` so one-off chunks
+    do not evict hot query entries.
+    """
+    if not texts:
+        return []
+    if not cache:
+        return _dense(await get_embedding_batcher().embed(texts)).tolist()
+    # Copy each row: a view would keep the whole batch matrix alive for as long as the
+    # cache holds any one of its rows.
+    arrays = await _cached(texts, "", lambda emb: [np.array(v, dtype=np.float32, copy=True) for v in _dense(emb)])
+    return [a.tolist() for a in arrays]
 
-    def _encode() -> List[List[float]]:
-        model = _get_model()
-        emb = model.encode(texts, normalize_embeddings=True)
-        return emb.tolist()
 
-    return await loop.run_in_executor(None, _encode)
+@traced("embeddings.embed_hybrid")
+async def embed_hybrid(texts: list[str], cache: bool = True) -> list[tuple[list[float], SparseVector]]:
+    """Dense and sparse embeddings from one encode pass; requires ``retrieval_mode="hybrid"``."""
+    if not texts:
+        return []
+    if get_settings().retrieval_mode != "hybrid":
+        raise RuntimeError("embed_hybrid needs RETRIEVAL_MODE=hybrid")
+    if not cache:
+        emb = await get_embedding_batcher().embed(texts)
+        return [(d.tolist(), sp) for d, sp in zip(emb.dense, emb.sparse)]
+    arrays = await _cached(texts, "hybrid\0", lambda emb: [pack_hybrid(d, sp) for d, sp in zip(emb.dense, emb.sparse)])
+    dim = get_settings().embeddings_dim
+    return [(d.tolist(), sp) for d, sp in (unpack_hybrid(a, dim) for a in arrays)]
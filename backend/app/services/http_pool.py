@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from urllib.parse import urlsplit
+
+import httpx
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import REGISTRY, Collector
+
+from app.core.config import get_settings
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class LLMHttpPool:
+    """Application-scoped keep-alive connection pools, one per upstream origin.
+
+    Each origin gets its own ``httpx.AsyncClient`` so ``max_connections`` acts as a
+    per-host cap. Requests beyond the cap wait up to ``llm_http_pool_timeout``.
+    """
+
+    def __init__(self) -> None:
+        self.s = get_settings()
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._in_flight: dict[str, int] = {}
+        self._requests_total: dict[str, int] = {}
+
+    def _new_client(self) -> httpx.AsyncClient:
+        s = self.s
+        return httpx.AsyncClient(
+            http2=s.llm_http2,
+            limits=httpx.Limits(
+                max_connections=s.llm_http_max_connections_per_host,
+                max_keepalive_connections=s.llm_http_max_keepalive_connections,
+                keepalive_expiry=s.llm_http_keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                s.llm_http_read_timeout,
+                connect=s.llm_http_connect_timeout,
+                pool=s.llm_http_pool_timeout,
+            ),
+        )
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        origin = _origin(url)
+        client = self._clients.get(origin)
+        if client is None:
+            client = self._new_client()
+            self._clients[origin] = client
+            self._in_flight[origin] = 0
+            self._requests_total[origin] = 0
+        return client
+
+    @asynccontextmanager
+    async def request(self, url: str) -> AsyncIterator[httpx.AsyncClient]:
+        """Borrow the pooled client for ``url`` while tracking in-flight requests."""
+        origin = _origin(url)
+        client = self.client_for(url)
+        self._in_flight[origin] += 1
+        self._requests_total[origin] += 1
+        try:
+            yield client
+        finally:
+            self._in_flight[origin] -= 1
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        out: dict[str, dict[str, int]] = {}
+        for origin, client in self._clients.items():
+            # httpx does not expose pool internals publicly; read them defensively.
+            pool = getattr(getattr(client, "_transport", None), "_pool", None)
+            connections = list(getattr(pool, "connections", []) or [])
+            queued = [r for r in getattr(pool, "_requests", []) or [] if r.is_queued()]
+            idle = sum(1 for c in connections if c.is_idle())
+            out[origin] = {
+                "connections": len(connections),
+                "idle": idle,
+                "active": len(connections) - idle,
+                "queued": len(queued),
+                "in_flight": self._in_flight.get(origin, 0),
+                "requests_total": self._requests_total.get(origin, 0),
+                "max_connections": self.s.llm_http_max_connections_per_host,
+            }
+        return out
+
+    async def aclose(self) -> None:
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+
+_pool: LLMHttpPool | None = None
+
+
+def get_llm_http_pool() -> LLMHttpPool:
+    global _pool
+    if _pool is None:
+        _pool = LLMHttpPool()
+    return _pool
+
+
+async def close_llm_http_pool() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.aclose()
+        _pool = None
+
+
+class _PoolCollector(Collector):
+    _FIELDS = {
+        "connections": "Open upstream connections",
+        "idle": "Idle keep-alive connections",
+        "active": "Connections currently serving a request",
+        "queued": "Requests waiting for a free connection",
+        "in_flight": "Requests in flight through the pool",
+        "max_connections": "Configured per-host connection cap",
+    }
+
+    def collect(self):
+        stats = _pool.stats() if _pool is not None else {}
+        for field, doc in self._FIELDS.items():
+            family = GaugeMetricFamily(f"llm_http_pool_{field}", doc, labels=["origin"])
+            for origin, values in stats.items():
+                family.add_metric([origin], values[field])
+            yield family
+        total = CounterMetricFamily(
+            "llm_http_pool_requests", "Requests sent through the pool", labels=["origin"]
+        )
+        for origin, values in stats.items():
+            total.add_metric([origin], values["requests_total"])
+        yield total
+
+
+REGISTRY.register(_PoolCollector())
@@ -0,0 +1,413 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import AsyncIterable, AsyncIterator, Callable
+
+from prometheus_client import Counter, Histogram
+from pydantic import ValidationError
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import selectinload
+
+from app.core.config import get_settings
+from app.db import models
+from app.db.session import AsyncSessionLocal
+from app.schemas.document import DocumentIngestRequest
+from app.services.chunking import Chunk, chunk_document, chunker_signature
+from app.services.embeddings import embed_hybrid, embed_texts
+from app.services.qdrant_client import delete_document_points, set_document_payload, upsert_text_points
+
+
+# Fixed namespace so document and point ids are identical across processes and re-ingests.
+_ID_NAMESPACE = uuid.UUID("6f1c1f5e-8d3a-4a8e-9a43-2f0c6f4b9d21")
+
+_MAX_REPORTED_ERRORS = 20
+
+INGEST_ITEMS = Counter(
+    "ingest_items",
+    "Items processed by each document ingestion stage",
+    labelnames=["stage"],
+)
+INGEST_STAGE_SECONDS = Histogram(
+    "ingest_stage_seconds",
+    "Time spent on one batch in each document ingestion stage",
+    labelnames=["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+
+def document_id_for(tenant_id: str, doc: DocumentIngestRequest) -> str:
+    """Stable id from the caller's ``document_id``, else its ``source``, else its title."""
+    key = doc.document_id or doc.source or doc.title
+    return str(uuid.uuid5(_ID_NAMESPACE, f"{tenant_id}:{key}"))
+
+
+def chunk_hash(chunk: Chunk) -> str:
+    return hashlib.sha256(f"{chunk.heading or ''}\0{chunk.text}".encode("utf-8")).hexdigest()
+
+
+def chunk_point_ids(document_id: str, hashes: list[str]) -> list[str]:
+    """Point id per chunk from the document id and chunk content.
+
+    Content-derived ids let an edited document keep the points of its unchanged
+    chunks even when their position shifts; repeated chunks get an occurrence suffix.
+    """
+    seen: dict[str, int] = {}
+    ids: list[str] = []
+    for digest in hashes:
+        n = seen.get(digest, 0)
+        seen[digest] = n + 1
+        ids.append(str(uuid.uuid5(_ID_NAMESPACE, f"{document_id}:{digest}:{n}")))
+    return ids
+
+
+def content_hash(doc: DocumentIngestRequest) -> str:
+    h = hashlib.sha256()
+    for part in (chunker_signature(), doc.title, doc.source or "", doc.content):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+async def read_ndjson(
+    chunks: AsyncIterable[bytes],
+    on_error: Callable[[str], None],
+) -> AsyncIterator[DocumentIngestRequest]:
+    """Yield one document per NDJSON line without buffering the whole body."""
+    buf = b""
+    line_no = 0
+
+    def parse(line: bytes) -> DocumentIngestRequest | None:
+        if not line.strip():
+            return None
+        try:
+            return DocumentIngestRequest.model_validate(json.loads(line))
+        except (ValueError, ValidationError) as exc:
+            on_error(f"line {line_no}: {str(exc).splitlines()[0]}")
+            return None
+
+    async for chunk in chunks:
+        buf += chunk
+        *lines, buf = buf.split(b"\n")
+        for line in lines:
+            line_no += 1
+            doc = parse(line)
+            if doc is not None:
+                yield doc
+    line_no += 1
+    doc = parse(buf)
+    if doc is not None:
+        yield doc
+
+
+@dataclass
+class StageStats:
+    items: int = 0
+    seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "items": self.items,
+            "seconds": round(self.seconds, 3),
+            "per_second": round(self.items / self.seconds, 1) if self.seconds > 0 else 0.0,
+        }
+
+
+@dataclass
+class IngestReport:
+    documents: int = 0
+    ingested: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    chunks: int = 0
+    chunks_reused: int = 0
+    chunks_deleted: int = 0
+    seconds: float = 0.0
+    stages: dict[str, StageStats] = field(default_factory=dict)
+    errors: list[str] = field(default_factory=list)
+
+    def add_error(self, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < _MAX_REPORTED_ERRORS:
+            self.errors.append(message)
+
+    def observe(self, stage: str, items: int, seconds: float) -> None:
+        stats = self.stages.setdefault(stage, StageStats())
+        stats.items += items
+        stats.seconds += seconds
+        INGEST_ITEMS.labels(stage).inc(items)
+        INGEST_STAGE_SECONDS.labels(stage).observe(seconds)
+
+    def as_dict(self) -> dict:
+        return {
+            "documents": self.documents,
+            "ingested": self.ingested,
+            "unchanged": self.unchanged,
+            "failed": self.failed,
+            "chunks": self.chunks,
+            "chunks_reused": self.chunks_reused,
+            "chunks_deleted": self.chunks_deleted,
+            "seconds": round(self.seconds, 3),
+            "stages": {name: stats.as_dict() for name, stats in self.stages.items()},
+            "errors": self.errors,
+        }
+
+
+@dataclass
+class _Prepared:
+    document_id: str
+    doc: DocumentIngestRequest
+    digest: str
+    chunks: list[Chunk]
+    chunk_ids: list[str]
+    chunk_hashes: list[str]
+    known: set[str] = field(default_factory=set)
+    stale: int = 0
+    retitled: bool = False
+    remaining: int = 0
+
+
+class IngestionPipeline:
+    """Chunk -> embed -> upsert as a bounded stream of fixed-size batches.
+
+    Documents are pulled from the source only as fast as embedding and Qdrant keep
+    up (every stage hands off through a queue of ``queue_depth`` batches), so memory
+    stays flat regardless of upload size.
+
+    The ``documents`` / ``document_chunks`` registry makes re-ingestion incremental:
+    an unchanged document is skipped before chunking, and for a changed one only
+    chunks whose content hash is new are embedded. Once all of a document's new
+    chunks are in Qdrant, its removed chunks are deleted and the registry is updated,
+    so a failed run never records chunks that were not written.
+    """
+
+    def __init__(self, tenant_id: str, collection: str | None = None, force: bool = False) -> None:
+        s = get_settings()
+        self.tenant_id = tenant_id
+        self.collection = collection or s.qdrant_collection
+        # Re-embed everything regardless of the registry (e.g. after rebuilding the collection).
+        self.force = force
+        self.batch_size = max(1, s.ingest_batch_size)
+        self.upsert_concurrency = max(1, s.ingest_upsert_concurrency)
+        self.queue_depth = max(1, s.ingest_queue_depth)
+        self.hybrid = s.retrieval_mode == "hybrid"
+        self.report = IngestReport()
+
+    async def run(self, documents: AsyncIterable[DocumentIngestRequest]) -> IngestReport:
+        started = time.monotonic()
+        embed_q: asyncio.Queue = asyncio.Queue(maxsize=self.queue_depth)
+        upsert_q: asyncio.Queue = asyncio.Queue(maxsize=self.queue_depth)
+        tasks = [
+            asyncio.create_task(self._produce(documents, embed_q)),
+            asyncio.create_task(self._embed(embed_q, upsert_q)),
+            *(asyncio.create_task(self._upsert(upsert_q)) for _ in range(self.upsert_concurrency)),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        self.report.seconds = time.monotonic() - started
+        return self.report
+
+    async def _produce(self, documents: AsyncIterable[DocumentIngestRequest], embed_q: asyncio.Queue) -> None:
+        group: dict[str, DocumentIngestRequest] = {}
+        pending: list[tuple[_Prepared, str, str, dict]] = []
+        iterator = documents.__aiter__()
+        while True:
+            t0 = time.monotonic()
+            try:
+                doc = await iterator.__anext__()
+            except StopAsyncIteration:
+                doc = None
+            if doc is not None:
+                self.report.observe("read", 1, time.monotonic() - t0)
+                self.report.documents += 1
+                # A repeated document within one group: the last copy wins.
+                group[document_id_for(self.tenant_id, doc)] = doc
+            if group and (doc is None or len(group) >= self.batch_size):
+                for item in await self._prepare(group):
+                    points = self._points(item)
+                    if points:
+                        pending.extend(points)
+                    else:
+                        await self._finalize([item])
+                group = {}
+                while len(pending) >= self.batch_size:
+                    await embed_q.put(pending[:self.batch_size])
+                    pending = pending[self.batch_size:]
+            if doc is None:
+                break
+        if pending:
+            await embed_q.put(pending)
+        await embed_q.put(None)
+
+    async def _prepare(self, group: dict[str, DocumentIngestRequest]) -> list[_Prepared]:
+        t0 = time.monotonic()
+        async with AsyncSessionLocal() as db:
+            rows = await db.execute(
+                select(models.Document)
+                .where(
+                    models.Document.id.in_([uuid.UUID(i) for i in group]),
+                    models.Document.tenant_id == uuid.UUID(self.tenant_id),
+                )
+                .options(selectinload(models.Document.chunks))
+            )
+            existing = {} if self.force else {str(d.id): d for d in rows.scalars()}
+        digests = {doc_id: content_hash(doc) for doc_id, doc in group.items()}
+        todo = {}
+        for doc_id, doc in group.items():
+            row = existing.get(doc_id)
+            if row is not None and row.content_hash == digests[doc_id]:
+                self.report.unchanged += 1
+            else:
+                todo[doc_id] = doc
+        self.report.observe("lookup", len(group), time.monotonic() - t0)
+
+        t0 = time.monotonic()
+        # Tokenizing is CPU-bound; keep it off the event loop.
+        chunked = await asyncio.to_thread(lambda: [chunk_document(doc.content) for doc in todo.values()])
+        prepared: list[_Prepared] = []
+        for (doc_id, doc), chunks in zip(todo.items(), chunked):
+            if not chunks:
+                self.report.add_error(f"{doc.title!r}: empty content")
+                continue
+            hashes = [chunk_hash(c) for c in chunks]
+            ids = chunk_point_ids(doc_id, hashes)
+            row = existing.get(doc_id)
+            known = {str(c.id) for c in row.chunks} if row is not None else set()
+            prepared.append(
+                _Prepared(
+                    document_id=doc_id,
+                    doc=doc,
+                    digest=digests[doc_id],
+                    chunks=chunks,
+                    chunk_ids=ids,
+                    chunk_hashes=hashes,
+                    known=known,
+                    stale=len(known - set(ids)),
+                    retitled=row is not None and (row.title, row.source) != (doc.title, doc.source),
+                )
+            )
+            self.report.chunks_reused += len(known & set(ids))
+        self.report.observe("chunk", sum(len(p.chunks) for p in prepared), time.monotonic() - t0)
+        return prepared
+
+    def _points(self, item: _Prepared) -> list[tuple[_Prepared, str, str, dict]]:
+        """Points for the chunks not already stored under the same content-derived id."""
+        self.report.ingested += 1
+        points = [
+            (
+                item,
+                point_id,
+                chunk.text,
+                {
+                    "tenant_id": self.tenant_id,
+                    "document_id": item.document_id,
+                    "title": item.doc.title,
+                    "source": item.doc.source,
+                    "heading": chunk.heading,
+                    "token_count": chunk.token_count,
+                    "text": chunk.text,
+                },
+            )
+            for point_id, chunk in zip(item.chunk_ids, item.chunks)
+            if point_id not in item.known
+        ]
+        item.remaining = len(points)
+        self.report.chunks += len(points)
+        return points
+
+    async def _embed(self, embed_q: asyncio.Queue, upsert_q: asyncio.Queue) -> None:
+        while True:
+            batch = await embed_q.get()
+            if batch is None:
+                for _ in range(self.upsert_concurrency):
+                    await upsert_q.put(None)
+                return
+            t0 = time.monotonic()
+            texts = [text for _, _, text, _ in batch]
+            if self.hybrid:
+                embedded = await embed_hybrid(texts, cache=False)
+                vectors, sparse = [d for d, _ in embedded], [sp for _, sp in embedded]
+            else:
+                vectors, sparse = await embed_texts(texts, cache=False), None
+            self.report.observe("embed", len(batch), time.monotonic() - t0)
+            await upsert_q.put((batch, vectors, sparse))
+
+    async def _upsert(self, upsert_q: asyncio.Queue) -> None:
+        while True:
+            item = await upsert_q.get()
+            if item is None:
+                return
+            batch, vectors, sparse = item
+            t0 = time.monotonic()
+            await upsert_text_points(
+                self.collection,
+                ids=[point_id for _, point_id, _, _ in batch],
+                vectors=vectors,
+                payloads=[payload for _, _, _, payload in batch],
+                sparse=sparse,
+            )
+            self.report.observe("upsert", len(batch), time.monotonic() - t0)
+            done = []
+            for prepared, *_ in batch:
+                prepared.remaining -= 1
+                if prepared.remaining == 0:
+                    done.append(prepared)
+            if done:
+                await self._finalize(done)
+
+    async def _finalize(self, items: list[_Prepared]) -> None:
+        """Drop each document's superseded points and record its new version."""
+        t0 = time.monotonic()
+        for item in items:
+            await delete_document_points(self.collection, self.tenant_id, item.document_id, keep_ids=item.chunk_ids)
+            if item.retitled:
+                await set_document_payload(
+                    self.collection,
+                    self.tenant_id,
+                    item.document_id,
+                    {"title": item.doc.title, "source": item.doc.source},
+                )
+            self.report.chunks_deleted += item.stale
+
+        now = datetime.now(timezone.utc)
+        async with AsyncSessionLocal() as db:
+            for item in items:
+                doc_id = uuid.UUID(item.document_id)
+                values = {
+                    "title": item.doc.title,
+                    "source": item.doc.source,
+                    "external_id": item.doc.document_id,
+                    "content_hash": item.digest,
+                    "chunk_count": len(item.chunks),
+                    "updated_at": now,
+                }
+                # ON CONFLICT also locks the row, serializing concurrent re-ingests of one document.
+                await db.execute(
+                    pg_insert(models.Document)
+                    .values(id=doc_id, tenant_id=uuid.UUID(self.tenant_id), created_at=now, **values)
+                    .on_conflict_do_update(index_elements=[models.Document.id], set_=values)
+                )
+                await db.execute(delete(models.DocumentChunk).where(models.DocumentChunk.document_id == doc_id))
+                db.add_all(
+                    models.DocumentChunk(
+                        id=uuid.UUID(point_id),
+                        document_id=doc_id,
+                        chunk_index=i,
+                        content_hash=digest,
+                        token_count=chunk.token_count,
+                    )
+                    for i, (point_id, digest, chunk) in enumerate(zip(item.chunk_ids, item.chunk_hashes, item.chunks))
+                )
+            await db.commit()
+        self.report.observe("finalize", len(items), time.monotonic() - t0)
@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import random
+import statistics
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+
+import httpx
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import REGISTRY, Collector
+
+from app.core.config import get_settings
+from app.services.http_pool import get_llm_http_pool
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+UPSTREAM_SECONDS = Histogram(
+    "llm_upstream_seconds",
+    "Completion round trip per vLLM endpoint (non-streamed calls)",
+    labelnames=["endpoint"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0),
+)
+UPSTREAM_REQUESTS = Counter(
+    "llm_upstream_requests",
+    "Requests per vLLM endpoint by result (ok, timeout, transport_error, http_<status>)",
+    labelnames=["endpoint", "result"],
+)
+UPSTREAM_RETRIES = Counter("llm_upstream_retries", "Calls retried on another vLLM endpoint")
+UPSTREAM_PANIC = Counter(
+    "llm_upstream_panic", "Calls sent to an ejected or unhealthy endpoint because no other was available"
+)
+
+# Worth another replica: nothing was generated, or the replica is overloaded/broken.
+_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class UpstreamUnavailable(Exception):
+    """Every replica this call may try failed with a retryable error (overload, 5xx, no connection)."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("No LLM endpoint available")
+        self.retry_after = retry_after
+
+
+def _result_of(exc: BaseException | None) -> str:
+    if exc is None:
+        return "ok"
+    if isinstance(exc, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(exc, httpx.HTTPStatusError):
+        return f"http_{exc.response.status_code}"
+    if isinstance(exc, httpx.TransportError):
+        return "transport_error"
+    return "error"
+
+
+def _retryable(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in _RETRYABLE_STATUS
+    return isinstance(exc, httpx.TransportError)
+
+
+class Endpoint:
+    """One vLLM replica: in-flight count, latency EWMA, health and circuit state."""
+
+    def __init__(self, url: str) -> None:
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.latency: float | None = None
+        self.failures = 0  # consecutive
+        self.healthy = True  # False after unhealthy_after consecutive failed probes
+        self.probe_failures = 0  # consecutive
+        self.open_until = 0.0  # circuit open (ejected) until this monotonic time
+        self.trial = False  # a half-open trial request is in flight
+
+    def available(self, now: float) -> bool:
+        if not self.healthy:
+            return False
+        if self.open_until == 0.0:
+            return True
+        return now >= self.open_until and not self.trial  # half-open: one trial at a time
+
+    def badness(self, now: float) -> tuple:
+        """Sort key for panic routing: healthy first, then the circuit closest to closing."""
+        return (not self.healthy, max(0.0, self.open_until - now), self.outstanding)
+
+
+class LLMBalancer:
+    """Spread completions over vLLM replicas and route around failing ones.
+
+    Picks by power-of-two-choices (or least outstanding requests) among endpoints
+    that passed their last ``/health`` probe and whose circuit is closed. A circuit
+    opens for ``open_seconds`` after ``failure_threshold`` consecutive errors, or when
+    a replica's latency EWMA exceeds ``latency_factor`` times the median of its peers;
+    afterwards a single trial request decides whether it closes again. Failed calls
+    that produced nothing are retried on another replica up to ``retries`` times.
+
+    A replica is only marked unhealthy after ``unhealthy_after`` consecutive failed
+    probes. When no replica is available the balancer panics and sends the request
+    to the least-bad one instead of failing it, because ejecting every replica
+    (including the only one) would turn a brief overload into an outage.
+    """
+
+    def __init__(
+        self,
+        urls: list[str],
+        strategy: str = "p2c",
+        failure_threshold: int = 3,
+        open_seconds: float = 30.0,
+        latency_factor: float = 3.0,
+        retries: int = 1,
+        unhealthy_after: int = 3,
+    ) -> None:
+        self.endpoints = [Endpoint(u) for u in urls]
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.latency_factor = latency_factor
+        self.retries = retries
+        self.unhealthy_after = unhealthy_after
+        self._probe_task: asyncio.Task | None = None
+
+    def _load(self, ep: Endpoint) -> tuple[int, float]:
+        return (ep.outstanding, ep.latency or 0.0)
+
+    def pick(self, exclude: list[Endpoint] = ()) -> Endpoint:
+        now = time.monotonic()
+        remaining = [ep for ep in self.endpoints if ep not in exclude]
+        if not remaining:
+            raise UpstreamUnavailable(self._retry_after())
+        candidates = [ep for ep in remaining if ep.available(now)]
+        if not candidates:
+            UPSTREAM_PANIC.inc()
+            return min(remaining, key=lambda ep: ep.badness(now))
+        if self.strategy == "p2c" and len(candidates) > 2:
+            candidates = random.sample(candidates, 2)
+        return min(candidates, key=self._load)
+
+    def _retry_after(self) -> int:
+        # Until the first open circuit closes; a replica that merely failed once may recover sooner.
+        now = time.monotonic()
+        waits = [ep.open_until - now for ep in self.endpoints if ep.open_until > now]
+        return max(1, math.ceil(min(waits, default=1.0)))
+
+    def _give_up(self, tried: list[Endpoint]) -> bool:
+        return len(tried) > self.retries or len(tried) == len(self.endpoints)
+
+    def _open(self, ep: Endpoint, reason: str) -> None:
+        if ep.open_until <= time.monotonic():
+            logger.warning("Ejecting LLM endpoint %s for %.0fs: %s", ep.url, self.open_seconds, reason)
+        ep.open_until = time.monotonic() + self.open_seconds
+
+    def _record(self, ep: Endpoint, latency: float | None, exc: BaseException | None) -> None:
+        UPSTREAM_REQUESTS.labels(ep.url, _result_of(exc)).inc()
+        half_open = ep.trial
+        ep.trial = False
+        if exc is not None:
+            if not _retryable(exc):  # e.g. a 400 for a bad request says nothing about the replica
+                return
+            ep.failures += 1
+            if half_open or ep.failures >= self.failure_threshold:
+                self._open(ep, f"{ep.failures} consecutive errors ({_result_of(exc)})")
+            return
+        ep.failures = 0
+        if half_open:
+            ep.open_until = 0.0
+        if latency is None:
+            return
+        UPSTREAM_SECONDS.labels(ep.url).observe(latency)
+        ep.latency = latency if ep.latency is None else 0.8 * ep.latency + 0.2 * latency
+        peers = [p.latency for p in self.endpoints if p is not ep and p.latency is not None and p.open_until == 0.0]
+        # Only outlier-eject while at least two healthy peers remain to take the load.
+        if len(peers) >= 2 and ep.latency > self.latency_factor * statistics.median(peers):
+            self._open(ep, f"latency {ep.latency:.2f}s vs peers {statistics.median(peers):.2f}s")
+            ep.latency = None
+
+    @asynccontextmanager
+    async def _use(self, ep: Endpoint, timed: bool) -> AsyncIterator[None]:
+        ep.outstanding += 1
+        ep.trial = ep.open_until != 0.0
+        started = time.monotonic()
+        try:
+            yield
+        except BaseException as exc:
+            if isinstance(exc, Exception):
+                self._record(ep, None, exc)
+            else:
+                ep.trial = False
+            raise
+        else:
+            self._record(ep, time.monotonic() - started if timed else None, None)
+        finally:
+            ep.outstanding -= 1
+
+    async def call(self, fn: Callable[[str], Awaitable[T]]) -> T:
+        """Run ``fn(base_url)`` on a picked endpoint, retrying retryable failures elsewhere."""
+        tried: list[Endpoint] = []
+        while True:
+            ep = self.pick(tried)
+            try:
+                async with self._use(ep, timed=True):
+                    return await fn(ep.url)
+            except Exception as exc:
+                tried.append(ep)
+                if not _retryable(exc):
+                    raise
+                if self._give_up(tried):
+                    raise UpstreamUnavailable(self._retry_after()) from exc
+                UPSTREAM_RETRIES.inc()
+
+    async def stream(self, fn: Callable[[str], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """Like ``call`` for streams; a stream is only retried if it failed before its first item."""
+        tried: list[Endpoint] = []
+        while True:
+            ep = self.pick(tried)
+            started = False
+            try:
+                async with self._use(ep, timed=False):
+                    async for item in fn(ep.url):
+                        started = True
+                        yield item
+                return
+            except Exception as exc:
+                tried.append(ep)
+                if started or not _retryable(exc):
+                    raise
+                if self._give_up(tried):
+                    raise UpstreamUnavailable(self._retry_after()) from exc
+                UPSTREAM_RETRIES.inc()
+
+    async def _probe(self, ep: Endpoint, timeout: float) -> None:
+        client = get_llm_http_pool().client_for(ep.url)
+        try:
+            resp = await client.get(f"{ep.url}/health", timeout=timeout)
+            ok = resp.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        # One slow or failed probe (e.g. a GC pause or a saturated replica) is not enough.
+        ep.probe_failures = 0 if ok else ep.probe_failures + 1
+        healthy = ok or (ep.healthy and ep.probe_failures < self.unhealthy_after)
+        if healthy != ep.healthy:
+            logger.warning("LLM endpoint %s is %s", ep.url, "healthy" if healthy else "failing health checks")
+        ep.healthy = healthy
+
+    async def _probe_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.gather(*(self._probe(ep, min(interval, 2.0)) for ep in self.endpoints))
+            await asyncio.sleep(interval)
+
+    def start_probing(self, interval: float) -> None:
+        if self._probe_task is None and interval > 0:
+            self._probe_task = asyncio.get_running_loop().create_task(self._probe_loop(interval))
+
+    async def aclose(self) -> None:
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+
+
+_balancer: LLMBalancer | None = None
+
+
+def llm_endpoints() -> list[str]:
+    s = get_settings()
+    urls = [u.strip() for u in s.vllm_base_urls.split(",") if u.strip()]
+    return urls or [s.vllm_base_url]
+
+
+def get_llm_balancer() -> LLMBalancer:
+    global _balancer
+    if _balancer is None:
+        s = get_settings()
+        _balancer = LLMBalancer(
+            llm_endpoints(),
+            strategy=s.llm_balancer_strategy,
+            failure_threshold=s.llm_circuit_failure_threshold,
+            open_seconds=s.llm_circuit_open_seconds,
+            latency_factor=s.llm_eject_latency_factor,
+            retries=s.llm_retry_other_replica,
+            unhealthy_after=s.llm_health_check_failures,
+        )
+    return _balancer
+
+
+def start_llm_balancer() -> None:
+    """Create the balancer and start active health probing (call from a running loop)."""
+    get_llm_balancer().start_probing(get_settings().llm_health_check_interval_seconds)
+
+
+async def close_llm_balancer() -> None:
+    global _balancer
+    if _balancer is not None:
+        await _balancer.aclose()
+        _balancer = None
+
+
+class _BalancerCollector(Collector):
+    def collect(self):
+        outstanding = GaugeMetricFamily(
+            "llm_upstream_outstanding", "Requests in flight per vLLM endpoint", labels=["endpoint"]
+        )
+        available = GaugeMetricFamily(
+            "llm_upstream_available", "1 if the endpoint is healthy and its circuit is not open", labels=["endpoint"]
+        )
+        latency = GaugeMetricFamily(
+            "llm_upstream_latency_ewma_seconds", "Latency EWMA used for outlier ejection", labels=["endpoint"]
+        )
+        if _balancer is not None:
+            now = time.monotonic()
+            for ep in _balancer.endpoints:
+                outstanding.add_metric([ep.url], ep.outstanding)
+                available.add_metric([ep.url], 1 if ep.healthy and ep.open_until <= now else 0)
+                if ep.latency is not None:
+                    latency.add_metric([ep.url], ep.latency)
+        yield outstanding
+        yield available
+        yield latency
+
+
+REGISTRY.register(_BalancerCollector())
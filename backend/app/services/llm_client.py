@@ -1,10 +1,19 @@
+import hashlib
+import json
 import re
+import time
+from typing import AsyncIterator
 
-import httpx
 from app.core.config import get_settings
+from app.core.metrics import observe_stage, timed_stage
+from app.core.singleflight import get_singleflight
+from app.core.tracing import set_span_attributes, traced
+from app.services.admission import llm_slot
 from app.schemas.case import CaseInput, CaseAnalysisResponse
 from app.schemas.note import NoteInput, NoteSummaryResponse
 from app.core.admin_settings import load_admin_settings
+from app.services.http_pool import get_llm_http_pool
+from app.services.llm_balancer import get_llm_balancer
 
 
 def _strip_think(content: str) -> str:
@@ -12,38 +21,170 @@ def _strip_think(content: str) -> str:
     return re.sub(r"<think>[\s\S]*?</think>", "", content).strip()
 
 
+class _ThinkStripper:
+    """Incremental counterpart of ``_strip_think`` for streamed deltas.
+
+    Holds back any suffix that could be the start of a ``<think>``/``</think>`` tag
+    until the next delta disambiguates it, and drops leading whitespace.
+    """
+
+    _OPEN = "<think>"
+    _CLOSE = "</think>"
+
+    def __init__(self) -> None:
+        self._buf = ""
+        self._in_think = False
+        self._started = False
+
+    def feed(self, delta: str) -> str:
+        self._buf += delta
+        out: list[str] = []
+        while self._buf:
+            tag = self._CLOSE if self._in_think else self._OPEN
+            idx = self._buf.find(tag)
+            if idx >= 0:
+                if not self._in_think:
+                    out.append(self._buf[:idx])
+                self._buf = self._buf[idx + len(tag):]
+                self._in_think = not self._in_think
+                continue
+            keep = self._partial_tag_len(tag)
+            if not self._in_think:
+                out.append(self._buf[: len(self._buf) - keep])
+            self._buf = self._buf[len(self._buf) - keep:]
+            break
+        return self._emit("".join(out))
+
+    def flush(self) -> str:
+        rest = "" if self._in_think else self._buf
+        self._buf = ""
+        return self._emit(rest)
+
+    def _partial_tag_len(self, tag: str) -> int:
+        for n in range(min(len(tag) - 1, len(self._buf)), 0, -1):
+            if self._buf.endswith(tag[:n]):
+                return n
+        return 0
+
+    def _emit(self, text: str) -> str:
+        if not self._started:
+            text = text.lstrip()
+            self._started = bool(text)
+        return text
+
+
 class LLMClient:
     def __init__(self):
         self.s = get_settings()
 
-    async def _chat(self, messages: list[dict]) -> str:
-        async with httpx.AsyncClient(timeout=120.0) as client:
+    def _request_body(self, messages: list[dict], stream: bool = False) -> dict:
+        body = {
+            "model": self.s.vllm_model,
+            "messages": messages,
+            "temperature": 0.2,
+            "max_tokens": 768,
+        }
+        if stream:
+            body["stream"] = True
+        return body
+
+    @traced("llm.chat")
+    async def _chat(self, messages: list[dict], tenant_id: str | None = None, priority: str = "standard") -> str:
+        """Completion text; identical concurrent requests share one upstream call.
+
+        The upstream call waits for an admission slot (see ``app.services.admission``)
+        and raises ``AdmissionRejected`` when the queue for it is full.
+        """
+        set_span_attributes(model=self.s.vllm_model, tenant_id=tenant_id, priority=priority)
+        flight = get_singleflight("llm_chat")
+        if flight is None:
+            return await self._post_chat(messages, tenant_id, priority)
+        fingerprint = hashlib.sha256(
+            json.dumps(self._request_body(messages), sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        return await flight.do(fingerprint, lambda: self._post_chat(messages, tenant_id, priority))
+
+    async def _post_chat(self, messages: list[dict], tenant_id: str | None, priority: str) -> str:
+        async with llm_slot(tenant_id, priority):
+            with timed_stage("llm_total", self.s.vllm_model):
+                return await get_llm_balancer().call(lambda base_url: self._complete(base_url, messages))
+
+    async def _complete(self, base_url: str, messages: list[dict]) -> str:
+        url = f"{base_url}/v1/chat/completions"
+        async with get_llm_http_pool().request(url) as client:
             resp = await client.post(
-                f"{self.s.vllm_base_url}/v1/chat/completions",
+                url,
                 headers={"Authorization": f"Bearer {self.s.vllm_api_key}"},
-                json={
-                    "model": self.s.vllm_model,
-                    "messages": messages,
-                    "temperature": 0.2,
-                    "max_tokens": 768,
-                },
+                json=self._request_body(messages),
             )
             resp.raise_for_status()
             data = resp.json()
             raw = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-            return _strip_think(raw)
+            with timed_stage("strip_think", self.s.vllm_model):
+                return _strip_think(raw)
 
-    async def analyze_case(self, case: CaseInput, contexts: list[str]) -> CaseAnalysisResponse:
-        system_prompt = load_admin_settings()["system_prompt"]
-        prompt = (
-            f"{system_prompt}\n\nContext:\n" + "\n".join(contexts) +
-            "\n\nPatient details:" 
-            f" Age: {case.patient_age}, Sex: {case.sex}, Symptoms: {', '.join(case.symptoms)}."
-        )
-        content = await self._chat([
+    async def _chat_stream(
+        self, messages: list[dict], tenant_id: str | None = None, priority: str = "standard"
+    ) -> AsyncIterator[str]:
+        """Stream completion deltas with ``<think>`` blocks removed; holds an admission slot throughout."""
+        async with llm_slot(tenant_id, priority):
+            async for text in get_llm_balancer().stream(lambda base_url: self._stream(base_url, messages)):
+                yield text
+
+    async def _stream(self, base_url: str, messages: list[dict]) -> AsyncIterator[str]:
+        url = f"{base_url}/v1/chat/completions"
+        model = self.s.vllm_model
+        stripper = _ThinkStripper()
+        started = time.perf_counter()
+        first = True
+        strip_seconds = 0.0
+        async with get_llm_http_pool().request(url) as client:
+            async with client.stream(
+                "POST",
+                url,
+                headers={"Authorization": f"Bearer {self.s.vllm_api_key}"},
+                json=self._request_body(messages, stream=True),
+            ) as resp:
+                resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    choice = (json.loads(data).get("choices") or [{}])[0]
+                    delta = (choice.get("delta") or {}).get("content") or ""
+                    if delta and first:
+                        observe_stage("llm_ttft", time.perf_counter() - started, model)
+                        first = False
+                    t0 = time.perf_counter()
+                    text = stripper.feed(delta)
+                    strip_seconds += time.perf_counter() - t0
+                    if text:
+                        yield text
+        tail = stripper.flush()
+        observe_stage("llm_total", time.perf_counter() - started, model)
+        observe_stage("strip_think", strip_seconds, model)
+        if tail:
+            yield tail
+
+    def case_messages(self, case: CaseInput, contexts: list[str]) -> list[dict]:
+        with timed_stage("prompt_assembly"):
+            system_prompt = load_admin_settings()["system_prompt"]
+            prompt = (
+                f"{system_prompt}\n\nContext:\n" + "\n".join(contexts) +
+                "\n\nPatient details:" 
+                f" Age: {case.patient_age}, Sex: {case.sex}, Symptoms: {', '.join(case.symptoms)}."
+            )
+        return [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": prompt},
-        ])
+        ]
+
+    async def analyze_case(
+        self, case: CaseInput, contexts: list[str], tenant_id: str | None = None, priority: str = "standard"
+    ) -> CaseAnalysisResponse:
+        content = await self._chat(self.case_messages(case, contexts), tenant_id, priority)
         return CaseAnalysisResponse(
             summary=content,
             differentials=[],
@@ -52,13 +193,23 @@ class LLMClient:
             disclaimer="This is not medical advice. Consult a qualified clinician.",
         )
 
-    async def summarize_notes(self, note: NoteInput) -> NoteSummaryResponse:
+    async def summarize_notes(self, note: NoteInput, tenant_id: str | None = None) -> NoteSummaryResponse:
         system_prompt = load_admin_settings()["system_prompt"]
         content = await self._chat([
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": f"Summarize clinically: {note.text}"},
-        ])
+        ], tenant_id)
         return NoteSummaryResponse(
             summary=content,
             disclaimer="This is not medical advice. Consult a qualified clinician.",
         )
+
+
+_client: LLMClient | None = None
+
+
+def get_llm_client() -> LLMClient:
+    global _client
+    if _client is None:
+        _client = LLMClient()
+    return _client
@@ -1,81 +1,327 @@
-from typing import Iterable
+from __future__ import annotations
 
-from qdrant_client import QdrantClient
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.http import models as qmodels
 
 from app.core.config import get_settings
+from app.core.tracing import set_span_attributes, traced
+from app.services.qdrant_profiles import CollectionProfile, collection_params, get_profile, search_params, vector_params
+
+if TYPE_CHECKING:
+    from app.services.embeddings import SparseVector
+
 
+logger = logging.getLogger(__name__)
+
+DENSE_VECTOR = "dense"
+SPARSE_VECTOR = "sparse"
 
 _client: QdrantClient | None = None
+_async_client: AsyncQdrantClient | None = None
+_async_ready = False
+_async_lock = asyncio.Lock()
+
+
+@dataclass(frozen=True)
+class _Layout:
+    dense: str | None  # None for the original single unnamed vector
+    sparse: bool
+
+
+_layouts: dict[str, _Layout] = {}
+
+
+def _collection_config(vector_size: int, profile: CollectionProfile | None = None, hybrid: bool | None = None) -> dict:
+    """Hybrid mode creates named dense + sparse vectors; dense mode keeps the unnamed vector.
+
+    Storage (quantization, on-disk vectors, HNSW graph) follows ``profile``, by default
+    the one selected by ``qdrant_profile``.
+    """
+    profile = profile or get_profile()
+    if hybrid is None:
+        hybrid = get_settings().retrieval_mode == "hybrid"
+    dense = vector_params(vector_size, profile)
+    if not hybrid:
+        return {"vectors_config": dense, **collection_params(profile)}
+    sparse = qmodels.SparseVectorParams(index=qmodels.SparseIndexParams(on_disk=profile.on_disk))
+    return {
+        "vectors_config": {DENSE_VECTOR: dense},
+        "sparse_vectors_config": {SPARSE_VECTOR: sparse},
+        **collection_params(profile),
+    }
+
+
+def _layout_of(info: qmodels.CollectionInfo) -> _Layout:
+    params = info.config.params
+    return _Layout(
+        dense=DENSE_VECTOR if isinstance(params.vectors, dict) else None,
+        sparse=SPARSE_VECTOR in (params.sparse_vectors or {}),
+    )
+
+
+async def _layout(client: AsyncQdrantClient, collection: str) -> _Layout:
+    layout = _layouts.get(collection)
+    if layout is None:
+        layout = _layouts[collection] = _layout_of(await client.get_collection(collection))
+    return layout
+
+
+def _local_location(location: str) -> dict:
+    return {"location": location} if location == ":memory:" else {"path": location}
 
 
 def get_qdrant() -> QdrantClient:
+    """Synchronous client for scripts; request handlers use ``get_async_qdrant``."""
     global _client
     if _client is None:
         s = get_settings()
-        _client = QdrantClient(host=s.qdrant_host, port=s.qdrant_port)
+        if s.qdrant_location:
+            _client = QdrantClient(**_local_location(s.qdrant_location))
+        else:
+            _client = QdrantClient(host=s.qdrant_host, port=s.qdrant_port, timeout=s.qdrant_timeout)
         _ensure_collection(_client, s.qdrant_collection, s.embeddings_dim)
     return _client
 
 
+def _initial_collection(alias: str) -> str:
+    """Physical collection a new deployment serves ``alias`` from.
+
+    New collections are created behind an alias from the start, so
+    ``scripts.migrate_collection`` can later swap them without deleting anything.
+    """
+    return f"{alias}__{get_settings().qdrant_profile}_initial"
+
+
+def _alias_operation(collection_name: str, alias: str) -> qmodels.CreateAliasOperation:
+    return qmodels.CreateAliasOperation(
+        create_alias=qmodels.CreateAlias(collection_name=collection_name, alias_name=alias)
+    )
+
+
 def _ensure_collection(client: QdrantClient, collection_name: str, vector_size: int) -> None:
     existing = [c.name for c in client.get_collections().collections]
+    existing += [a.alias_name for a in client.get_aliases().aliases]
     if collection_name in existing:
         return
-    client.recreate_collection(
-        collection_name=collection_name,
-        vectors_config=qmodels.VectorParams(size=vector_size, distance=qmodels.Distance.COSINE),
-    )
+    physical = _initial_collection(collection_name)
+    if physical not in existing:
+        client.create_collection(collection_name=physical, **_collection_config(vector_size))
+    client.update_collection_aliases(change_aliases_operations=[_alias_operation(physical, collection_name)])
+
+
+def init_async_qdrant() -> AsyncQdrantClient:
+    """Create the shared async client; connections are opened on first use."""
+    global _async_client
+    if _async_client is None:
+        s = get_settings()
+        if s.qdrant_location:
+            _async_client = AsyncQdrantClient(**_local_location(s.qdrant_location))
+            return _async_client
+        _async_client = AsyncQdrantClient(
+            host=s.qdrant_host,
+            port=s.qdrant_port,
+            grpc_port=s.qdrant_grpc_port,
+            prefer_grpc=s.qdrant_prefer_grpc,
+            timeout=s.qdrant_timeout,
+        )
+    return _async_client
+
+
+async def get_async_qdrant() -> AsyncQdrantClient:
+    global _async_ready
+    client = init_async_qdrant()
+    if not _async_ready:
+        async with _async_lock:
+            if not _async_ready:
+                s = get_settings()
+                await _ensure_collection_async(client, s.qdrant_collection, s.embeddings_dim)
+                _async_ready = True
+    return client
+
+
+async def close_async_qdrant() -> None:
+    global _async_client, _async_ready
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+        _async_ready = False
+        _layouts.clear()
+
+
+_PAYLOAD_INDEXES: dict[str, qmodels.PayloadSchemaType | qmodels.KeywordIndexParams] = {
+    # is_tenant co-locates each tenant's points on disk, so the filter every search applies stays cheap.
+    "tenant_id": qmodels.KeywordIndexParams(type=qmodels.KeywordIndexType.KEYWORD, is_tenant=True),
+    "document_id": qmodels.PayloadSchemaType.KEYWORD,
+}
+
 
+def _index_matches(current: qmodels.PayloadIndexInfo, schema) -> bool:
+    if isinstance(schema, qmodels.PayloadSchemaType):
+        return current.data_type == schema
+    wanted = schema.model_dump(mode="json", exclude_none=True)
+    if current.data_type != wanted.pop("type"):
+        return False
+    have = current.params.model_dump(mode="json", exclude_none=True) if current.params is not None else {}
+    return all(have.get(key) == value for key, value in wanted.items())
 
-def upsert_text_points(
+
+async def ensure_payload_indexes(client: AsyncQdrantClient, collection_name: str) -> None:
+    """Idempotent; also backfills missing indexes and upgrades ones built with an older schema.
+
+    A ``tenant_id`` keyword index from before ``is_tenant`` existed is dropped and
+    rebuilt; filters stay correct (just unindexed) while it rebuilds.
+    """
+    info = await client.get_collection(collection_name)
+    current = info.payload_schema or {}
+    for field, schema in _PAYLOAD_INDEXES.items():
+        if field in current:
+            if _index_matches(current[field], schema):
+                continue
+            logger.warning("Rebuilding payload index %s.%s with schema %s", collection_name, field, schema)
+            await client.delete_payload_index(collection_name, field_name=field, wait=True)
+        await client.create_payload_index(collection_name, field_name=field, field_schema=schema, wait=True)
+
+
+async def _exists(client: AsyncQdrantClient, name: str) -> bool:
+    """True for a collection or an alias (``scripts.migrate_collection`` serves collections via aliases)."""
+    if await client.collection_exists(name):
+        return True
+    return any(a.alias_name == name for a in (await client.get_aliases()).aliases)
+
+
+async def _ensure_collection_async(client: AsyncQdrantClient, collection_name: str, vector_size: int) -> None:
+    if not await _exists(client, collection_name):
+        physical = _initial_collection(collection_name)
+        if not await client.collection_exists(physical):
+            await client.create_collection(collection_name=physical, **_collection_config(vector_size))
+        try:
+            await client.update_collection_aliases(
+                change_aliases_operations=[_alias_operation(physical, collection_name)]
+            )
+        except Exception:
+            # Another process starting at the same time may have created the alias first.
+            if not await _exists(client, collection_name):
+                raise
+    await ensure_payload_indexes(client, collection_name)
+    _layouts[collection_name] = layout = _layout_of(await client.get_collection(collection_name))
+    if get_settings().retrieval_mode == "hybrid" and not layout.sparse:
+        logger.warning(
+            "Collection %s has no sparse vectors; hybrid retrieval falls back to dense until it is recreated",
+            collection_name,
+        )
+
+
+async def upsert_text_points(
     collection: str,
+    ids: list[str],
     vectors: list[list[float]],
-    texts: list[str],
-    tenant_id: str,
-    title: str,
-    source: str | None = None,
+    payloads: list[dict],
+    sparse: list[SparseVector] | None = None,
 ) -> None:
-    client = get_qdrant()
-    points: list[qmodels.PointStruct] = []
-    for idx, (vec, text) in enumerate(zip(vectors, texts)):
-        payload = {
-            "tenant_id": tenant_id,
-            "title": title,
-            "source": source,
-            "text": text,
-        }
-        points.append(
-            qmodels.PointStruct(
-                id=idx,
-                vector=vec,
-                payload=payload,
-            )
-        )
+    """Upsert one batch of chunk points; ``ids`` are stable per (document, chunk content)."""
+    client = await get_async_qdrant()
+    layout = await _layout(client, collection)
+
+    def vector(i: int, dense: list[float]):
+        if layout.dense is None:
+            return dense
+        named = {layout.dense: dense}
+        if sparse is not None and layout.sparse:
+            named[SPARSE_VECTOR] = qmodels.SparseVector(indices=sparse[i].indices, values=sparse[i].values)
+        return named
+
+    points = [
+        qmodels.PointStruct(id=point_id, vector=vector(i, vec), payload=payload)
+        for i, (point_id, vec, payload) in enumerate(zip(ids, vectors, payloads))
+    ]
     if points:
-        client.upsert(
-            collection_name=collection,
-            points=points,
-        )
+        await client.upsert(collection_name=collection, points=points, wait=True)
+
+
+def _document_filter(tenant_id: str, document_id: str, keep_ids: list[str] | None = None) -> qmodels.Filter:
+    return qmodels.Filter(
+        must=[
+            qmodels.FieldCondition(key="tenant_id", match=qmodels.MatchValue(value=tenant_id)),
+            qmodels.FieldCondition(key="document_id", match=qmodels.MatchValue(value=document_id)),
+        ],
+        must_not=[qmodels.HasIdCondition(has_id=keep_ids)] if keep_ids else None,
+    )
+
+
+async def delete_document_points(
+    collection: str,
+    tenant_id: str,
+    document_id: str,
+    keep_ids: list[str] | None = None,
+) -> None:
+    """Delete a document's points, except ``keep_ids`` (the chunks of its current version)."""
+    client = await get_async_qdrant()
+    await client.delete(
+        collection_name=collection,
+        points_selector=qmodels.FilterSelector(filter=_document_filter(tenant_id, document_id, keep_ids)),
+    )
 
 
-def search_similar_texts(
+async def set_document_payload(collection: str, tenant_id: str, document_id: str, payload: dict) -> None:
+    client = await get_async_qdrant()
+    await client.set_payload(
+        collection_name=collection,
+        payload=payload,
+        points=_document_filter(tenant_id, document_id),
+    )
+
+
+@traced("qdrant.search_similar_texts")
+async def search_similar_texts(
     collection: str,
     query_vector: list[float],
     tenant_id: str,
     limit: int = 5,
+    sparse_vector: SparseVector | None = None,
+    prefetch: int | None = None,
 ) -> list[str]:
-    client = get_qdrant()
-    results = client.search(
-        collection_name=collection,
-        query_vector=query_vector,
-        limit=limit,
-        query_filter=qmodels.Filter(
-            must=[qmodels.FieldCondition(key="tenant_id", match=qmodels.MatchValue(value=tenant_id))]
-        ),
+    """Dense search, or dense + sparse fused with reciprocal-rank fusion when ``sparse_vector`` is given."""
+    set_span_attributes(collection=collection, limit=limit, hybrid=sparse_vector is not None)
+    client = await get_async_qdrant()
+    layout = await _layout(client, collection)
+    tenant_filter = qmodels.Filter(
+        must=[qmodels.FieldCondition(key="tenant_id", match=qmodels.MatchValue(value=tenant_id))]
     )
+    params = search_params(get_profile())
+    if sparse_vector is not None and layout.sparse:
+        candidates = max(limit, prefetch or limit)
+        response = await client.query_points(
+            collection_name=collection,
+            prefetch=[
+                qmodels.Prefetch(
+                    query=query_vector, using=layout.dense, limit=candidates, filter=tenant_filter, params=params
+                ),
+                qmodels.Prefetch(
+                    query=qmodels.SparseVector(indices=sparse_vector.indices, values=sparse_vector.values),
+                    using=SPARSE_VECTOR,
+                    limit=candidates,
+                    filter=tenant_filter,
+                ),
+            ],
+            query=qmodels.FusionQuery(fusion=qmodels.Fusion.RRF),
+            limit=limit,
+        )
+    else:
+        response = await client.query_points(
+            collection_name=collection,
+            query=query_vector,
+            using=layout.dense,
+            query_filter=tenant_filter,
+            search_params=params,
+            limit=limit,
+        )
     texts: list[str] = []
-    for r in results:
+    for r in response.points:
         payload = r.payload or {}
         text = payload.get("text")
         if isinstance(text, str):
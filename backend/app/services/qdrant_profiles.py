@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+
+from qdrant_client.http import models as qmodels
+
+from app.core.config import get_settings
+
+
+@dataclass(frozen=True)
+class CollectionProfile:
+    """Storage and search parameters for the guidelines collection.
+
+    ``quantization`` keeps a compressed copy of every vector in RAM for the HNSW
+    search; with ``on_disk`` the float32 originals live on disk and are read only
+    to rescore the ``oversampling * limit`` best candidates.
+    """
+
+    name: str
+    quantization: str = "none"  # "none" | "int8" | "binary"
+    on_disk: bool = False
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    hnsw_ef: int | None = None  # per-query beam width; None uses Qdrant's default
+    oversampling: float = 1.0
+    rescore: bool = True
+
+
+PROFILES: dict[str, CollectionProfile] = {
+    # Plain float32 HNSW in RAM (what the collection used before profiles existed).
+    "default": CollectionProfile("default"),
+    # ~4x less RAM for vectors; recall close to float32 with rescoring.
+    "int8": CollectionProfile("int8", quantization="int8", on_disk=True, hnsw_ef=128, oversampling=2.0),
+    # ~32x less RAM for vectors; needs heavier oversampling to recover recall.
+    "binary": CollectionProfile("binary", quantization="binary", on_disk=True, hnsw_ef=128, oversampling=3.0),
+    # Higher-connectivity graph for recall-sensitive deployments that can afford the RAM.
+    "high_recall": CollectionProfile("high_recall", hnsw_m=32, hnsw_ef_construct=256, hnsw_ef=256),
+}
+
+
+def get_profile(name: str | None = None) -> CollectionProfile:
+    """Named profile (default: ``qdrant_profile``) with any ``qdrant_hnsw_*`` / ``qdrant_on_disk`` overrides applied."""
+    s = get_settings()
+    name = name or s.qdrant_profile
+    try:
+        profile = PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown Qdrant profile {name!r}; expected one of {sorted(PROFILES)}") from None
+    overrides = {
+        "hnsw_m": s.qdrant_hnsw_m,
+        "hnsw_ef_construct": s.qdrant_hnsw_ef_construct,
+        "hnsw_ef": s.qdrant_hnsw_ef,
+        "on_disk": s.qdrant_on_disk,
+    }
+    return replace(profile, **{k: v for k, v in overrides.items() if v is not None})
+
+
+def vector_params(size: int, profile: CollectionProfile) -> qmodels.VectorParams:
+    return qmodels.VectorParams(size=size, distance=qmodels.Distance.COSINE, on_disk=profile.on_disk or None)
+
+
+def collection_params(profile: CollectionProfile) -> dict:
+    """``create_collection`` keyword arguments other than the vector configs."""
+    params: dict = {
+        "hnsw_config": qmodels.HnswConfigDiff(m=profile.hnsw_m, ef_construct=profile.hnsw_ef_construct),
+    }
+    if profile.quantization == "int8":
+        params["quantization_config"] = qmodels.ScalarQuantization(
+            scalar=qmodels.ScalarQuantizationConfig(type=qmodels.ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    elif profile.quantization == "binary":
+        params["quantization_config"] = qmodels.BinaryQuantization(
+            binary=qmodels.BinaryQuantizationConfig(always_ram=True)
+        )
+    return params
+
+
+def search_params(profile: CollectionProfile) -> qmodels.SearchParams | None:
+    quantization = None
+    if profile.quantization != "none":
+        quantization = qmodels.QuantizationSearchParams(rescore=profile.rescore, oversampling=profile.oversampling)
+    if profile.hnsw_ef is None and quantization is None:
+        return None
+    return qmodels.SearchParams(hnsw_ef=profile.hnsw_ef, quantization=quantization)
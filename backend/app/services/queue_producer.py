@@ -1,21 +1,160 @@
+from __future__ import annotations
+
 import asyncio
+import json
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Iterable
+
 import aio_pika
+from aio_pika.abc import AbstractChannel, AbstractQueue, AbstractRobustConnection
+from aio_pika.pool import Pool
+
 from app.core.config import get_settings
+from app.core.tracing import inject_trace_headers, span
 
-async def publish_analyze_job(payload: dict):
-    s = get_settings()
-    connection = await aio_pika.connect_robust(
-        host=s.rabbitmq_host,
-        port=s.rabbitmq_port,
-        login=s.rabbitmq_user,
-        password=s.rabbitmq_pass,
+
+logger = logging.getLogger(__name__)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (uuid.UUID, datetime)):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode_message(payload: dict, headers: dict | None = None) -> aio_pika.Message:
+    return aio_pika.Message(
+        body=json.dumps(payload, ensure_ascii=False, default=_json_default).encode("utf-8"),
+        content_type="application/json",
+        content_encoding="utf-8",
+        delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+        message_id=str(uuid.uuid4()),
+        timestamp=datetime.now(timezone.utc),
+        headers=headers or {},
     )
-    async with connection:
-        channel = await connection.channel()
-        exchange = await channel.declare_exchange(s.rabbitmq_exchange, aio_pika.ExchangeType.TOPIC, durable=True)
-        queue = await channel.declare_queue(s.rabbitmq_queue_analyze, durable=True)
-        await queue.bind(exchange, routing_key=s.rabbitmq_queue_analyze)
-        await exchange.publish(
-            aio_pika.Message(body=str(payload).encode("utf-8")),
-            routing_key=s.rabbitmq_queue_analyze,
-        )
+
+
+async def declare_topology(channel: AbstractChannel) -> AbstractQueue:
+    """Declare the job exchange, the analyze queue and its dead-letter queue."""
+    s = get_settings()
+    exchange = await channel.declare_exchange(s.rabbitmq_exchange, aio_pika.ExchangeType.TOPIC, durable=True)
+    queue = await channel.declare_queue(s.rabbitmq_queue_analyze, durable=True)
+    await queue.bind(exchange, routing_key=s.rabbitmq_queue_analyze)
+    await channel.declare_queue(s.rabbitmq_queue_analyze_dlq, durable=True)
+    return queue
+
+
+class QueueProducer:
+    """Long-lived RabbitMQ publisher with a channel pool and publisher confirms.
+
+    The exchange, queue and binding are declared once per connection; every
+    publish afterwards only borrows a confirm-mode channel from the pool.
+    """
+
+    def __init__(self) -> None:
+        self.s = get_settings()
+        self._connection: AbstractRobustConnection | None = None
+        self._channels: Pool[AbstractChannel] | None = None
+        self._lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        if self._channels is not None:
+            return
+        async with self._lock:
+            if self._channels is not None:
+                return
+            s = self.s
+            connection = await aio_pika.connect_robust(
+                host=s.rabbitmq_host,
+                port=s.rabbitmq_port,
+                login=s.rabbitmq_user,
+                password=s.rabbitmq_pass,
+                timeout=s.rabbitmq_connect_timeout,
+            )
+            try:
+                channel = await connection.channel()
+                await declare_topology(channel)
+                await channel.close()
+            except BaseException:
+                await connection.close()
+                raise
+            self._connection = connection
+            self._channels = Pool(self._new_channel, max_size=s.rabbitmq_channel_pool_size)
+
+    async def _new_channel(self) -> AbstractChannel:
+        return await self._connection.channel(publisher_confirms=True)
+
+    async def publish(self, payload: dict, routing_key: str | None = None, headers: dict | None = None) -> None:
+        await self.publish_many([payload], routing_key=routing_key, headers=headers)
+
+    async def publish_many(
+        self,
+        payloads: Iterable[dict],
+        routing_key: str | None = None,
+        headers: dict | None = None,
+    ) -> int:
+        """Publish ``payloads`` and wait until the broker has confirmed all of them.
+
+        Messages are sent in windows of ``rabbitmq_confirm_batch_size`` without
+        awaiting each confirm individually, so the broker can ack them in bulk.
+        """
+        await self.start()
+        s = self.s
+        routing_key = routing_key or s.rabbitmq_queue_analyze
+        messages = [encode_message(p, headers) for p in payloads]
+        batch = max(1, s.rabbitmq_confirm_batch_size)
+        async with self._channels.acquire() as channel:
+            exchange = await channel.get_exchange(s.rabbitmq_exchange, ensure=False)
+            for start in range(0, len(messages), batch):
+                await asyncio.gather(
+                    *(
+                        exchange.publish(m, routing_key=routing_key, timeout=s.rabbitmq_publish_timeout)
+                        for m in messages[start:start + batch]
+                    )
+                )
+        return len(messages)
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self._channels is not None:
+                await self._channels.close()
+                self._channels = None
+            if self._connection is not None:
+                await self._connection.close()
+                self._connection = None
+
+
+_producer: QueueProducer | None = None
+
+
+def get_queue_producer() -> QueueProducer:
+    global _producer
+    if _producer is None:
+        _producer = QueueProducer()
+    return _producer
+
+
+async def start_queue_producer() -> None:
+    """Connect at startup; if RabbitMQ is not up yet, the first publish retries."""
+    try:
+        await get_queue_producer().start()
+    except Exception as exc:
+        logger.warning("RabbitMQ producer not started: %s", exc)
+
+
+async def close_queue_producer() -> None:
+    global _producer
+    if _producer is not None:
+        await _producer.close()
+        _producer = None
+
+
+async def publish_analyze_job(payload: dict) -> None:
+    s = get_settings()
+    with span(
+        "queue.publish_analyze_job", kind="producer", queue=s.rabbitmq_queue_analyze, job_id=payload.get("job_id")
+    ):
+        # The worker continues this trace from the traceparent header.
+        await get_queue_producer().publish(payload, headers=inject_trace_headers())
@@ -1,11 +1,14 @@
 from app.schemas.case import CaseInput
 from app.core.config import get_settings
-from app.services.embeddings import embed_texts
+from app.core.metrics import timed_stage
+from app.core.singleflight import get_singleflight
+from app.core.tracing import set_span_attributes, traced
+from app.services.embeddings import embed_hybrid, embed_texts
 from app.services.qdrant_client import search_similar_texts
+from app.services.rerank import get_reranker
 
 
-async def retrieve_context(case: CaseInput, tenant_id: str | None = None) -> list[str]:
-    s = get_settings()
+def case_query_text(case: CaseInput) -> str:
     query_parts: list[str] = []
     query_parts.append(
         f"Age: {case.patient_age}, Sex: {case.sex}, Symptoms: {', '.join(case.symptoms)}"
@@ -14,15 +17,42 @@ async def retrieve_context(case: CaseInput, tenant_id: str | None = None) -> lis
         query_parts.append(f"History: {case.history}")
     if case.medications:
         query_parts.append(f"Medications: {', '.join(case.medications)}")
-    query_text = " | ".join(query_parts)
+    return " | ".join(query_parts)
 
-    vectors = await embed_texts([query_text])
-    query_vec = vectors[0]
-    effective_tenant = tenant_id or s.default_tenant_id
-    texts = search_similar_texts(
-        collection=s.qdrant_collection,
-        query_vector=query_vec,
-        tenant_id=effective_tenant,
-        limit=5,
-    )
+
+@traced("rag.retrieve_context")
+async def retrieve_context(case: CaseInput, tenant_id: str | None = None) -> list[str]:
+    """Guideline chunks for ``case``; concurrent identical retrievals share one search."""
+    effective_tenant = tenant_id or get_settings().default_tenant_id
+    set_span_attributes(tenant_id=effective_tenant)
+    with timed_stage("rag_query_build"):
+        query_text = case_query_text(case)
+    flight = get_singleflight("retrieve_context")
+    if flight is None:
+        return await _retrieve(query_text, effective_tenant)
+    texts = await flight.do(f"{effective_tenant}:{query_text}", lambda: _retrieve(query_text, effective_tenant))
+    return list(texts)
+
+
+async def _retrieve(query_text: str, effective_tenant: str) -> list[str]:
+    s = get_settings()
+
+    sparse_vec = None
+    with timed_stage("embed_query", s.embeddings_model):
+        if s.retrieval_mode == "hybrid":
+            query_vec, sparse_vec = (await embed_hybrid([query_text]))[0]
+        else:
+            query_vec = (await embed_texts([query_text]))[0]
+    with timed_stage("qdrant_search"):
+        texts = await search_similar_texts(
+            collection=s.qdrant_collection,
+            query_vector=query_vec,
+            tenant_id=effective_tenant,
+            limit=s.rerank_candidates if s.rerank_enabled else s.retrieval_top_k,
+            sparse_vector=sparse_vec,
+            prefetch=s.retrieval_hybrid_prefetch,
+        )
+    if s.rerank_enabled:
+        with timed_stage("rerank", s.rerank_model):
+            texts = await get_reranker().rerank(query_text, texts, s.rerank_top_k)
     return texts
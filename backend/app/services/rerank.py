@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from prometheus_client import Counter, Histogram
+from sentence_transformers import CrossEncoder
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+RERANK_OUTCOMES = Counter(
+    "rerank_outcomes",
+    "Rerank attempts by outcome (reranked, timeout, error)",
+    labelnames=["result"],
+)
+RERANK_SECONDS = Histogram(
+    "rerank_seconds",
+    "Wall time of the rerank stage, including cache lookups",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.15, 0.25, 0.5, 1.0),
+)
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class Reranker:
+    """Cross-encoder scoring of (query, chunk) pairs on a small CPU thread pool.
+
+    Uncached pairs are split into ``batch_size`` groups scored in parallel threads.
+    If scoring exceeds ``budget_ms`` the caller keeps the retrieval order. Batches
+    already running finish in the background and still populate the score cache for
+    the next request; batches still queued are cancelled, so timed-out requests do
+    not pile work up behind the pool's unbounded queue.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        budget_ms: float,
+        batch_size: int,
+        threads: int,
+        cache_max_entries: int,
+        cache_ttl_seconds: float,
+    ) -> None:
+        self.model_name = model_name
+        self.budget = budget_ms / 1000
+        self.batch_size = max(1, batch_size)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix="rerank")
+        self._model: CrossEncoder | None = None
+        self._model_lock = threading.Lock()
+        self._scores: TTLCache[tuple[str, str], float] = TTLCache(cache_max_entries, cache_ttl_seconds)
+
+    def _get_model(self) -> CrossEncoder:
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = CrossEncoder(self.model_name, device="cpu")
+        return self._model
+
+    def warm_up(self) -> None:
+        """Load the model in the background so the first request is not spent loading it."""
+        self._executor.submit(self._get_model)
+
+    def _score_batch(self, query: str, query_key: str, texts: list[str]) -> list[float]:
+        scores = self._get_model().predict([(query, t) for t in texts], batch_size=len(texts)).tolist()
+        for text, score in zip(texts, scores):
+            self._scores.set((query_key, _digest(text)), float(score))
+        return scores
+
+    async def _score(self, query: str, texts: list[str]) -> list[float]:
+        query_key = _digest(query)
+        scores: dict[str, float] = {}
+        missing: list[str] = []
+        for text in dict.fromkeys(texts):
+            cached = self._scores.get((query_key, _digest(text)))
+            if cached is None:
+                missing.append(text)
+            else:
+                scores[text] = cached
+        if missing:
+            loop = asyncio.get_running_loop()
+            groups = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+            futures = [loop.run_in_executor(self._executor, self._score_batch, query, query_key, g) for g in groups]
+            for group, group_scores in zip(groups, await asyncio.gather(*futures)):
+                scores.update(zip(group, group_scores))
+        return [scores[t] for t in texts]
+
+    async def rerank(self, query: str, texts: list[str], top_k: int) -> list[str]:
+        """Return the ``top_k`` texts by cross-encoder score, or the first ``top_k`` on timeout."""
+        if len(texts) <= 1:
+            return texts[:top_k]
+        started = time.monotonic()
+        try:
+            # On timeout wait_for cancels the executor futures: queued batches are dropped,
+            # running ones cannot be interrupted and still fill the cache when they finish.
+            scores = await asyncio.wait_for(self._score(query, texts), self.budget)
+        except asyncio.TimeoutError:
+            RERANK_OUTCOMES.labels("timeout").inc()
+            return texts[:top_k]
+        except Exception:
+            logger.exception("Rerank failed; keeping retrieval order")
+            RERANK_OUTCOMES.labels("error").inc()
+            return texts[:top_k]
+        finally:
+            RERANK_SECONDS.observe(time.monotonic() - started)
+        RERANK_OUTCOMES.labels("reranked").inc()
+        order = sorted(range(len(texts)), key=lambda i: scores[i], reverse=True)
+        return [texts[i] for i in order[:top_k]]
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_reranker: Reranker | None = None
+
+
+def get_reranker() -> Reranker:
+    global _reranker
+    if _reranker is None:
+        s = get_settings()
+        _reranker = Reranker(
+            model_name=s.rerank_model,
+            budget_ms=s.rerank_budget_ms,
+            batch_size=s.rerank_batch_size,
+            threads=s.rerank_threads,
+            cache_max_entries=s.rerank_cache_max_entries,
+            cache_ttl_seconds=s.rerank_cache_ttl_seconds,
+        )
+    return _reranker
+
+
+def close_reranker() -> None:
+    global _reranker
+    if _reranker is not None:
+        _reranker.close()
+        _reranker = None
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+from prometheus_client import Counter
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.services.embedding_cache import normalize_text
+from app.services.embeddings import embed_hybrid, embed_texts
+
+
+RESPONSE_CACHE_LOOKUPS = Counter(
+    "response_cache_lookups",
+    "LLM response cache lookups",
+    labelnames=["kind", "tier", "result"],
+)
+
+
+def _normalize(value: Any) -> Any:
+    """Canonical form of a request payload: whitespace-insensitive, list order ignored.
+
+    Case is kept: clinical abbreviations are case-sensitive.
+    """
+    if isinstance(value, str):
+        return normalize_text(value)
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        items = [_normalize(v) for v in value]
+        return sorted(items, key=lambda v: json.dumps(v, sort_keys=True))
+    return value
+
+
+def _digest(*parts: Any) -> str:
+    blob = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheProbe:
+    """Result of a lookup; pass it back to ``ResponseCache.put`` after a miss."""
+
+    namespace: tuple[str, str, str]  # (kind, tenant_id, digest of model, system prompt and structured fields)
+    key: str
+    vector: np.ndarray | None = None
+    value: dict | None = None
+    tier: str | None = None  # "exact" | "semantic" on a hit
+
+
+@dataclass
+class _Bucket:
+    keys: list[str] = field(default_factory=list)
+    vectors: list[np.ndarray] = field(default_factory=list)
+    values: list[dict] = field(default_factory=list)
+    expires: list[float] = field(default_factory=list)
+    _matrix: np.ndarray | None = None
+
+    def matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            self._matrix = np.stack(self.vectors)
+        return self._matrix
+
+    def drop(self, keep: list[int]) -> None:
+        for name in ("keys", "vectors", "values", "expires"):
+            items = getattr(self, name)
+            setattr(self, name, [items[i] for i in keep])
+        self._matrix = None
+
+
+class _SemanticTier:
+    """Per-namespace store of (query embedding, response), searched by cosine similarity."""
+
+    def __init__(self, threshold: float, max_entries: int, ttl_seconds: float) -> None:
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._buckets: dict[tuple[str, str, str], _Bucket] = {}
+
+    def get(self, namespace: tuple[str, str, str], vector: np.ndarray) -> dict | None:
+        bucket = self._buckets.get(namespace)
+        if bucket is None or not bucket.keys:
+            return None
+        now = time.monotonic()
+        if bucket.expires[0] <= now:  # entries are appended in expiry order
+            bucket.drop([i for i, e in enumerate(bucket.expires) if e > now])
+            if not bucket.keys:
+                return None
+        scores = bucket.matrix() @ vector
+        best = int(np.argmax(scores))
+        return bucket.values[best] if scores[best] >= self.threshold else None
+
+    def put(self, namespace: tuple[str, str, str], key: str, vector: np.ndarray, value: dict) -> None:
+        if self.max_entries <= 0:
+            return
+        bucket = self._buckets.setdefault(namespace, _Bucket())
+        bucket.keys.append(key)
+        bucket.vectors.append(vector)
+        bucket.values.append(value)
+        bucket.expires.append(time.monotonic() + self.ttl)
+        bucket._matrix = None
+        if len(bucket.keys) > self.max_entries:
+            bucket.drop(list(range(len(bucket.keys) - self.max_entries, len(bucket.keys))))
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+
+class ResponseCache:
+    """Tenant-scoped cache of LLM responses in front of case analysis and note summaries.
+
+    The exact tier keys on a digest of the normalized input, system prompt, retrieved
+    contexts and model. The optional semantic tier only compares free text (case
+    history, note prose): a miss's ``query_text`` embedding is matched against earlier
+    queries whose tenant, kind, model, system prompt, retrieved contexts and
+    ``structured`` fields (age, sex, symptoms, medications, ...) are identical, so two
+    patients differing in any structured field never share an answer, and re-ingested
+    guidelines are never answered from the old ones. Because the prompt is part of every key, a prompt change can never
+    serve a stale answer, even from another worker's copy of the settings.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        semantic_enabled: bool = False,
+        semantic_threshold: float = 0.97,
+        semantic_max_entries: int = 1000,
+    ) -> None:
+        self.exact: TTLCache[str, dict] = TTLCache(max_entries, ttl_seconds)
+        self.semantic = (
+            _SemanticTier(semantic_threshold, semantic_max_entries, ttl_seconds) if semantic_enabled else None
+        )
+
+    async def get(
+        self,
+        kind: str,
+        tenant_id: str,
+        model: str,
+        system_prompt: str,
+        payload: dict,
+        contexts: list[str] | None = None,
+        query_text: str | None = None,
+        structured: dict | None = None,
+    ) -> CacheProbe:
+        """Look ``payload`` up in both tiers.
+
+        ``query_text`` (free text only) is embedded for the semantic tier, which is
+        scoped to requests with exactly the same ``structured`` fields and contexts.
+        """
+        context_texts = [normalize_text(c) for c in contexts or []]
+        namespace = (
+            kind,
+            str(tenant_id),
+            _digest(model, system_prompt, _normalize(structured or {}), context_texts),
+        )
+        key = _digest(namespace, _normalize(payload))
+        probe = CacheProbe(namespace, key)
+
+        probe.value = self.exact.get(key)
+        RESPONSE_CACHE_LOOKUPS.labels(kind, "exact", "hit" if probe.value is not None else "miss").inc()
+        if probe.value is not None:
+            probe.tier = "exact"
+            return probe
+
+        if self.semantic is not None and query_text:
+            probe.vector = await _query_vector(query_text)
+            probe.value = self.semantic.get(namespace, probe.vector)
+            RESPONSE_CACHE_LOOKUPS.labels(kind, "semantic", "hit" if probe.value is not None else "miss").inc()
+            if probe.value is not None:
+                probe.tier = "semantic"
+        return probe
+
+    def put(self, probe: CacheProbe, value: dict) -> None:
+        self.exact.set(probe.key, value)
+        if self.semantic is not None and probe.vector is not None:
+            self.semantic.put(probe.namespace, probe.key, probe.vector, value)
+
+    def clear(self) -> None:
+        self.exact.clear()
+        if self.semantic is not None:
+            self.semantic.clear()
+
+
+async def _query_vector(text: str) -> np.ndarray:
+    # Retrieval embeds the full case query, not this free text, so a lookup whose text is
+    # not in the embedding cache yet costs one extra embed.
+    if get_settings().retrieval_mode == "hybrid":
+        dense = (await embed_hybrid([text]))[0][0]
+    else:
+        dense = (await embed_texts([text]))[0]
+    vec = np.asarray(dense, dtype=np.float32)
+    return vec / (np.linalg.norm(vec) or 1.0)
+
+
+_cache: ResponseCache | None = None
+
+
+def get_response_cache() -> ResponseCache | None:
+    """Shared cache, or None when ``response_cache_enabled`` is off."""
+    global _cache
+    s = get_settings()
+    if not s.response_cache_enabled:
+        return None
+    if _cache is None:
+        _cache = ResponseCache(
+            max_entries=s.response_cache_max_entries,
+            ttl_seconds=s.response_cache_ttl_seconds,
+            semantic_enabled=s.response_cache_semantic_enabled,
+            semantic_threshold=s.response_cache_semantic_threshold,
+            semantic_max_entries=s.response_cache_semantic_max_entries,
+        )
+    return _cache
+
+
+def clear_response_cache() -> None:
+    if _cache is not None:
+        _cache.clear()
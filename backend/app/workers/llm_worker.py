@@ -0,0 +1,235 @@
+"""RabbitMQ consumer for queued LLM jobs.
+
+Run with:
+
+  cd backend
+  python -m app.workers.llm_worker
+
+Each message carries a job id from ``llm_jobs``. The worker runs RAG retrieval and
+the LLM call, writes the ``Interaction`` row, and records the result on the job so
+``GET /api/v1/jobs/{id}`` can return it. Failed jobs are republished with an
+incremented ``x-attempt`` header; after ``llm_worker_max_attempts`` they go to the
+dead-letter queue. SIGTERM stops consuming and drains in-flight jobs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import signal
+import uuid
+
+import aio_pika
+from aio_pika.abc import AbstractChannel, AbstractIncomingMessage
+
+from app.core.config import get_settings
+from app.core.metrics import set_request_labels
+from app.core.singleflight import close_singleflight
+from app.core.tracing import init_tracing, shutdown_tracing, span
+from app.db import models
+from app.db.session import AsyncSessionLocal, async_engine
+from app.schemas.case import CaseInput
+from app.services.admission import init_admission_controller
+from app.services.case_analysis import case_interaction, run_case_analysis
+from app.services.embedding_cache import close_embedding_cache
+from app.services.embeddings import close_embedding_batcher
+from app.services.http_pool import close_llm_http_pool
+from app.services.llm_balancer import close_llm_balancer, start_llm_balancer
+from app.services.qdrant_client import close_async_qdrant, init_async_qdrant
+from app.services.rerank import close_reranker
+from app.services.queue_producer import declare_topology
+
+
+logger = logging.getLogger(__name__)
+
+ATTEMPT_HEADER = "x-attempt"
+
+
+class LLMWorker:
+    def __init__(self) -> None:
+        self.s = get_settings()
+        self._slots = asyncio.Semaphore(self.s.llm_worker_concurrency)
+        self._tasks: set[asyncio.Task] = set()
+        self._stopping = asyncio.Event()
+        self._channel: AbstractChannel | None = None
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        s = self.s
+        connection = await aio_pika.connect_robust(
+            host=s.rabbitmq_host,
+            port=s.rabbitmq_port,
+            login=s.rabbitmq_user,
+            password=s.rabbitmq_pass,
+        )
+        async with connection:
+            self._channel = await connection.channel()
+            await self._channel.set_qos(prefetch_count=s.llm_worker_prefetch)
+            queue = await declare_topology(self._channel)
+            consumer_tag = await queue.consume(self._on_message)
+            logger.info("Consuming %s (prefetch=%d)", s.rabbitmq_queue_analyze, s.llm_worker_prefetch)
+
+            await self._stopping.wait()
+            logger.info("Stopping: no new deliveries, draining %d in-flight jobs", len(self._tasks))
+            await queue.cancel(consumer_tag)
+            await self._drain()
+
+    async def _drain(self) -> None:
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(set(self._tasks), timeout=self.s.llm_worker_drain_timeout_seconds)
+        for task in pending:
+            # Unacked messages are redelivered to another worker once we disconnect.
+            task.cancel()
+        if pending:
+            logger.warning("Drain timed out; %d jobs left for redelivery", len(pending))
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _on_message(self, message: AbstractIncomingMessage) -> None:
+        task = asyncio.create_task(self._handle(message))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _handle(self, message: AbstractIncomingMessage) -> None:
+        attempt = int((message.headers or {}).get(ATTEMPT_HEADER, 0)) + 1
+        try:
+            body = json.loads(message.body)
+            job_id = uuid.UUID(body["job_id"])
+        except Exception as exc:
+            logger.error("Malformed job message %s: %s", message.message_id, exc)
+            await self._dead_letter(message, attempt, f"malformed message: {exc}")
+            await message.ack()
+            return
+
+        try:
+            async with self._slots:
+                with span(
+                    "llm_worker.process",
+                    kind="consumer",
+                    headers=message.headers or {},
+                    job_id=str(job_id),
+                    attempt=attempt,
+                ):
+                    result = await self._process(job_id, body, attempt)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            error = str(exc) or exc.__class__.__name__
+            logger.warning("Job %s attempt %d failed: %s", job_id, attempt, error)
+            if attempt < self.s.llm_worker_max_attempts:
+                await self._set_job_status(job_id, "queued", error)
+                await asyncio.sleep(self.s.llm_worker_retry_backoff_seconds * 2 ** (attempt - 1))
+                await self._republish(message, attempt)
+            else:
+                await self._set_job_status(job_id, "failed", error)
+                await self._dead_letter(message, attempt, error)
+            await message.ack()
+            return
+
+        if message.reply_to and result is not None:
+            await self._channel.default_exchange.publish(
+                aio_pika.Message(
+                    body=json.dumps({"job_id": str(job_id), "status": "succeeded", "result": result}).encode("utf-8"),
+                    content_type="application/json",
+                    correlation_id=message.correlation_id,
+                ),
+                routing_key=message.reply_to,
+            )
+        await message.ack()
+
+    async def _process(self, job_id: uuid.UUID, body: dict, attempt: int) -> dict | None:
+        async with AsyncSessionLocal() as db:
+            job = await db.get(models.LLMJob, job_id)
+            if job is None:
+                logger.warning("Job %s not found; dropping message", job_id)
+                return None
+            if job.status == "succeeded":
+                # Redelivered after a crash between commit and ack.
+                return job.result
+            job.status = "running"
+            job.attempts = attempt
+            await db.commit()
+
+            payload = CaseInput.model_validate(body.get("payload") or job.request_payload)
+            set_request_labels(f"worker:{job.kind}", str(job.tenant_id))
+            result, latency_ms, cached = await run_case_analysis(
+                payload, tenant_id=str(job.tenant_id), priority="batch"
+            )
+
+            if job.case_id is not None:
+                db.add(
+                    case_interaction(
+                        job.case_id, job.tenant_id, job.user_id, payload, result, latency_ms, cached=cached
+                    )
+                )
+            job.status = "succeeded"
+            job.result = result.model_dump()
+            job.error = None
+            await db.commit()
+            return job.result
+
+    async def _set_job_status(self, job_id: uuid.UUID, status: str, error: str) -> None:
+        async with AsyncSessionLocal() as db:
+            job = await db.get(models.LLMJob, job_id)
+            if job is not None:
+                job.status = status
+                job.error = error
+                await db.commit()
+
+    def _copy(self, message: AbstractIncomingMessage, headers: dict) -> aio_pika.Message:
+        return aio_pika.Message(
+            body=message.body,
+            content_type=message.content_type,
+            content_encoding=message.content_encoding,
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            message_id=message.message_id,
+            correlation_id=message.correlation_id,
+            reply_to=message.reply_to,
+            headers={**(message.headers or {}), **headers},
+        )
+
+    async def _republish(self, message: AbstractIncomingMessage, attempt: int) -> None:
+        await self._channel.default_exchange.publish(
+            self._copy(message, {ATTEMPT_HEADER: attempt}),
+            routing_key=self.s.rabbitmq_queue_analyze,
+        )
+
+    async def _dead_letter(self, message: AbstractIncomingMessage, attempt: int, error: str) -> None:
+        await self._channel.default_exchange.publish(
+            self._copy(message, {ATTEMPT_HEADER: attempt, "x-error": error[:1000]}),
+            routing_key=self.s.rabbitmq_queue_analyze_dlq,
+        )
+
+
+async def main() -> None:
+    worker = LLMWorker()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+    init_tracing("worker")
+    init_admission_controller(worker=True)
+    init_async_qdrant()
+    start_llm_balancer()
+    try:
+        await worker.run()
+    finally:
+        await close_embedding_batcher()
+        close_embedding_cache()
+        close_reranker()
+        close_singleflight()
+        await close_async_qdrant()
+        await async_engine.dispose()
+        await close_llm_balancer()
+        await close_llm_http_pool()
+        shutdown_tracing()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=get_settings().log_level.upper(),
+        format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
+    )
+    asyncio.run(main())
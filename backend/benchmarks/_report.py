@@ -0,0 +1,53 @@
+"""Shared helpers for benchmarks that write diffable JSON results (see ``benchmarks.compare``)."""
+
+from __future__ import annotations
+
+import json
+import platform
+import subprocess
+import time
+from pathlib import Path
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list (0.0 when empty)."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def latency_summary(seconds: list[float], scale: float = 1000.0, unit: str = "ms") -> dict:
+    values = sorted(seconds)
+    return {
+        f"mean_{unit}": round(sum(values) / len(values) * scale, 3) if values else 0.0,
+        f"p50_{unit}": round(percentile(values, 0.50) * scale, 3),
+        f"p95_{unit}": round(percentile(values, 0.95) * scale, 3),
+        f"p99_{unit}": round(percentile(values, 0.99) * scale, 3),
+        f"max_{unit}": round(values[-1] * scale, 3) if values else 0.0,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def emit(name: str, params: dict, results: dict, out: str | None = None) -> dict:
+    """Print ``results`` as JSON with run metadata, and write it to ``out`` if given."""
+    report = {
+        "benchmark": name,
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "params": params,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if out:
+        Path(out).parent.mkdir(parents=True, exist_ok=True)
+        Path(out).write_text(text + "\n", encoding="utf-8")
+    print(text)
+    return report
@@ -0,0 +1,138 @@
+"""Chunker comparison: legacy newline/512-char splitter vs. sentence packing.
+
+Loads the embedding model, so run it where ingestion normally runs:
+
+  cd backend
+  python -m benchmarks.chunking --docs 200
+  python -m benchmarks.chunking --corpus guidelines.ndjson --queries 500
+
+For each chunker it reports the chunk count, chunking and embedding time, and the
+retrieval quality. A sentence is sampled from the corpus as the query. Its word
+tokens are compared with the union of the top-k chunks (exact cosine search), which
+is independent of where lines wrap or chunks start. ``token_recall`` is the mean
+share of query tokens retrieved; a query is a hit when at least ``--min-overlap`` of
+them are.
+A multi-megabyte document is also chunked to check the chunker scales linearly.
+Prints a JSON summary.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import time
+
+import numpy as np
+
+from app.schemas.document import DocumentIngestRequest
+from app.services.chunking import Chunk, _sections, chunk_text, split_legacy
+from app.services.embeddings import _encode
+
+
+_TOPICS = ["chest pain", "sepsis", "stroke", "asthma", "pneumonia", "syncope", "anaphylaxis", "DKA"]
+_SENTENCES = [
+    "Assess {t} promptly and document the time of onset.",
+    "Red flags for {t} include hypotension, altered mental status and hypoxia.",
+    "Escalate {t} to senior review if observations deteriorate within the first hour of assessment.",
+    "Initial investigations for {t} should include a full blood count, electrolytes and an ECG where relevant.",
+    "Consider alternative diagnoses when {t} does not respond to first-line management.",
+    "Patients with {t} and significant comorbidities may need admission even when initial tests are reassuring.",
+]
+
+
+def _synthetic_doc(i: int, rng: random.Random) -> DocumentIngestRequest:
+    topic = _TOPICS[i % len(_TOPICS)]
+    lines: list[str] = []
+    for section in ("ASSESSMENT", "Management:", "## Escalation"):
+        lines.append(section)
+        for _ in range(rng.randint(3, 8)):
+            # Wrap prose at ~70 characters like exported PDFs, so sentences span lines.
+            para = " ".join(rng.choice(_SENTENCES).format(t=f"{topic} ({i})") for _ in range(rng.randint(2, 6)))
+            while len(para) > 70:
+                cut = para.rfind(" ", 0, 70)
+                lines.append(para[:cut])
+                para = para[cut + 1:]
+            lines.append(para)
+            lines.append("")
+    return DocumentIngestRequest(title=f"guideline {i}", content="\n".join(lines))
+
+
+def _load_corpus(path: str | None, docs: int) -> list[DocumentIngestRequest]:
+    if path is None:
+        rng = random.Random(7)
+        return [_synthetic_doc(i, rng) for i in range(docs)]
+    with open(path, encoding="utf-8") as fh:
+        return [DocumentIngestRequest.model_validate_json(line) for line in fh if line.strip()][:docs]
+
+
+_WORD = re.compile(r"\w+")
+
+
+def _tokens(text: str) -> set[str]:
+    return set(_WORD.findall(text.lower()))
+
+
+def _run(name: str, chunker, corpus, queries: list[str], top_k: int, min_overlap: float) -> dict:
+    t0 = time.perf_counter()
+    chunks: list[Chunk] = [c for doc in corpus for c in chunker(doc.content)]
+    chunk_s = time.perf_counter() - t0
+
+    texts = [c.text for c in chunks]
+    t0 = time.perf_counter()
+    matrix = _encode(texts, batch_size=32)
+    embed_s = time.perf_counter() - t0
+
+    q = _encode(queries, batch_size=32)
+    top = np.argsort(-(q @ matrix.T), axis=1)[:, :top_k]
+    recalls = []
+    for query, row in zip(queries, top):
+        wanted = _tokens(query)
+        found = set().union(*(_tokens(texts[j]) for j in row))
+        recalls.append(len(wanted & found) / max(1, len(wanted)))
+    return {
+        "chunker": name,
+        "chunks": len(chunks),
+        "avg_chars": round(sum(map(len, texts)) / max(1, len(texts)), 1),
+        "chunk_seconds": round(chunk_s, 3),
+        "embed_seconds": round(embed_s, 3),
+        "token_recall": round(sum(recalls) / max(1, len(recalls)), 3),
+        "hit_rate": round(sum(r >= min_overlap for r in recalls) / max(1, len(recalls)), 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", help="NDJSON file of {title, content}; synthetic guidelines if omitted")
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--min-overlap", type=float, default=0.9, help="query token share needed for a hit")
+    parser.add_argument("--large-mb", type=float, default=4.0)
+    args = parser.parse_args()
+
+    corpus = _load_corpus(args.corpus, args.docs)
+    rng = random.Random(11)
+    sentences = [s for doc in corpus for _, section in _sections(doc.content) for s in section]
+    queries = rng.sample(sentences, min(args.queries, len(sentences)))
+
+    results = [
+        _run("legacy", split_legacy, corpus, queries, args.top_k, args.min_overlap),
+        _run("sentence", chunk_text, corpus, queries, args.top_k, args.min_overlap),
+    ]
+
+    blob = "\n".join(doc.content for doc in corpus)
+    large = (blob * (int(args.large_mb * 1_000_000 / max(1, len(blob))) + 1))[: int(args.large_mb * 1_000_000)]
+    scaling = {}
+    for fraction in (0.25, 1.0):
+        part = large[: int(len(large) * fraction)]
+        t0 = time.perf_counter()
+        n = len(chunk_text(part))
+        scaling[f"{len(part) / 1_000_000:.2f}MB"] = {"chunks": n, "seconds": round(time.perf_counter() - t0, 3)}
+
+    print(json.dumps({"documents": len(corpus), "queries": len(queries), "results": results, "large_input": scaling}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Diff two JSON reports from ``benchmarks.load`` or ``benchmarks.micro``.
+
+  cd backend
+  python -m benchmarks.compare results/before.json results/after.json --threshold 5
+
+Prints every numeric result that moved by at least ``--threshold`` percent, as JSON.
+A metric that moves away from zero has no percentage; it is always listed, with
+``change_pct`` null.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+
+
+def _flatten(value, prefix: str = "") -> dict[str, float]:
+    if isinstance(value, dict):
+        out: dict[str, float] = {}
+        for key, item in value.items():
+            out.update(_flatten(item, f"{prefix}.{key}" if prefix else str(key)))
+        return out
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: float(value)}
+    return {}
+
+
+def compare(before: dict, after: dict, threshold: float) -> list[dict]:
+    old, new = _flatten(before.get("results", {})), _flatten(after.get("results", {}))
+    changes = []
+    for key in sorted(old.keys() & new.keys()):
+        a, b = old[key], new[key]
+        if a == 0:
+            if b != 0:
+                changes.append({"metric": key, "before": a, "after": b, "change_pct": None})
+            continue
+        change = (b - a) / abs(a) * 100
+        if abs(change) >= threshold:
+            changes.append({"metric": key, "before": a, "after": b, "change_pct": round(change, 1)})
+    return changes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=0.0, help="minimum absolute change in percent")
+    args = parser.parse_args()
+
+    with open(args.before, encoding="utf-8") as fh:
+        before = json.load(fh)
+    with open(args.after, encoding="utf-8") as fh:
+        after = json.load(fh)
+    print(
+        json.dumps(
+            {
+                "benchmark": after.get("benchmark"),
+                "before": before.get("commit"),
+                "after": after.get("commit"),
+                "changes": compare(before, after, args.threshold),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
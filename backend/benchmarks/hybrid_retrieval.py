@@ -0,0 +1,135 @@
+"""Dense vs. hybrid (dense + bge-m3 sparse, RRF) retrieval: recall@k and latency.
+
+Loads bge-m3 with its sparse head. Uses an in-memory Qdrant unless ``--qdrant-url``
+points at a server (use a server for meaningful latency numbers). Run with:
+
+  cd backend
+  python -m benchmarks.hybrid_retrieval --k 5
+  python -m benchmarks.hybrid_retrieval --qdrant-url http://localhost:6333
+
+The fixture corpus is generated deterministically: each guideline mentions a drug
+name, an ICD-10 code and a lab abbreviation among generic clinical prose, and each
+query asks about one of those exact identifiers. A query is a hit when the guideline
+it was built from is in the top k. Prints a JSON summary.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import uuid
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http import models as qmodels
+
+from app.core.config import get_settings
+from app.services import qdrant_client as qdrant
+from app.services.embeddings import _encode_hybrid
+
+
+COLLECTION = "bench_hybrid"
+TENANT = "bench"
+
+_DRUGS = ["apixaban", "rivaroxaban", "dabigatran", "enoxaparin", "clopidogrel", "ticagrelor", "amiodarone",
+          "digoxin", "metformin", "empagliflozin", "dapagliflozin", "sitagliptin", "levetiracetam", "lacosamide",
+          "vancomycin", "piperacillin", "meropenem", "ceftriaxone", "linezolid", "daptomycin"]
+_LABS = ["eGFR", "HbA1c", "BNP", "NT-proBNP", "CRP", "PCT", "INR", "aPTT", "ALT", "AST", "TSH", "hs-cTnT"]
+_PROSE = [
+    "Review the patient's history and current medications before changing therapy.",
+    "Monitor renal function and adjust the plan if values deteriorate.",
+    "Escalate to a senior clinician when red flags are present.",
+    "Document the shared decision and the agreed follow-up interval.",
+    "Consider interactions and contraindications in older patients.",
+]
+
+
+def _fixture(n_docs: int, seed: int = 3) -> tuple[list[str], list[tuple[str, int]]]:
+    rng = random.Random(seed)
+    docs: list[str] = []
+    queries: list[tuple[str, int]] = []
+    for i in range(n_docs):
+        drug = rng.choice(_DRUGS)
+        icd = f"{rng.choice('EIJKN')}{rng.randint(10, 99)}.{rng.randint(0, 9)}"
+        lab = rng.choice(_LABS)
+        prose = " ".join(rng.sample(_PROSE, 3))
+        docs.append(f"[doc {i}] Patients coded {icd} on {drug} need {lab} checked. {prose}")
+        queries.append((f"What does the guideline say about {icd}?", i))
+        queries.append((f"{lab} monitoring with {drug} for {icd}", i))
+    return docs, queries
+
+
+async def _search(vec, sparse, k: int, prefetch: int) -> tuple[list[str], float]:
+    t0 = time.perf_counter()
+    texts = await qdrant.search_similar_texts(COLLECTION, vec, TENANT, limit=k, sparse_vector=sparse, prefetch=prefetch)
+    return texts, time.perf_counter() - t0
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--prefetch", type=int, default=get_settings().retrieval_hybrid_prefetch)
+    parser.add_argument("--qdrant-url", default=None)
+    args = parser.parse_args()
+
+    client = AsyncQdrantClient(url=args.qdrant_url) if args.qdrant_url else AsyncQdrantClient(location=":memory:")
+    qdrant._async_client = client
+    qdrant._async_ready = True
+    if await client.collection_exists(COLLECTION):
+        await client.delete_collection(COLLECTION)
+    dense = qmodels.VectorParams(size=get_settings().embeddings_dim, distance=qmodels.Distance.COSINE)
+    await client.create_collection(
+        COLLECTION,
+        vectors_config={qdrant.DENSE_VECTOR: dense},
+        sparse_vectors_config={qdrant.SPARSE_VECTOR: qmodels.SparseVectorParams()},
+    )
+
+    docs, queries = _fixture(args.docs)
+    t0 = time.perf_counter()
+    emb = _encode_hybrid(docs, 32)
+    encode_docs_s = time.perf_counter() - t0
+    for start in range(0, len(docs), 256):
+        await qdrant.upsert_text_points(
+            COLLECTION,
+            ids=[str(uuid.uuid4()) for _ in docs[start:start + 256]],
+            vectors=emb.dense[start:start + 256].tolist(),
+            payloads=[{"tenant_id": TENANT, "text": d} for d in docs[start:start + 256]],
+            sparse=emb.sparse[start:start + 256],
+        )
+
+    results = {}
+    for mode in ("dense", "hybrid"):
+        hits = 0
+        encode_lat: list[float] = []
+        search_lat: list[float] = []
+        for query, doc_index in queries:
+            t0 = time.perf_counter()
+            q = _encode_hybrid([query], 1)  # one pass gives both vectors
+            encode_lat.append(time.perf_counter() - t0)
+            sparse = q.sparse[0] if mode == "hybrid" else None
+            texts, elapsed = await _search(q.dense[0].tolist(), sparse, args.k, args.prefetch)
+            search_lat.append(elapsed)
+            hits += any(t.startswith(f"[doc {doc_index}]") for t in texts)
+        results[mode] = {
+            f"recall@{args.k}": round(hits / len(queries), 3),
+            "encode_ms_p50": round(statistics.median(encode_lat) * 1000, 2),
+            "search_ms_p50": round(statistics.median(search_lat) * 1000, 2),
+            "search_ms_p95": round(sorted(search_lat)[int(0.95 * (len(search_lat) - 1))] * 1000, 2),
+        }
+
+    await client.delete_collection(COLLECTION)
+    await client.close()
+    print(json.dumps({
+        "documents": len(docs),
+        "queries": len(queries),
+        "encode_docs_seconds": round(encode_docs_s, 2),
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,197 @@
+"""HTTP load test: login, chat, case analysis, note summaries and document ingestion.
+
+Drives a running API with ``--concurrency`` virtual users for ``--duration`` seconds
+(after ``--warmup``), each picking endpoints according to ``--mix``. Reports
+throughput, p50/p95/p99 latency, error rate and status codes per endpoint.
+
+Fully offline setup (Postgres migrated and bootstrapped as usual):
+
+  # LLM stand-in: 300 ms before the first token, 40 tokens/s, 1% injected 500s
+  cd llm_stub && STUB_LATENCY_MS=300 STUB_TOKENS_PER_SECOND=40 STUB_FAILURE_RATE=0.01 \\
+      uvicorn main:app --port 8001
+  # API with embedded Qdrant and a small embedding model
+  cd backend && QDRANT_LOCATION=:memory: VLLM_BASE_URL=http://localhost:8001 \\
+      EMBEDDINGS_MODEL=sentence-transformers/all-MiniLM-L6-v2 EMBEDDINGS_DIM=384 \\
+      uvicorn app.main:app --port 8000
+
+  cd backend
+  python -m benchmarks.load --concurrency 16 --duration 60 --out results/load.json
+
+Compare two runs with ``python -m benchmarks.compare old.json new.json``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter, defaultdict
+
+import httpx
+
+from benchmarks._report import emit, latency_summary
+from scripts.bootstrap_admin import DEFAULT_ADMIN_EMAIL, DEFAULT_ADMIN_PASSWORD
+
+
+_SYMPTOMS = ["chest pain", "fever", "cough", "headache", "dyspnoea", "syncope", "abdominal pain", "rash"]
+_NOTES = [
+    "Pt stable overnight, afebrile, tolerating diet. Plan: continue abx, repeat bloods am.",
+    "SOB on exertion, bibasal crackles, BNP raised. Started diuretics, daily weights.",
+    "Fall at home, no LOC, bruising L hip, able to weight bear. XR pending.",
+]
+
+
+def _analyze(rng: random.Random) -> tuple[str, dict]:
+    return "/api/v1/cases/analyze", {
+        "patient_age": rng.randint(18, 90),
+        "sex": rng.choice(["m", "f"]),
+        "symptoms": rng.sample(_SYMPTOMS, rng.randint(1, 3)),
+    }
+
+
+def _chat(rng: random.Random) -> tuple[str, dict]:
+    question = f"What should I check next for {rng.choice(_SYMPTOMS)}?"
+    return "/api/v1/chat", {"messages": [{"role": "user", "content": question}]}
+
+
+def _notes(rng: random.Random) -> tuple[str, dict]:
+    return "/api/v1/notes/summarize", {"text": rng.choice(_NOTES)}
+
+
+def _ingest(rng: random.Random) -> tuple[str, dict]:
+    topic = rng.choice(_SYMPTOMS)
+    # Unique content so every request embeds and upserts instead of hitting "unchanged".
+    body = "\n\n".join(
+        f"Assess {topic} promptly (variant {rng.getrandbits(32):x}). Escalate if observations deteriorate."
+        for _ in range(rng.randint(3, 12))
+    )
+    return "/api/v1/documents/ingest", {"title": f"bench {topic}", "content": body}
+
+
+_BUILDERS = {"chat": _chat, "analyze": _analyze, "notes": _notes, "ingest": _ingest}
+
+
+def _parse_mix(mix: str) -> dict[str, int]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name not in (*_BUILDERS, "login"):
+            raise SystemExit(f"unknown scenario {name!r}")
+        weights[name] = int(weight or 1)
+    return weights
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, Counter] = defaultdict(Counter)
+        self.recording = False
+
+    def add(self, name: str, seconds: float, status: str) -> None:
+        if self.recording:
+            self.latencies[name].append(seconds)
+            self.statuses[name][status] += 1
+
+    def summary(self, elapsed: float) -> dict:
+        results = {}
+        for name in sorted(self.statuses):
+            total = sum(self.statuses[name].values())
+            errors = sum(n for status, n in self.statuses[name].items() if not status.startswith("2"))
+            results[name] = {
+                "requests": total,
+                "throughput_rps": round(total / elapsed, 2),
+                "error_rate": round(errors / total, 4),
+                "status": dict(sorted(self.statuses[name].items())),
+                **latency_summary(self.latencies[name]),
+            }
+        all_latencies = [x for values in self.latencies.values() for x in values]
+        total = sum(r["requests"] for r in results.values())
+        errors = sum(r["error_rate"] * r["requests"] for r in results.values())
+        results["all"] = {
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 2),
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            **latency_summary(all_latencies),
+        }
+        return results
+
+
+async def _timed(client: httpx.AsyncClient, rec: Recorder, name: str, method: str, url: str, **kwargs):
+    started = time.perf_counter()
+    try:
+        resp = await client.request(method, url, **kwargs)
+        status = str(resp.status_code)
+    except httpx.TimeoutException:
+        resp, status = None, "timeout"
+    except httpx.HTTPError:
+        resp, status = None, "connection_error"
+    rec.add(name, time.perf_counter() - started, status)
+    return resp
+
+
+async def _login(client: httpx.AsyncClient, rec: Recorder, args) -> dict | None:
+    resp = await _timed(
+        client, rec, "login", "POST", "/auth/login", json={"email": args.email, "password": args.password}
+    )
+    if resp is None or resp.status_code != 200:
+        return None
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+async def _user(i: int, client: httpx.AsyncClient, rec: Recorder, args, weights: dict, deadline: float) -> None:
+    rng = random.Random(args.seed + i)
+    names, w = list(weights), list(weights.values())
+    headers = None
+    while time.monotonic() < deadline:
+        name = rng.choices(names, w)[0]
+        if name == "login" or headers is None:
+            headers = await _login(client, rec, args) or headers
+            if headers is None:
+                await asyncio.sleep(1.0)
+            continue
+        url, body = _BUILDERS[name](rng)
+        await _timed(client, rec, name, "POST", url, json=body, headers=headers)
+        if args.think_ms:
+            await asyncio.sleep(rng.expovariate(1000 / args.think_ms))
+
+
+async def run(args) -> dict:
+    weights = _parse_mix(args.mix)
+    rec = Recorder()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        deadline = time.monotonic() + args.warmup + args.duration
+        users = [
+            asyncio.create_task(_user(i, client, rec, args, weights, deadline)) for i in range(args.concurrency)
+        ]
+        await asyncio.sleep(args.warmup)
+        rec.recording = True
+        started = time.monotonic()
+        await asyncio.gather(*users)
+        elapsed = time.monotonic() - started
+    return rec.summary(elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", default=DEFAULT_ADMIN_EMAIL)
+    parser.add_argument("--password", default=DEFAULT_ADMIN_PASSWORD)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds before recording")
+    parser.add_argument("--mix", default="login=1,chat=4,analyze=4,notes=2,ingest=1", help="scenario=weight,...")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mean pause between a user's requests")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="also write the JSON report here")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    params = {k: v for k, v in vars(args).items() if k not in ("password", "out")}
+    emit("load", params, results, args.out)
+
+
+if __name__ == "__main__":
+    main()
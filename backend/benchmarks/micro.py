@@ -0,0 +1,169 @@
+"""Micro-benchmarks for hot helpers: chunking, embedding, ``<think>`` stripping, chat history.
+
+Runs offline; the embedding group loads ``EMBEDDINGS_MODEL`` (point it at a small
+model such as sentence-transformers/all-MiniLM-L6-v2 with EMBEDDINGS_DIM=384 for
+quick runs, or skip it with ``--groups chunking,strip_think,chat_history``).
+
+  cd backend
+  python -m benchmarks.micro --out results/micro.json
+
+``_split_into_chunks`` from the original ingestion route lives on as
+``chunking.split_legacy``; both it and the sentence chunker are measured.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Callable
+
+from benchmarks._report import emit, latency_summary
+from benchmarks.chunking import _synthetic_doc
+
+
+def _bench(fn: Callable[[], object], repeat: int, warmup: int = 3) -> dict:
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return {"ops_per_s": round(len(times) / sum(times), 1), **latency_summary(times, 1e6, "us")}
+
+
+async def _abench(fn, repeat: int, warmup: int = 3) -> dict:
+    for _ in range(warmup):
+        await fn()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        await fn()
+        times.append(time.perf_counter() - t0)
+    return {"ops_per_s": round(len(times) / sum(times), 1), **latency_summary(times, 1e6, "us")}
+
+
+def bench_chunking(repeat: int) -> dict:
+    from app.services.chunking import chunk_text, split_legacy
+
+    rng = random.Random(7)
+    doc = "\n".join(_synthetic_doc(i, rng).content for i in range(20))
+    return {
+        "input_chars": len(doc),
+        "split_legacy": _bench(lambda: split_legacy(doc), repeat),
+        "chunk_text": _bench(lambda: chunk_text(doc), max(1, repeat // 10)),
+    }
+
+
+def bench_embed_texts(repeat: int) -> dict:
+    from app.services.embedding_cache import close_embedding_cache
+    from app.services.embeddings import close_embedding_batcher, embed_texts
+
+    rng = random.Random(3)
+    queries = [f"Age: {rng.randint(18, 90)}, Sex: f, Symptoms: chest pain, fever #{i}" for i in range(repeat)]
+    batch = [f"Guideline sentence {i} about sepsis escalation." for i in range(32)]
+
+    async def run() -> dict:
+        it = iter(queries)
+        try:
+            return {
+                "single_query_uncached": await _abench(lambda: embed_texts([next(it)], cache=False), repeat - 3),
+                "single_query_cached": await _abench(lambda: embed_texts([queries[0]]), repeat),
+                "batch_32_uncached": await _abench(lambda: embed_texts(batch, cache=False), max(1, repeat // 10)),
+            }
+        finally:
+            await close_embedding_batcher()
+            close_embedding_cache()
+
+    return asyncio.run(run())
+
+
+def bench_strip_think(repeat: int) -> dict:
+    from app.services.llm_client import _strip_think, _ThinkStripper
+
+    answer = "Differential includes ACS, PE and aortic dissection. " * 40
+    reasoning = "<think>" + "Let me weigh the risk factors step by step. " * 200 + "</think>"
+    content = reasoning + answer
+    deltas = [w + " " for w in content.split(" ")]
+
+    def stream() -> None:
+        stripper = _ThinkStripper()
+        for d in deltas:
+            stripper.feed(d)
+        stripper.flush()
+
+    return {
+        "input_chars": len(content),
+        "strip_think": _bench(lambda: _strip_think(content), repeat),
+        "stream_stripper_per_response": _bench(stream, max(1, repeat // 10)),
+    }
+
+
+def bench_chat_history(repeat: int, turns: int = 200) -> dict:
+    from app.api.v1.routes_chat import _history_messages
+
+    # Rows shaped like the ``_HISTORY_COLUMNS`` projection the endpoint selects.
+    started = datetime.utcnow()
+    rows = [
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            created_at=started,
+            kind="analyze_case",
+            messages=None,
+            patient_age=54,
+            sex="m",
+            symptoms=["chest pain"],
+            assistant=None,
+            summary="Likely ACS; obtain ECG and troponin. " * 20,
+        )
+    ]
+    for i in range(turns):
+        rows.append(
+            SimpleNamespace(
+                id=uuid.uuid4(),
+                created_at=started + timedelta(seconds=i + 1),
+                kind="chat",
+                messages=[{"role": "user", "content": f"Follow-up question {i} about the ECG findings."}],
+                patient_age=None,
+                sex=None,
+                symptoms=None,
+                assistant="Consider serial troponins and cardiology review. " * 8,
+                summary=None,
+            )
+        )
+    return {"interactions": len(rows), "history_messages": _bench(lambda: _history_messages(rows), repeat)}
+
+
+GROUPS = {
+    "chunking": bench_chunking,
+    "embed_texts": bench_embed_texts,
+    "strip_think": bench_strip_think,
+    "chat_history": bench_chat_history,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", default=",".join(GROUPS), help="comma-separated subset of " + ", ".join(GROUPS))
+    parser.add_argument("--repeat", type=int, default=200, help="timed runs per benchmark (at least 4)")
+    parser.add_argument("--out", help="also write the JSON report here")
+    args = parser.parse_args()
+    if args.repeat < 4:
+        # embed_texts spends 3 of its unique queries on warmup and times the rest.
+        parser.error("--repeat must be at least 4")
+
+    groups = [g.strip() for g in args.groups.split(",") if g.strip()]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        raise SystemExit(f"unknown groups: {', '.join(sorted(unknown))}")
+    results = {g: GROUPS[g](args.repeat) for g in groups}
+    emit("micro", {"groups": groups, "repeat": args.repeat}, results, args.out)
+
+
+if __name__ == "__main__":
+    main()
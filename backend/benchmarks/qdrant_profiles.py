@@ -0,0 +1,155 @@
+"""Qdrant collection profiles: estimated memory, QPS and recall@k.
+
+Needs a Qdrant server; the in-memory client ignores HNSW and quantization, so its
+numbers would be meaningless. Run with:
+
+  cd backend
+  python -m benchmarks.qdrant_profiles --qdrant-url http://localhost:6333
+  python -m benchmarks.qdrant_profiles --profiles default int8 --points 100000 --k 10
+
+For every profile a collection is built from the same seeded, clustered vectors
+spread over several tenants. Each query is tenant-filtered like the API's searches;
+recall@k is measured against an exact (brute-force) search of the same collection.
+Memory is an estimate of the resident vector + HNSW graph size from the profile,
+not a measurement. Prints a JSON summary.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http import models as qmodels
+
+from app.core.config import get_settings
+from app.services.qdrant_client import _collection_config, ensure_payload_indexes
+from app.services.qdrant_profiles import PROFILES, CollectionProfile, get_profile, search_params
+
+
+TENANTS = [f"tenant-{i}" for i in range(8)]
+
+
+def _vectors(n: int, dim: int, seed: int) -> np.ndarray:
+    # Clustered rather than uniform: real embeddings are, and quantization error shows up between near neighbours.
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, n // 200), dim)).astype(np.float32)
+    vecs = centers[rng.integers(0, len(centers), n)] + 0.35 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+
+def _memory_mb(profile: CollectionProfile, n: int, dim: int) -> dict:
+    full = n * dim * 4
+    quantized = {"none": 0, "int8": n * dim, "binary": n * dim // 8}[profile.quantization]
+    graph = n * profile.hnsw_m * 2 * 4  # layer-0 links dominate
+    ram = graph + quantized + (0 if profile.on_disk else full)
+    disk = full if profile.on_disk else 0
+    return {"ram_mb_est": round(ram / 2**20, 1), "disk_vectors_mb_est": round(disk / 2**20, 1)}
+
+
+def _tenant_filter(tenant: str) -> qmodels.Filter:
+    return qmodels.Filter(must=[qmodels.FieldCondition(key="tenant_id", match=qmodels.MatchValue(value=tenant))])
+
+
+async def _wait_indexed(client: AsyncQdrantClient, collection: str) -> None:
+    while (await client.get_collection(collection)).status != qmodels.CollectionStatus.GREEN:
+        await asyncio.sleep(0.5)
+
+
+async def _run(client: AsyncQdrantClient, profile: CollectionProfile, data, queries, args) -> dict:
+    collection = f"bench_profile_{profile.name}"
+    if await client.collection_exists(collection):
+        await client.delete_collection(collection)
+    await client.create_collection(collection, **_collection_config(data.shape[1], profile, hybrid=False))
+    await ensure_payload_indexes(client, collection)
+
+    t0 = time.perf_counter()
+    for start in range(0, len(data), 512):
+        batch = data[start:start + 512]
+        await client.upsert(
+            collection,
+            points=[
+                qmodels.PointStruct(
+                    id=str(uuid.UUID(int=start + i)),
+                    vector=v.tolist(),
+                    payload={"tenant_id": TENANTS[(start + i) % len(TENANTS)]},
+                )
+                for i, v in enumerate(batch)
+            ],
+            wait=True,
+        )
+    await _wait_indexed(client, collection)
+    build_s = time.perf_counter() - t0
+
+    params = search_params(profile)
+    exact = qmodels.SearchParams(exact=True)
+
+    async def search(i: int, p: qmodels.SearchParams | None) -> list:
+        response = await client.query_points(
+            collection,
+            query=queries[i].tolist(),
+            query_filter=_tenant_filter(TENANTS[i % len(TENANTS)]),
+            search_params=p,
+            limit=args.k,
+        )
+        return [r.id for r in response.points]
+
+    truth = [await search(i, exact) for i in range(len(queries))]
+    found = [await search(i, params) for i in range(len(queries))]
+    recall = sum(len(set(t) & set(f)) / max(1, len(t)) for t, f in zip(truth, found)) / len(queries)
+
+    sem = asyncio.Semaphore(args.concurrency)
+
+    async def timed(i: int) -> None:
+        async with sem:
+            await search(i, params)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(timed(i) for i in range(len(queries))))
+    qps = len(queries) / (time.perf_counter() - t0)
+
+    await client.delete_collection(collection)
+    return {
+        "profile": profile.name,
+        "quantization": profile.quantization,
+        "on_disk": profile.on_disk,
+        "hnsw_m": profile.hnsw_m,
+        "hnsw_ef": profile.hnsw_ef,
+        **_memory_mb(profile, len(data), data.shape[1]),
+        "build_seconds": round(build_s, 2),
+        "qps": round(qps, 1),
+        f"recall@{args.k}": round(recall, 4),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--qdrant-url", default=f"http://{get_settings().qdrant_host}:{get_settings().qdrant_port}")
+    parser.add_argument("--profiles", nargs="+", default=sorted(PROFILES), choices=sorted(PROFILES))
+    parser.add_argument("--points", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=get_settings().embeddings_dim)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    data = _vectors(args.points, args.dim, seed=1)
+    # Queries are perturbed corpus vectors so every tenant has true near neighbours.
+    rng = np.random.default_rng(2)
+    queries = data[rng.integers(0, len(data), args.queries)] + 0.05 * rng.standard_normal((args.queries, args.dim))
+    queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+
+    client = AsyncQdrantClient(url=args.qdrant_url, timeout=120)
+    try:
+        results = [await _run(client, get_profile(name), data, queries, args) for name in args.profiles]
+    finally:
+        await client.close()
+    print(json.dumps({"points": args.points, "dim": args.dim, "queries": args.queries, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
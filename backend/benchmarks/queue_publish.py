@@ -0,0 +1,83 @@
+"""Publish throughput: per-call connections vs. the pooled QueueProducer.
+
+Needs a reachable RabbitMQ (e.g. ``docker compose up rabbitmq``). Run with:
+
+  cd backend
+  python -m benchmarks.queue_publish --messages 2000 --concurrency 16
+
+Prints a JSON summary with messages/second for each strategy.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+
+import aio_pika
+
+from app.core.config import get_settings
+from app.services.queue_producer import QueueProducer
+
+
+def _payload(i: int) -> dict:
+    return {"job_id": i, "kind": "analyze_case", "patient_age": 42, "sex": "f", "symptoms": ["cough"]}
+
+
+async def _legacy_publish(payload: dict) -> None:
+    # Mirrors the original publish_analyze_job: connect, declare and bind per message.
+    s = get_settings()
+    connection = await aio_pika.connect_robust(
+        host=s.rabbitmq_host, port=s.rabbitmq_port, login=s.rabbitmq_user, password=s.rabbitmq_pass
+    )
+    async with connection:
+        channel = await connection.channel()
+        exchange = await channel.declare_exchange(s.rabbitmq_exchange, aio_pika.ExchangeType.TOPIC, durable=True)
+        queue = await channel.declare_queue(s.rabbitmq_queue_analyze, durable=True)
+        await queue.bind(exchange, routing_key=s.rabbitmq_queue_analyze)
+        await exchange.publish(
+            aio_pika.Message(body=str(payload).encode("utf-8")), routing_key=s.rabbitmq_queue_analyze
+        )
+
+
+async def _run_concurrent(fn, messages: int, concurrency: int) -> float:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with sem:
+            await fn(_payload(i))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(messages)))
+    return time.perf_counter() - started
+
+
+async def main(messages: int, concurrency: int, legacy_messages: int) -> dict:
+    results: dict[str, dict] = {}
+
+    elapsed = await _run_concurrent(_legacy_publish, legacy_messages, concurrency)
+    results["legacy_per_call_connection"] = {"messages": legacy_messages, "msg_per_s": legacy_messages / elapsed}
+
+    producer = QueueProducer()
+    await producer.start()
+    try:
+        elapsed = await _run_concurrent(producer.publish, messages, concurrency)
+        results["pooled_publish"] = {"messages": messages, "msg_per_s": messages / elapsed}
+
+        started = time.perf_counter()
+        await producer.publish_many([_payload(i) for i in range(messages)])
+        elapsed = time.perf_counter() - started
+        results["pooled_publish_many"] = {"messages": messages, "msg_per_s": messages / elapsed}
+    finally:
+        await producer.close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--legacy-messages", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.messages, args.concurrency, args.legacy_messages)), indent=2))
@@ -0,0 +1,78 @@
+"""Bulk-load guideline documents into Qdrant outside the API request cycle.
+
+Run with:
+
+  cd backend
+  python -m scripts.ingest_documents --tenant <slug-or-uuid> guidelines.ndjson [more.ndjson ...]
+
+Each input line is a JSON object with ``title``, ``content`` and optional ``source`` /
+``document_id``. Files are streamed, so inputs of any size load in constant memory.
+Re-running with unchanged documents is a no-op; only new or edited chunks are
+embedded. Pass ``--force`` after rebuilding the Qdrant collection. Prints the
+ingestion report as JSON.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import uuid
+from pathlib import Path
+from typing import AsyncIterator
+
+from sqlalchemy import select
+
+from app.core.config import get_settings
+from app.db import models
+from app.db.session import AsyncSessionLocal, async_engine
+from app.schemas.document import DocumentIngestRequest
+from app.services.embeddings import close_embedding_batcher
+from app.services.ingestion import IngestionPipeline, read_ndjson
+from app.services.qdrant_client import close_async_qdrant
+
+
+async def _file_chunks(path: Path, size: int = 1 << 20) -> AsyncIterator[bytes]:
+    with path.open("rb") as fh:
+        while chunk := await asyncio.to_thread(fh.read, size):
+            yield chunk
+
+
+async def _documents(paths: list[Path], pipeline: IngestionPipeline) -> AsyncIterator[DocumentIngestRequest]:
+    for path in paths:
+        async for doc in read_ndjson(_file_chunks(path), lambda msg, p=path: pipeline.report.add_error(f"{p}: {msg}")):
+            yield doc
+
+
+async def _resolve_tenant(value: str) -> str:
+    try:
+        return str(uuid.UUID(value))
+    except ValueError:
+        pass
+    async with AsyncSessionLocal() as db:
+        tenant_id = await db.scalar(select(models.Tenant.id).where(models.Tenant.slug == value))
+    if tenant_id is None:
+        raise SystemExit(f"Unknown tenant: {value}")
+    return str(tenant_id)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", type=Path)
+    parser.add_argument("--tenant", default=get_settings().default_tenant_id, help="tenant slug or id")
+    parser.add_argument("--collection", default=None)
+    parser.add_argument("--force", action="store_true", help="re-embed documents the registry marks as unchanged")
+    args = parser.parse_args()
+
+    try:
+        pipeline = IngestionPipeline(await _resolve_tenant(args.tenant), collection=args.collection, force=args.force)
+        report = await pipeline.run(_documents(args.paths, pipeline))
+    finally:
+        await close_embedding_batcher()
+        await close_async_qdrant()
+        await async_engine.dispose()
+    print(json.dumps(report.as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
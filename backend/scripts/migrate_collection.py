@@ -0,0 +1,154 @@
+"""Rebuild the guidelines collection under another storage profile without downtime.
+
+Run with:
+
+  cd backend
+  python -m scripts.migrate_collection --profile int8 [--collection guidelines_v1] [--drop-old]
+
+The API always addresses ``QDRANT_COLLECTION`` by name, and new deployments serve
+that name as an alias of a versioned collection. This script copies every point
+(vectors and payload, so nothing is re-embedded) into a new physical collection
+``<name>__<profile>_<timestamp>`` created with the requested profile, checks the
+point counts match, then repoints the alias ``<name>`` in a single atomic alias
+update. Searches keep hitting the old collection until the switch; nothing is
+deleted before it.
+
+Collections created before aliases were used are plain collections, and an alias
+cannot take a name a collection still holds. Moving the name is a maintenance step:
+stop the API, the LLM worker and ingestion, then run with ``--maintenance``. The
+copy still completes before anything is touched, but between deleting the old
+collection and creating the alias the name does not exist, and a process started
+in that window would recreate it empty. This only happens once per collection.
+
+Pause ingestion while the copy runs (or re-run ``scripts.ingest_documents --force``
+afterwards): points written to the old collection after they were scrolled are not
+copied. Set ``QDRANT_PROFILE`` to the same profile so per-query search parameters
+match. Prints a JSON summary.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http import models as qmodels
+
+from app.core.config import get_settings
+from app.services.qdrant_client import (
+    _alias_operation,
+    _collection_config,
+    _layout_of,
+    close_async_qdrant,
+    ensure_payload_indexes,
+    init_async_qdrant,
+)
+from app.services.qdrant_profiles import PROFILES, get_profile
+
+
+async def _resolve(client: AsyncQdrantClient, name: str) -> tuple[str, bool]:
+    """Physical collection behind ``name`` and whether ``name`` is an alias."""
+    for alias in (await client.get_aliases()).aliases:
+        if alias.alias_name == name:
+            return alias.collection_name, True
+    if await client.collection_exists(name):
+        return name, False
+    raise SystemExit(f"Collection or alias not found: {name}")
+
+
+async def _copy(client: AsyncQdrantClient, source: str, target: str, batch_size: int) -> int:
+    copied = 0
+    offset = None
+    while True:
+        points, offset = await client.scroll(
+            source, limit=batch_size, offset=offset, with_payload=True, with_vectors=True
+        )
+        if points:
+            await client.upsert(
+                target,
+                points=[qmodels.PointStruct(id=p.id, vector=p.vector, payload=p.payload) for p in points],
+                wait=True,
+            )
+            copied += len(points)
+        if offset is None:
+            return copied
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profile", required=True, choices=sorted(PROFILES))
+    parser.add_argument("--collection", default=get_settings().qdrant_collection, help="name the API uses (alias)")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--drop-old", action="store_true", help="delete the previous collection after the switch")
+    parser.add_argument(
+        "--maintenance",
+        action="store_true",
+        help="writers are stopped; allow turning a plain collection into an alias (deletes it before the switch)",
+    )
+    args = parser.parse_args()
+
+    client = init_async_qdrant()
+    try:
+        source, is_alias = await _resolve(client, args.collection)
+        if not is_alias and not args.maintenance:
+            raise SystemExit(
+                f"{args.collection} is a plain collection, not an alias. Stop the API, the LLM worker and "
+                "ingestion, then re-run with --maintenance to move the name onto an alias."
+            )
+        info = await client.get_collection(source)
+        layout = _layout_of(info)
+        vectors = info.config.params.vectors
+        size = (vectors[layout.dense] if layout.dense else vectors).size
+        target = f"{args.collection}__{args.profile}_{time.strftime('%Y%m%d%H%M%S')}"
+
+        started = time.monotonic()
+        await client.create_collection(
+            target, **_collection_config(size, get_profile(args.profile), hybrid=layout.dense is not None)
+        )
+        # Index before copying so the tenant-partitioned layout is built as points arrive.
+        await ensure_payload_indexes(client, target)
+        copied = await _copy(client, source, target, args.batch_size)
+        expected = (await client.count(source, exact=True)).count
+        actual = (await client.count(target, exact=True)).count
+        if actual != expected:
+            await client.delete_collection(target)
+            raise SystemExit(f"Copy incomplete ({actual} of {expected} points); {source} left in place")
+
+        if is_alias:
+            operations = [
+                qmodels.DeleteAliasOperation(delete_alias=qmodels.DeleteAlias(alias_name=args.collection)),
+                _alias_operation(target, args.collection),
+            ]
+            await client.update_collection_aliases(change_aliases_operations=operations)
+        else:
+            # Maintenance only: an alias cannot shadow a collection, so the old one must go first.
+            await client.delete_collection(source)
+            try:
+                await client.update_collection_aliases(
+                    change_aliases_operations=[_alias_operation(target, args.collection)]
+                )
+            except Exception as exc:
+                raise SystemExit(
+                    f"{source} was deleted but the alias could not be created ({exc}); a writer probably "
+                    f"recreated {args.collection}. Stop all writers, delete it and alias it to {target}."
+                ) from exc
+        if is_alias and args.drop_old:
+            await client.delete_collection(source)
+    finally:
+        await close_async_qdrant()
+
+    print(json.dumps({
+        "alias": args.collection,
+        "profile": args.profile,
+        "previous": source,
+        "current": target,
+        "points": copied,
+        "previous_dropped": not is_alias or args.drop_old,
+        "seconds": round(time.monotonic() - started, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+"""Regression tests for the sentence chunker in ``app.services.chunking``.
+
+Token counts come from a whitespace stub, so the embedding tokenizer is not needed.
+
+  cd backend
+  pip install pytest && python -m pytest tests
+"""
+
+from __future__ import annotations
+
+from app.services.chunking import chunk_text
+
+
+def _words(texts: list[str]) -> list[int]:
+    return [len(t.split()) for t in texts]
+
+
+def _chunk(text: str, max_tokens: int = 50, overlap_tokens: int = 0):
+    return chunk_text(text, max_tokens=max_tokens, overlap_tokens=overlap_tokens, count_tokens=_words)
+
+
+def test_headings_prefix_chunk_text_and_are_kept_as_metadata() -> None:
+    chunks = _chunk(
+        "# Sepsis\nGive fluids early. Monitor urine output.\n\n"
+        "ANTIBIOTICS:\nStart within one hour.\n\n"
+        "## Contraindications"
+    )
+
+    assert [(c.heading, c.text) for c in chunks] == [
+        ("Sepsis", "Sepsis\nGive fluids early. Monitor urine output."),
+        ("ANTIBIOTICS", "ANTIBIOTICS\nStart within one hour."),
+        ("Contraindications", "Contraindications"),  # a body-less heading is content too
+    ]
+    assert chunks[0].token_count == 1 + 1 + 6  # heading, its newline, body
+
+
+def test_short_clinical_lines_stay_in_the_text() -> None:
+    chunks = _chunk("Chest pain on exertion.\nHR 120\nBP 90/60\nRepeat ECG in 15 minutes.\nDO NOT GIVE ASPIRIN")
+
+    # Readings are never headings; an alert with no body after it is text, not a title.
+    assert len(chunks) == 1
+    assert chunks[0].heading is None
+    for line in ("HR 120", "BP 90/60", "Repeat ECG in 15 minutes.", "DO NOT GIVE ASPIRIN"):
+        assert line in chunks[0].text
+
+
+def test_chunks_respect_the_budget_and_share_trailing_sentences() -> None:
+    sentences = [f"Step {i} is done." for i in range(10)]  # 4 tokens each
+    chunks = _chunk(" ".join(sentences), max_tokens=10, overlap_tokens=4)
+
+    assert all(c.token_count <= 10 for c in chunks)
+    assert chunks[0].text == "Step 0 is done. Step 1 is done."
+    for prev, cur in zip(chunks, chunks[1:]):
+        # Exactly one 4-token sentence fits the overlap.
+        assert cur.text.startswith(prev.text.split(". ")[-1])
+    covered = " ".join(c.text for c in chunks)
+    assert all(s in covered for s in sentences)
+
+
+def test_sentence_longer_than_the_budget_is_split_at_whitespace() -> None:
+    words = [f"w{i:02d}" for i in range(30)]
+    chunks = _chunk(" ".join(words) + ".", max_tokens=10)
+
+    assert len(chunks) == 3
+    assert all(c.token_count <= 10 for c in chunks)
+    assert " ".join(c.text for c in chunks).split() == words[:-1] + [words[-1] + "."]
@@ -0,0 +1,119 @@
+"""Cancellation and lease rules of ``app.core.singleflight``.
+
+  cd backend
+  pip install pytest && python -m pytest tests
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+from app.core.singleflight import SingleFlight, _SharedFlights
+
+
+class _Upstream:
+    """Counts calls and blocks each one until ``release`` is set."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.cancelled = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return f"result-{self.calls}"
+
+
+def test_cancelled_waiter_leaves_call_running_for_the_others() -> None:
+    async def scenario() -> None:
+        flight = SingleFlight("test")
+        upstream = _Upstream()
+        first = asyncio.create_task(flight.do("k", upstream))
+        second = asyncio.create_task(flight.do("k", upstream))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.sleep(0)
+        upstream.release.set()
+
+        assert await second == "result-1"
+        assert first.cancelled()
+        assert upstream.calls == 1
+        assert upstream.cancelled == 0
+
+    asyncio.run(scenario())
+
+
+def test_last_waiter_cancelled_stops_the_call_and_forgets_the_key() -> None:
+    async def scenario() -> None:
+        flight = SingleFlight("test")
+        upstream = _Upstream()
+        first = asyncio.create_task(flight.do("k", upstream))
+        second = asyncio.create_task(flight.do("k", upstream))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        second.cancel()
+        await asyncio.gather(first, second, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        assert upstream.cancelled == 1
+        assert "k" not in flight._calls
+
+        upstream.release.set()
+        assert await flight.do("k", upstream) == "result-2"  # a new caller starts afresh
+
+    asyncio.run(scenario())
+
+
+def test_shared_leader_keeps_its_claim_past_the_lease(tmp_path) -> None:
+    async def scenario() -> None:
+        path = tmp_path / "singleflight.sqlite3"
+        # Two worker processes on one host: separate connections and owners.
+        leader = SingleFlight("test", _SharedFlights(path, lease_seconds=0.15, result_ttl=2.0, poll_interval=0.01))
+        follower = SingleFlight("test", _SharedFlights(path, lease_seconds=0.15, result_ttl=2.0, poll_interval=0.01))
+        calls = 0
+
+        async def slow() -> dict:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.5)  # several leases long
+            return {"answer": calls}
+
+        first = asyncio.create_task(leader.do("k", slow))
+        await asyncio.sleep(0.05)
+        results = await asyncio.gather(first, follower.do("k", slow))
+
+        assert results == [{"answer": 1}, {"answer": 1}]
+        assert calls == 1
+        leader.shared.close()
+        follower.shared.close()
+
+    asyncio.run(scenario())
+
+
+def test_shared_claim_of_a_failed_leader_is_released(tmp_path) -> None:
+    async def scenario() -> None:
+        shared = _SharedFlights(tmp_path / "singleflight.sqlite3", lease_seconds=30.0, result_ttl=2.0)
+        flight = SingleFlight("test", shared)
+
+        async def failing() -> dict:
+            raise RuntimeError("upstream down")
+
+        async def ok() -> dict:
+            return {"answer": 1}
+
+        try:
+            await flight.do("k", failing)
+        except RuntimeError:
+            pass
+        # Without the lease expiring, the next caller claims the key and runs.
+        assert await asyncio.wait_for(flight.do("k", ok), 1.0) == {"answer": 1}
+        shared.close()
+
+    asyncio.run(scenario())
@@ -1,8 +1,29 @@
+import asyncio
+import json
+import os
+import random
+import time
+
 from fastapi import FastAPI, Header
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
+from simulator import Engine, SimConfig, SimError, count_tokens, prompt_tokens
+
 app = FastAPI(title="LLM Stub")
 
+# Delay between streamed chunks, to make time-to-first-token observable offline.
+STREAM_CHUNK_DELAY_MS = float(os.getenv("STUB_STREAM_CHUNK_DELAY_MS", "0"))
+# Load-test knobs (see backend/benchmarks/load.py): a fixed delay before the first
+# token, a decode rate for the rest (0 = instant), and the share of requests failed with 500.
+LATENCY_MS = float(os.getenv("STUB_LATENCY_MS", "0"))
+TOKENS_PER_SECOND = float(os.getenv("STUB_TOKENS_PER_SECOND", "0"))
+FAILURE_RATE = float(os.getenv("STUB_FAILURE_RATE", "0"))
+# vLLM simulator (prefill, decode rate, batching, max_tokens, injected errors);
+# configured with STUB_SIM_* env vars or PUT /sim/config, see simulator.py.
+SIMULATE = os.getenv("STUB_SIMULATE", "false").lower() in ("1", "true", "yes")
+engine = Engine(SimConfig.from_env())
+
 class ChatMessage(BaseModel):
     role: str
     content: str
@@ -11,14 +32,52 @@ class ChatRequest(BaseModel):
     model: str
     messages: list[ChatMessage]
     temperature: float | None = 0.2
+    max_tokens: int | None = None
+    stream: bool = False
+    stream_options: dict | None = None
+
+
+class SimConfigUpdate(BaseModel):
+    prefill_tokens_per_second: float | None = None
+    decode_tokens_per_second: float | None = None
+    max_batch_size: int | None = None
+    batch_slowdown: float | None = None
+    max_waiting: int | None = None
+    output_tokens: int | None = None
+    output_tokens_jitter: float | None = None
+    max_model_len: int | None = None
+    error_rate_429: float | None = None
+    error_rate_500: float | None = None
+    error_rate_503: float | None = None
+    timeout_rate: float | None = None
+    timeout_seconds: float | None = None
 
 @app.get("/health")
 async def health():
     return {"status": "ok"}
 
-@app.post("/v1/chat/completions")
-async def chat(req: ChatRequest, authorization: str | None = Header(default=None)):
-    content = "Stubbed response. " + (req.messages[-1].content if req.messages else "")
+
+@app.get("/sim/config")
+async def get_sim_config():
+    return {"enabled": SIMULATE, **engine.stats()["config"]}
+
+
+@app.put("/sim/config")
+async def update_sim_config(update: SimConfigUpdate):
+    await engine.reconfigure(update.model_dump(exclude_none=True))
+    return {"enabled": SIMULATE, **engine.stats()["config"]}
+
+
+@app.get("/sim/stats")
+async def sim_stats():
+    return engine.stats()
+
+
+def _usage(n_prompt: int, n_completion: int) -> dict:
+    return {"prompt_tokens": n_prompt, "completion_tokens": n_completion, "total_tokens": n_prompt + n_completion}
+
+
+def _completion(req: ChatRequest, content: str, finish_reason: str, usage: dict) -> dict:
     return {
         "id": "chatcmpl-stub",
         "object": "chat.completion",
@@ -26,9 +85,110 @@ async def chat(req: ChatRequest, authorization: str | None = Header(default=None
             {
                 "index": 0,
                 "message": {"role": "assistant", "content": content},
-                "finish_reason": "stop",
+                "finish_reason": finish_reason,
             }
         ],
-        "created": 0,
+        "created": int(time.time()),
         "model": req.model,
+        "usage": usage,
     }
+
+
+def _chunk(
+    req: ChatRequest, created: int, delta: dict, finish_reason: str | None = None, usage: dict | None = None
+) -> str:
+    body = {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion.chunk",
+        "created": created,
+        "model": req.model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if usage is None else [],
+    }
+    if usage is not None:
+        body["usage"] = usage
+    return f"data: {json.dumps(body)}\n\n"
+
+
+def _include_usage(req: ChatRequest) -> bool:
+    return bool((req.stream_options or {}).get("include_usage"))
+
+
+def _token_delay() -> float:
+    return STREAM_CHUNK_DELAY_MS / 1000 + (1 / TOKENS_PER_SECOND if TOKENS_PER_SECOND else 0.0)
+
+
+async def _stream(req: ChatRequest, content: str):
+    created = int(time.time())
+    if LATENCY_MS:
+        await asyncio.sleep(LATENCY_MS / 1000)
+    yield _chunk(req, created, {"role": "assistant"})
+    # Split on spaces but keep them, so the client sees word-sized deltas.
+    words = content.split(" ")
+    for i, word in enumerate(words):
+        if _token_delay():
+            await asyncio.sleep(_token_delay())
+        yield _chunk(req, created, {"content": word if i == 0 else " " + word})
+    yield _chunk(req, created, {}, finish_reason="stop")
+    if _include_usage(req):
+        yield _chunk(req, created, {}, usage=_usage(prompt_tokens(req.messages), count_tokens(content)))
+    yield "data: [DONE]\n\n"
+
+
+async def _sim_stream(req: ChatRequest, seed: str, n_prompt: int, n_tokens: int, finish_reason: str):
+    created = int(time.time())
+    try:
+        first = True
+        async for token in engine.generate(seed, n_prompt, n_tokens):
+            if first:
+                # Like vLLM, the role chunk arrives with the first token, after prefill.
+                yield _chunk(req, created, {"role": "assistant"})
+                first = False
+            yield _chunk(req, created, {"content": token})
+    finally:
+        await engine.release()
+    yield _chunk(req, created, {}, finish_reason=finish_reason)
+    if _include_usage(req):
+        yield _chunk(req, created, {}, usage=_usage(n_prompt, n_tokens))
+    yield "data: [DONE]\n\n"
+
+
+def _error(exc: SimError) -> JSONResponse:
+    # vLLM's OpenAI-compatible error body.
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"object": "error", "message": exc.message, "type": "SimulatedError", "code": exc.status_code},
+    )
+
+
+async def _simulate(req: ChatRequest):
+    n_prompt = prompt_tokens(req.messages)
+    try:
+        n_tokens, finish_reason = engine.plan(n_prompt, req.max_tokens)
+        await engine.admit()
+    except SimError as exc:
+        return _error(exc)
+    seed = req.messages[-1].content if req.messages else ""
+    if req.stream:
+        return StreamingResponse(
+            _sim_stream(req, seed, n_prompt, n_tokens, finish_reason), media_type="text/event-stream"
+        )
+    try:
+        content = "".join([token async for token in engine.generate(seed, n_prompt, n_tokens)])
+    finally:
+        await engine.release()
+    return _completion(req, content, finish_reason, _usage(n_prompt, n_tokens))
+
+
+@app.post("/v1/chat/completions")
+async def chat(req: ChatRequest, authorization: str | None = Header(default=None)):
+    if SIMULATE:
+        return await _simulate(req)
+    if FAILURE_RATE and random.random() < FAILURE_RATE:
+        return JSONResponse(status_code=500, content={"error": "injected failure"})
+    content = "Stubbed response. " + (req.messages[-1].content if req.messages else "")
+    if req.stream:
+        return StreamingResponse(_stream(req, content), media_type="text/event-stream")
+    delay = LATENCY_MS / 1000 + len(content.split(" ")) * _token_delay()
+    if delay:
+        await asyncio.sleep(delay)
+    return _completion(req, content, "stop", _usage(prompt_tokens(req.messages), count_tokens(content)))
@@ -0,0 +1,170 @@
+"""vLLM performance model for the stub (``STUB_SIMULATE=true``).
+
+Each request waits for one of ``max_batch_size`` sequence slots (continuous
+batching), spends ``prompt_tokens / prefill_tokens_per_second`` in prefill, then
+decodes one token per step. A step takes ``1 / decode_tokens_per_second`` for a lone
+sequence and grows by ``batch_slowdown`` for every other running sequence, so
+latency rises with concurrency the way it does on a real GPU. Completions stop at
+``max_tokens`` (finish_reason "length") and report token usage.
+
+Parameters come from ``STUB_SIM_*`` env vars and can be changed at runtime through
+``PUT /sim/config``; ``GET /sim/stats`` shows the scheduler state.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+from dataclasses import asdict, dataclass, fields
+from typing import AsyncIterator
+
+_FILLER = (
+    "Consider the differential carefully, review vital signs, correlate with examination findings "
+    "and escalate promptly if red flags develop or the patient deteriorates."
+).split(" ")
+
+
+@dataclass
+class SimConfig:
+    prefill_tokens_per_second: float = 5000.0
+    decode_tokens_per_second: float = 40.0  # per sequence, batch of one
+    max_batch_size: int = 32  # concurrently decoding sequences (vLLM max_num_seqs)
+    batch_slowdown: float = 0.03  # step time grows by this fraction per extra running sequence
+    max_waiting: int = 0  # queued requests beyond this get 503; 0 = unbounded like vLLM
+    output_tokens: int = 200  # natural completion length before max_tokens applies
+    output_tokens_jitter: float = 0.3
+    max_model_len: int = 8192  # prompt + max_tokens above this is a 400
+    error_rate_429: float = 0.0
+    error_rate_500: float = 0.0
+    error_rate_503: float = 0.0
+    timeout_rate: float = 0.0  # share of requests that hang for timeout_seconds, then 504
+    timeout_seconds: float = 600.0
+
+    @classmethod
+    def from_env(cls) -> "SimConfig":
+        values = {}
+        for f in fields(cls):
+            raw = os.getenv(f"STUB_SIM_{f.name.upper()}")
+            if raw is not None:
+                values[f.name] = type(f.default)(raw)
+        return cls(**values)
+
+    def update(self, changes: dict) -> None:
+        for f in fields(self):
+            if changes.get(f.name) is not None:
+                setattr(self, f.name, type(f.default)(changes[f.name]))
+
+
+class SimError(Exception):
+    def __init__(self, status_code: int, message: str) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+def count_tokens(text: str) -> int:
+    # ~4 characters per token, the usual rule of thumb for Llama-style tokenizers.
+    return max(1, len(text) // 4)
+
+
+def prompt_tokens(messages: list) -> int:
+    # Chat template overhead of a few tokens per message.
+    return sum(count_tokens(m.content) + 4 for m in messages)
+
+
+class Engine:
+    def __init__(self, config: SimConfig) -> None:
+        self.config = config
+        self.running = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.generated_tokens = 0
+        self._cond = asyncio.Condition()
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "generated_tokens": self.generated_tokens,
+            "config": asdict(self.config),
+        }
+
+    async def _inject_failure(self) -> None:
+        c = self.config
+        roll = random.random()
+        for status, rate in ((429, c.error_rate_429), (500, c.error_rate_500), (503, c.error_rate_503)):
+            if roll < rate:
+                self.rejected += 1
+                raise SimError(status, f"injected {status}")
+            roll -= rate
+        if roll < c.timeout_rate:
+            await asyncio.sleep(c.timeout_seconds)
+            self.rejected += 1
+            raise SimError(504, "injected timeout")
+
+    def plan(self, n_prompt: int, max_tokens: int | None) -> tuple[int, str]:
+        """Completion length and finish reason; raises like vLLM for over-long requests."""
+        c = self.config
+        requested = n_prompt + (max_tokens or 0)
+        if requested > c.max_model_len:
+            raise SimError(
+                400,
+                f"This model's maximum context length is {c.max_model_len} tokens. However, you requested "
+                f"{requested} tokens ({n_prompt} in the messages, {max_tokens or 0} in the completion).",
+            )
+        jitter = random.uniform(1 - c.output_tokens_jitter, 1 + c.output_tokens_jitter)
+        natural = max(1, round(c.output_tokens * jitter))
+        limit = min(max_tokens or c.max_model_len - n_prompt, c.max_model_len - n_prompt)
+        if natural > limit:
+            return limit, "length"
+        return natural, "stop"
+
+    async def admit(self) -> None:
+        await self._inject_failure()
+        c = self.config
+        if c.max_waiting and self.running >= c.max_batch_size and self.waiting >= c.max_waiting:
+            self.rejected += 1
+            raise SimError(503, "Server overloaded: waiting queue is full")
+        async with self._cond:
+            self.waiting += 1
+            try:
+                await self._cond.wait_for(lambda: self.running < self.config.max_batch_size)
+            finally:
+                self.waiting -= 1
+            self.running += 1
+
+    async def reconfigure(self, changes: dict) -> None:
+        async with self._cond:
+            self.config.update(changes)
+            self._cond.notify_all()  # a larger batch admits waiting requests now
+
+    async def release(self) -> None:
+        async with self._cond:
+            self.running -= 1
+            self._cond.notify_all()
+
+    def _step_seconds(self) -> float:
+        c = self.config
+        return (1 + c.batch_slowdown * max(0, self.running - 1)) / c.decode_tokens_per_second
+
+    async def generate(self, seed_text: str, n_prompt: int, n_tokens: int) -> AsyncIterator[str]:
+        """Yield ``n_tokens`` word tokens after prefill; caller holds a slot from ``admit``."""
+        await asyncio.sleep(n_prompt / self.config.prefill_tokens_per_second)
+        words = ("Simulated response. " + seed_text).split() or _FILLER
+        debt = 0.0
+        for i in range(n_tokens):
+            debt += self._step_seconds()
+            # Sleep in >=5 ms slices so high decode rates do not drown in timer overhead.
+            if debt >= 0.005 or i == 0:
+                await asyncio.sleep(debt)
+                debt = 0.0
+            word = words[i] if i < len(words) else _FILLER[(i - len(words)) % len(_FILLER)]
+            self.generated_tokens += 1
+            yield word if i == 0 else " " + word
+        if debt:
+            await asyncio.sleep(debt)
+        self.completed += 1